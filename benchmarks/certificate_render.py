@@ -0,0 +1,100 @@
+"""
+Certificate rendering benchmark.
+
+Renders course and professional certificates in-process and reports PDFs per
+second and peak Python memory for two variants:
+
+    full      static layer redrawn for every PDF (the original approach)
+    template  static layer built once per process and reused as a form XObject
+
+Certificates are built in memory, so no database rows are needed; only the
+settings module has to import:
+
+    python benchmarks/certificate_render.py --count 2000
+
+Use the numbers to size generate_certificates: throughput per core times the
+number of --workers is the ceiling for a bulk run.
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def make_certificates():
+    """Unsaved certificates with realistic field lengths"""
+    from courses.models import (
+        User, Course, ProfessionalCertification, CourseCertificate,
+        ProfessionalCertificationCertificate
+    )
+
+    user = User(username='bench', first_name='Adaeze', last_name='Okonkwo-Williams')
+    issued_at = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    course = Course(title='Foundations of Data Engineering: Pipelines, Warehouses and Streaming Systems')
+    certification = ProfessionalCertification(title='Professional Certificate in Data Engineering')
+    certification.active_courses = [
+        Course(title=f'Course {i}: Building Reliable Data Systems') for i in range(1, 9)
+    ]
+    return {
+        'course': CourseCertificate(
+            user=user, course=course, certificate_id='CERT-0123456789AB', issued_at=issued_at
+        ),
+        'professional': ProfessionalCertificationCertificate(
+            user=user, certification=certification, certificate_id='PROF-0123456789AB', issued_at=issued_at
+        ),
+    }
+
+
+def measure(template, certificate, count, cache_static):
+    # Warm up: builds the cached static layer and imports font metrics
+    template.render(certificate, cache_static=cache_static)
+
+    started = time.perf_counter()
+    size = 0
+    for _ in range(count):
+        size += len(template.render(certificate, cache_static=cache_static))
+    elapsed = time.perf_counter() - started
+
+    # tracemalloc slows rendering down a lot, so measure memory separately
+    tracemalloc.start()
+    for _ in range(min(count, 50)):
+        template.render(certificate, cache_static=cache_static)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count / elapsed, peak, size / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=1000, help="PDFs rendered per variant")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'learning_platform.settings')
+    import django
+    django.setup()
+
+    from reportlab.lib import rl_accel
+    from courses.certificate_templates import COURSE_TEMPLATE, PROFESSIONAL_TEMPLATE
+
+    certificates = make_certificates()
+    templates = {'course': COURSE_TEMPLATE, 'professional': PROFESSIONAL_TEMPLATE}
+
+    print(f"ReportLab C accelerators: {'yes' if rl_accel._c_funcs else 'no (pip install rl_accel)'}")
+    print(f"{'kind':<14}{'variant':<10}{'PDFs/s':>10}{'peak KiB':>12}{'avg bytes':>12}")
+    for kind, template in templates.items():
+        for variant, cache_static in (('full', False), ('template', True)):
+            rate, peak, size = measure(template, certificates[kind], args.count, cache_static)
+            print(f"{kind:<14}{variant:<10}{rate:>10.0f}{peak / 1024:>12.1f}{size:>12.0f}")
+
+    print(f"Max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
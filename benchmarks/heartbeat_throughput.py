@@ -0,0 +1,153 @@
+"""
+Video heartbeat throughput benchmark.
+
+Fires concurrent POSTs at update_video_progress on a running server, one
+logged-in session per simulated viewer, and reports requests/second and
+latency percentiles. Run it once against each deployment mode to compare:
+
+    # Seed a benchmark course, module and viewer accounts (once)
+    python benchmarks/heartbeat_throughput.py --setup --viewers 200
+
+    # Sync workers (WSGI)
+    gunicorn learning_platform.wsgi:application --workers 4 --bind 127.0.0.1:8000
+
+    # Async workers (ASGI)
+    ASYNC_PROGRESS_VIEWS=True gunicorn learning_platform.asgi:application \\
+        -k uvicorn.workers.UvicornWorker --workers 4 --bind 127.0.0.1:8000
+
+    python benchmarks/heartbeat_throughput.py --viewers 200 --requests 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+USERNAME_PREFIX = 'bench_viewer_'
+PASSWORD = 'bench-password-123'
+MODULE_TITLE = 'Benchmark heartbeat video'
+
+
+def setup_data(viewers):
+    """Create the benchmark module and viewer accounts through the ORM"""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'learning_platform.settings')
+    import django
+    django.setup()
+
+    from django.contrib.auth.hashers import make_password
+    from courses.models import User, Course, Module
+
+    course, _ = Course.objects.get_or_create(title='Benchmark course', defaults={'description': 'Benchmark'})
+    module, _ = Module.objects.get_or_create(
+        course=course,
+        title=MODULE_TITLE,
+        defaults={'module_type': 'video', 'video_duration': 3600}
+    )
+
+    password = make_password(PASSWORD)
+    existing = set(
+        User.objects.filter(username__startswith=USERNAME_PREFIX).values_list('username', flat=True)
+    )
+    User.objects.bulk_create([
+        User(username=f'{USERNAME_PREFIX}{i}', password=password)
+        for i in range(viewers)
+        if f'{USERNAME_PREFIX}{i}' not in existing
+    ])
+    print(f"Module id: {module.pk}, viewers: {viewers}")
+    return module.pk
+
+
+def login(base_url, username):
+    session = requests.Session()
+    session.get(f'{base_url}/login/')
+    response = session.post(
+        f'{base_url}/login/',
+        data={'username': username, 'password': PASSWORD},
+        headers={'X-CSRFToken': session.cookies.get('csrftoken', ''), 'Referer': f'{base_url}/login/'},
+        allow_redirects=False
+    )
+    if response.status_code != 302:
+        raise RuntimeError(f"Login failed for {username}: HTTP {response.status_code}")
+    return session
+
+
+def run_viewer(base_url, session, module_id, count, latencies, errors, lock):
+    url = f'{base_url}/module/{module_id}/video-progress/'
+    headers = {'X-CSRFToken': session.cookies.get('csrftoken', ''), 'Referer': base_url}
+    # Stay below the completion threshold so every request takes the heartbeat path
+    for i in range(count):
+        started = time.perf_counter()
+        try:
+            response = session.post(url, data={'watch_time': (i + 1) * 5}, headers=headers)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors.append(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--module', type=int, help="Module id (defaults to the one created by --setup)")
+    parser.add_argument('--viewers', type=int, default=100, help="Concurrent viewers")
+    parser.add_argument('--requests', type=int, default=20, help="Heartbeats per viewer")
+    parser.add_argument('--setup', action='store_true', help="Create benchmark data and exit")
+    args = parser.parse_args()
+
+    if args.setup:
+        setup_data(args.viewers)
+        return
+
+    if args.module is None:
+        module_id = setup_data(0)
+    else:
+        module_id = args.module
+
+    base_url = args.base_url.rstrip('/')
+    with ThreadPoolExecutor(max_workers=min(args.viewers, 64)) as pool:
+        sessions = list(pool.map(
+            lambda i: login(base_url, f'{USERNAME_PREFIX}{i}'),
+            range(args.viewers)
+        ))
+
+    latencies, errors, lock = [], [], threading.Lock()
+    threads = [
+        threading.Thread(
+            target=run_viewer,
+            args=(base_url, session, module_id, args.requests, latencies, errors, lock)
+        )
+        for session in sessions
+    ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = len(latencies) + len(errors)
+    print(f"Heartbeats:   {total} ({len(errors)} failed) from {args.viewers} viewers in {elapsed:.2f}s")
+    print(f"Throughput:   {len(latencies) / elapsed:.1f} req/s")
+    if latencies:
+        latencies.sort()
+        print(f"Latency p50:  {statistics.median(latencies) * 1000:.1f} ms")
+        print(f"Latency p95:  {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+        print(f"Latency max:  {latencies[-1] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Index benchmark for the progress and catalogue hot paths.
+
+Seeds a large catalogue and progress history, then prints the EXPLAIN plan
+and median time of each hot query twice: without the indexes from migration
+0008_hot_path_indexes (by migrating courses back to 0007) and with them.
+Use a scratch database, since it migrates the courses app back and forth:
+
+    export DATABASE_URL=sqlite:///bench.db   # or a scratch PostgreSQL database
+    python manage.py migrate
+    python benchmarks/index_plans.py --setup --learners 5000
+    python benchmarks/index_plans.py --repeat 200
+
+The covering (user_id, module_id) progress index exists on PostgreSQL only;
+on SQLite the progress map query keeps using the unique index.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+BEFORE_MIGRATION = '0007_analytics_rollups'
+
+USERNAME_PREFIX = 'bench_learner_'
+
+
+def setup_data(learners, certifications, courses_per_certification, modules_per_course,
+               courses_per_learner, history_days, batch_size=5000):
+    """Bulk-create the catalogue and every learner's progress through the ORM"""
+    from django.utils import timezone
+    from courses.models import User, ProfessionalCertification, Course, Module, ModuleProgress
+
+    rng = random.Random(42)
+    certs = ProfessionalCertification.objects.bulk_create([
+        ProfessionalCertification(title=f'Benchmark certification {c}', description='Benchmark')
+        for c in range(certifications)
+    ])
+    courses = Course.objects.bulk_create([
+        # One in ten is retired, so the partial indexes have rows to skip
+        Course(certification=cert, title=f'{cert.title} / course {n}', description='Benchmark',
+               order=n, is_active=rng.random() > 0.1)
+        for cert in certs
+        for n in range(courses_per_certification)
+    ])
+    modules = Module.objects.bulk_create([
+        Module(course=course, title=f'{course.title} / module {n}', order=n,
+               module_type='video' if n % 4 == 3 else 'text',
+               video_duration=600 if n % 4 == 3 else 0, is_active=rng.random() > 0.1)
+        for course in courses
+        for n in range(modules_per_course)
+    ], batch_size=batch_size)
+    modules_by_course = {}
+    for module in modules:
+        modules_by_course.setdefault(module.course_id, []).append(module)
+
+    users = User.objects.bulk_create([
+        User(username=f'{USERNAME_PREFIX}{i}', password='!') for i in range(learners)
+    ], batch_size=batch_size)
+
+    rows = []
+    created = 0
+    for user in users:
+        for course in rng.sample(courses, min(courses_per_learner, len(courses))):
+            for module in modules_by_course[course.pk][:rng.randint(1, modules_per_course)]:
+                done = rng.random() < 0.7
+                rows.append(ModuleProgress(
+                    user=user, module=module, is_completed=done,
+                    video_watch_time=module.video_duration if done else rng.randint(0, module.video_duration),
+                ))
+        if len(rows) >= batch_size:
+            created += len(ModuleProgress.objects.bulk_create(rows))
+            rows = []
+    created += len(ModuleProgress.objects.bulk_create(rows))
+
+    # last_accessed is auto_now, so spread the history afterwards
+    now = timezone.now()
+    first_id = ModuleProgress.objects.order_by('pk').values_list('pk', flat=True).first() or 0
+    last_id = ModuleProgress.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    for start in range(first_id, last_id + 1, 1000):
+        ModuleProgress.objects.filter(pk__gte=start, pk__lt=start + 1000).update(
+            last_accessed=now - timedelta(minutes=rng.randint(0, history_days * 24 * 60))
+        )
+    print(f"Seeded {len(courses)} courses, {len(modules)} modules, {learners} learners, {created} progress rows")
+
+
+def hot_queries(rng):
+    """(name, function returning a queryset) for each hot path, with random parameters"""
+    from django.db.models import Count
+    from django.utils import timezone
+    from courses.models import User, ProfessionalCertification, Course, Module, ModuleProgress
+
+    user_ids = list(User.objects.filter(username__startswith=USERNAME_PREFIX).values_list('pk', flat=True))
+    course_ids = list(Course.objects.values_list('pk', flat=True))
+    certification_ids = list(ProfessionalCertification.objects.values_list('pk', flat=True))
+    if not user_ids:
+        sys.exit("No benchmark data; run with --setup first")
+    changed_since = timezone.now() - timedelta(hours=1)
+
+    def progress_map():
+        module_ids = Module.objects.filter(course_id=rng.choice(course_ids), is_active=True).values('pk')
+        return ModuleProgress.objects.filter(
+            user_id=rng.choice(user_ids), module_id__in=list(module_ids.values_list('pk', flat=True))
+        ).order_by().values_list('module_id', 'is_completed', 'video_watch_time')
+
+    return [
+        # build_progress_map(): course page and module view
+        ('progress map', progress_map),
+        # dashboard recent activity
+        ('recent activity', lambda: ModuleProgress.objects.filter(
+            user_id=rng.choice(user_ids)
+        ).order_by('-last_accessed').values_list('pk', 'module_id')[:5]),
+        # module navigation and outlines of active modules
+        ('active modules', lambda: Module.objects.filter(
+            course_id=rng.choice(course_ids), is_active=True
+        ).order_by('order').values_list('pk', 'order')),
+        # progress._active_module_counts()
+        ('active module counts', lambda: Module.objects.filter(
+            course_id__in=rng.sample(course_ids, min(30, len(course_ids))), is_active=True
+        ).order_by().values('course_id').annotate(total=Count('id'))),
+        # catalogue prefetch of active courses
+        ('active courses', lambda: Course.objects.filter(
+            certification_id__in=rng.sample(certification_ids, min(12, len(certification_ids))), is_active=True
+        ).values_list('pk', 'certification_id', 'order')),
+        # analytics refresh: rows changed since the watermark
+        ('analytics changes', lambda: ModuleProgress.objects.filter(
+            last_accessed__gt=changed_since
+        ).order_by().values_list('module_id', 'last_accessed')),
+    ]
+
+
+def analyze():
+    from django.db import connection
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def measure(repeat):
+    """{query name: (plan, median ms)} with the indexes currently in the database"""
+    analyze()
+    rng = random.Random(7)
+    results = {}
+    for name, build in hot_queries(rng):
+        plan = build().explain()
+        list(build())  # warm the page cache
+        timings = []
+        for _ in range(repeat):
+            queryset = build()
+            started = time.perf_counter()
+            list(queryset)
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = (plan, statistics.median(timings))
+    return results
+
+
+def migrate_to(migration=None):
+    """Migrate the courses app to migration, or to the latest one"""
+    from django.core.management import call_command
+    args = ['courses', migration] if migration else ['courses']
+    call_command('migrate', *args, verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--setup', action='store_true', help="Seed the benchmark data and exit")
+    parser.add_argument('--learners', type=int, default=2000)
+    parser.add_argument('--certifications', type=int, default=50)
+    parser.add_argument('--courses-per-certification', type=int, default=6)
+    parser.add_argument('--modules-per-course', type=int, default=15)
+    parser.add_argument('--courses-per-learner', type=int, default=5)
+    parser.add_argument('--history-days', type=int, default=90, help="Spread of last_accessed")
+    parser.add_argument('--repeat', type=int, default=100, help="Runs of each query per phase")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'learning_platform.settings')
+    import django
+    django.setup()
+    from django.db import connection
+
+    if args.setup:
+        setup_data(
+            args.learners, args.certifications, args.courses_per_certification,
+            args.modules_per_course, args.courses_per_learner, args.history_days
+        )
+        return
+
+    migrate_to(BEFORE_MIGRATION)
+    try:
+        before = measure(args.repeat)
+    finally:
+        migrate_to()
+    after = measure(args.repeat)
+
+    print(f"Database: {connection.vendor}, {args.repeat} runs per query\n")
+    for name, (before_plan, before_ms) in before.items():
+        after_plan, after_ms = after[name]
+        print(f"=== {name}")
+        print(f"--- without indexes ({before_ms:.3f} ms)\n{before_plan}")
+        print(f"--- with indexes ({after_ms:.3f} ms)\n{after_plan}\n")
+
+    print(f"{'query':<24}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name, (_, before_ms) in before.items():
+        after_ms = after[name][1]
+        print(f"{name:<24}{before_ms:>12.3f}{after_ms:>12.3f}{before_ms / after_ms:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Lesson body benchmark.
+
+Seeds courses whose modules carry realistically large lesson bodies, then
+runs each listing query that used to load Module.text_content twice: as a
+full model query and the way the views now run it (with the body deferred or
+only the needed fields). For each it reports the bytes of column data read
+from the database, the peak Python memory of building the objects and the
+median time:
+
+    export DATABASE_URL=sqlite:///bench.db   # or a scratch PostgreSQL database
+    python manage.py migrate
+    python benchmarks/module_content.py --setup --courses 50 --lesson-kb 20
+    python benchmarks/module_content.py
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+USERNAME = 'bench_content_learner'
+
+
+def setup_data(courses, modules_per_course, lesson_kb):
+    from courses.models import User, ProfessionalCertification, Course, Module, ModuleProgress
+
+    rng = random.Random(42)
+    paragraph = '<p>' + 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 16 + '</p>\n'
+    certification, = ProfessionalCertification.objects.bulk_create([
+        ProfessionalCertification(title='Benchmark content', description='Benchmark')
+    ])
+    course_rows = Course.objects.bulk_create([
+        Course(certification=certification, title=f'Benchmark course {n}', description='Benchmark', order=n)
+        for n in range(courses)
+    ])
+    modules = Module.objects.bulk_create([
+        Module(course=course, title=f'{course.title} / module {n}', order=n, module_type='text',
+               text_content=paragraph * max(1, lesson_kb * 1024 // len(paragraph)))
+        for course in course_rows
+        for n in range(modules_per_course)
+    ], batch_size=500)
+
+    user = User.objects.create_user(username=USERNAME, password='!')
+    ModuleProgress.objects.bulk_create([
+        ModuleProgress(user=user, module=module, is_completed=rng.random() < 0.5)
+        for module in rng.sample(modules, min(200, len(modules)))
+    ])
+    print(f"Seeded {len(course_rows)} courses, {len(modules)} modules of about {lesson_kb} KB")
+
+
+def listing_queries():
+    """(name, full queryset, queryset as the views run it) for each listing"""
+    from courses.models import User, Course, Module, ModuleProgress
+    from courses.progress import PROGRESS_MODULE_FIELDS
+
+    user = User.objects.filter(username=USERNAME).first()
+    if user is None:
+        sys.exit("No benchmark data; run with --setup first")
+    course_id = Course.objects.filter(title='Benchmark course 0').values_list('pk', flat=True).first()
+    module_id = Module.objects.filter(course_id=course_id).values_list('pk', flat=True).first()
+    recent = ModuleProgress.objects.filter(user=user).select_related('module', 'module__course')
+
+    return [
+        # dashboard recent activity
+        ('recent activity', recent.order_by('-last_accessed')[:5],
+         recent.defer('module__text_content', 'module__course__description').order_by('-last_accessed')[:5]),
+        # mark_module_complete / update_video_progress
+        ('progress endpoint', Module.objects.filter(pk=module_id),
+         Module.objects.filter(pk=module_id).only(*PROGRESS_MODULE_FIELDS)),
+        # the modules of one course as model instances
+        ('course modules', Module.objects.filter(course_id=course_id),
+         Module.objects.filter(course_id=course_id).defer('text_content')),
+        # a page of the admin module changelist
+        ('admin changelist', Module.objects.select_related('course')[:100],
+         Module.objects.select_related('course').defer('text_content')[:100]),
+    ]
+
+
+def _value_size(value):
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, (bytes, memoryview)):
+        return len(value)
+    return 8
+
+
+def bytes_read(queryset):
+    """Total size of the column values the queryset's SQL returns"""
+    from django.db import connection
+    sql, params = queryset.query.get_compiler(connection=connection).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return sum(_value_size(value) for row in cursor.fetchall() for value in row)
+
+
+def measure(queryset, repeat):
+    """(bytes read, peak memory, median ms) of evaluating queryset"""
+    size = bytes_read(queryset)
+    list(queryset.all())  # warm the page cache
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(queryset.all())
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    rows = list(queryset.all())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del rows
+    return size, peak, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--setup', action='store_true', help="Seed the benchmark data and exit")
+    parser.add_argument('--courses', type=int, default=50)
+    parser.add_argument('--modules-per-course', type=int, default=15)
+    parser.add_argument('--lesson-kb', type=int, default=20, help="Approximate size of each lesson body")
+    parser.add_argument('--repeat', type=int, default=50, help="Timed runs of each query")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'learning_platform.settings')
+    import django
+    django.setup()
+    from django.db import connection
+
+    if args.setup:
+        setup_data(args.courses, args.modules_per_course, args.lesson_kb)
+        return
+
+    print(f"Database: {connection.vendor}, {args.repeat} runs per query\n")
+    print(f"{'listing':<20}{'variant':<10}{'DB bytes':>12}{'peak memory':>14}{'median ms':>12}")
+    for name, full, deferred in listing_queries():
+        results = {'full': measure(full, args.repeat), 'deferred': measure(deferred, args.repeat)}
+        for variant, (size, peak, ms) in results.items():
+            print(f"{name:<20}{variant:<10}{size:>12,}{peak:>14,}{ms:>12.3f}")
+        (full_size, full_peak, _), (size, peak, _) = results['full'], results['deferred']
+        print(f"{'':<20}{'saved':<10}{1 - size / full_size:>11.1%}{1 - peak / full_peak:>14.1%}\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Search latency benchmark.
+
+Seeds a catalogue with lesson text, builds the search index and reports the
+median and p95 time of search_entry_ids() (the full-text query itself) and
+search_catalog() (plus loading the hits) for a set of typical queries:
+
+    export DATABASE_URL=sqlite:///bench.db   # or a scratch PostgreSQL database
+    python manage.py migrate
+    python benchmarks/search_latency.py --setup --modules 100000
+    python benchmarks/search_latency.py --repeat 50
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+STOPWORDS = 'the of and to a in is it that for on with as this be are by you can'.split()
+
+TOPIC_WORDS = (
+    'data pipeline stream batch warehouse schema query index partition replica consumer producer '
+    'latency throughput cache memory network protocol security token session cluster node shard '
+    'model training feature label metric dashboard report python django testing deployment '
+    'container kubernetes docker storage object bucket event queue topic offset commit rollback'
+).split()
+
+QUERIES = ['pipeline', 'kafka', 'consumer offset', 'data warehouse schema', 'deploy', 'kube', 'the', 'zzzz']
+
+
+def vocabulary(rng, size):
+    """(words, weights): stopwords, topic words and made-up words with a Zipf distribution"""
+    syllables = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'ze', 'pa', 'dre', 'gon', 'bel', 'tor']
+    made_up = {''.join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(size)}
+    words = STOPWORDS + TOPIC_WORDS + sorted(made_up - set(TOPIC_WORDS))
+    return words, [1 / (rank + 1) for rank in range(len(words))]
+
+
+def lesson(rng, vocab, words):
+    return ' '.join(rng.choices(*vocab, k=words)).capitalize() + '.'
+
+
+def setup_data(modules, modules_per_course, words_per_lesson, vocabulary_size):
+    from courses.models import ProfessionalCertification, Course, Module
+    from courses.search import rebuild_index
+
+    rng = random.Random(42)
+    vocab = vocabulary(rng, vocabulary_size)
+    courses_needed = max(1, modules // modules_per_course)
+    certifications = ProfessionalCertification.objects.bulk_create([
+        ProfessionalCertification(title=f'Benchmark {lesson(rng, vocab, 3)}', description=lesson(rng, vocab, 40))
+        for _ in range(max(1, courses_needed // 6))
+    ])
+    courses = Course.objects.bulk_create([
+        Course(certification=certifications[n % len(certifications)], title=lesson(rng, vocab, 4),
+               description=lesson(rng, vocab, 60), order=n)
+        for n in range(courses_needed)
+    ], batch_size=2000)
+    for start in range(0, modules, 5000):
+        Module.objects.bulk_create([
+            Module(course=courses[n % len(courses)], title=lesson(rng, vocab, 4), order=n,
+                   module_type='text', text_content=lesson(rng, vocab, words_per_lesson))
+            for n in range(start, min(start + 5000, modules))
+        ])
+
+    # bulk_create skips the signals that index single saves
+    started = time.perf_counter()
+    written = rebuild_index(batch_size=2000)
+    print(f"Indexed {written} in {time.perf_counter() - started:.1f}s")
+
+
+def timed(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return result, statistics.median(timings), timings[max(0, int(len(timings) * 0.95) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--setup', action='store_true', help="Seed and index the benchmark data and exit")
+    parser.add_argument('--modules', type=int, default=100000)
+    parser.add_argument('--modules-per-course', type=int, default=12)
+    parser.add_argument('--words-per-lesson', type=int, default=300)
+    parser.add_argument('--vocabulary-size', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=50, help="Runs of each query")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'learning_platform.settings')
+    import django
+    django.setup()
+    from django.db import connection
+    from courses.models import SearchEntry
+    from courses.search import search_catalog, search_entry_ids
+
+    if args.setup:
+        setup_data(args.modules, args.modules_per_course, args.words_per_lesson, args.vocabulary_size)
+        return
+
+    print(f"Database: {connection.vendor}, {SearchEntry.objects.count()} entries, {args.repeat} runs per query\n")
+    print(f"{'query':<24}{'hits':>6}{'index p50':>12}{'index p95':>12}{'page p50':>12}")
+    for query in QUERIES:
+        ids, index_p50, index_p95 = timed(lambda: search_entry_ids(query), args.repeat)
+        _, page_p50, _ = timed(lambda: search_catalog(query), args.repeat)
+        print(f"{query:<24}{len(ids):>6}{index_p50:>10.2f}ms{index_p95:>10.2f}ms{page_p50:>10.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Session writes per video heartbeat.
+
+Logs a learner in and sends video heartbeats (update_video_progress) every
+5 seconds of simulated time, under several session configurations, and
+counts per heartbeat the statements that wrote to django_session, the ones
+that read it, all other writes (the progress update itself, and the
+cached_db copy of the session when the 'shared' cache is a database table)
+and the responses that set a new session cookie. Rows are created in a transaction
+that is rolled back at the end, so any migrated database works; the
+cached_db runs need the 'shared' cache (REDIS_URL, or
+`python manage.py createcachetable`):
+
+    export DATABASE_URL=sqlite:///bench.db   # or a scratch PostgreSQL database
+    python manage.py migrate && python manage.py createcachetable
+    python benchmarks/session_writes.py --minutes 30 --interval 300
+
+The last column checks that expiry still slides: every save re-sends the
+session cookie with a new expiry, so the longest stretch of simulated time
+between two of them is the most an active session's expiry falls behind.
+"""
+import argparse
+import os
+import re
+import sys
+from pathlib import Path
+from unittest import mock
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+HEARTBEAT_SECONDS = 5
+
+WRITE = re.compile(r'^\s*(INSERT|UPDATE|DELETE)\b', re.IGNORECASE)
+
+
+class StatementCounter:
+    """Execute wrapper counting session reads, session writes and other writes"""
+
+    def __init__(self):
+        self.counts = {'session_writes': 0, 'session_reads': 0, 'other_writes': 0}
+
+    def __call__(self, execute, sql, params, many, context):
+        if 'django_session' in sql:
+            self.counts['session_writes' if WRITE.match(sql) else 'session_reads'] += 1
+        elif WRITE.match(sql):
+            self.counts['other_writes'] += 1
+        return execute(sql, params, many, context)
+
+
+def configurations(interval):
+    engines = {
+        'db': 'django.contrib.sessions.backends.db',
+        'cached_db': 'django.contrib.sessions.backends.cached_db',
+        'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    }
+    for name, engine in engines.items():
+        yield f'{name}, every request', engine, 0
+        yield f'{name}, every {interval}s', engine, interval
+
+
+def run(engine, interval, heartbeats, user, module):
+    """Per-heartbeat counts and the longest simulated time between session saves"""
+    from django.conf import settings
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.urls import reverse
+    from learning_platform import sessions
+
+    clock = mock.Mock()
+    clock.time.return_value = 1_000_000_000
+    with override_settings(
+        SESSION_ENGINE=engine, SESSION_REFRESH_INTERVAL=interval, SESSION_SAVE_EVERY_REQUEST=interval == 0
+    ), mock.patch.object(sessions, 'time', clock):
+        client = Client()
+        client.force_login(user)
+        counter = StatementCounter()
+        cookies_set = 0
+        last_saved, longest_gap = clock.time.return_value, 0
+        url = reverse('update_video_progress', args=[module.pk])
+        with connection.execute_wrapper(counter):
+            for beat in range(heartbeats):
+                clock.time.return_value += HEARTBEAT_SECONDS
+                response = client.post(url, {'watch_time': (beat + 1) * HEARTBEAT_SECONDS})
+                assert response.status_code == 200, response.content
+                if settings.SESSION_COOKIE_NAME in response.cookies:
+                    cookies_set += 1
+                    longest_gap = max(longest_gap, clock.time.return_value - last_saved)
+                    last_saved = clock.time.return_value
+        longest_gap = max(longest_gap, clock.time.return_value - last_saved)
+
+    per_beat = {name: count / heartbeats for name, count in counter.counts.items()}
+    per_beat['cookies_set'] = cookies_set / heartbeats
+    return per_beat, longest_gap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--minutes', type=int, default=30, help="Simulated viewing time")
+    parser.add_argument('--interval', type=int, default=300, help="SESSION_REFRESH_INTERVAL to compare")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'learning_platform.settings')
+    import django
+    django.setup()
+    from django.db import connection, transaction
+    from django.test.utils import setup_test_environment
+    from courses.models import User, ProfessionalCertification, Course, Module
+
+    setup_test_environment()  # lets the test client in through ALLOWED_HOSTS
+    heartbeats = args.minutes * 60 // HEARTBEAT_SECONDS
+
+    print(f"Database: {connection.vendor}, {heartbeats} heartbeats every {HEARTBEAT_SECONDS}s\n")
+    print(f"{'sessions':<34}{'session writes':>16}{'session reads':>15}{'other writes':>14}"
+          f"{'cookies set':>13}{'longest gap':>13}")
+    with transaction.atomic():
+        user = User.objects.create_user(username='bench_session_learner', password='!')
+        certification, = ProfessionalCertification.objects.bulk_create([
+            ProfessionalCertification(title='Benchmark sessions', description='Benchmark')
+        ])
+        course, = Course.objects.bulk_create([
+            Course(certification=certification, title='Benchmark course', description='Benchmark')
+        ])
+        # Long enough that no heartbeat completes the module
+        module, = Module.objects.bulk_create([
+            Module(course=course, title='Benchmark video', module_type='video',
+                   video_duration=args.minutes * 60 * 2)
+        ])
+
+        for name, engine, interval in configurations(args.interval):
+            per_beat, longest_gap = run(engine, interval, heartbeats, user, module)
+            print(f"{name:<34}{per_beat['session_writes']:>16.3f}{per_beat['session_reads']:>15.3f}"
+                  f"{per_beat['other_writes']:>14.3f}{per_beat['cookies_set']:>13.3f}"
+                  f"{longest_gap:>12}s")
+        transaction.set_rollback(True)
+
+
+if __name__ == '__main__':
+    main()
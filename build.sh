@@ -31,6 +31,12 @@ python manage.py collectstatic --no-input
 echo "Running database migrations..."
 python manage.py migrate --no-input
 
+# Table for the 'shared' cache when REDIS_URL is not set (no-op otherwise)
+python manage.py createcachetable
+
+# Index existing certifications, courses and modules for search (no-op once built)
+python manage.py rebuild_search_index --if-empty
+
 # =====================================
 # STEP 4: Create Superuser (Optional)
 # =====================================
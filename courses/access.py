@@ -0,0 +1,74 @@
+"""
+Throttled, write-behind "last accessed" tracking for module views.
+
+Viewing a module is a pure read: module_view neither creates a ModuleProgress
+row (the first real progress event does) nor saves the one it reads. Instead
+it hands a stored row to record_access(), which queues a last_accessed touch
+only when the row's stored value is more than PROGRESS_TOUCH_INTERVAL
+seconds old. Because that check reads the stored value, every worker agrees
+on it and a (user, module) pair is touched at most about once per interval,
+however often it is viewed.
+
+Queued touches are kept in a per-process buffer keyed by progress row and
+written with one bulk UPDATE when the buffer reaches PROGRESS_TOUCH_MAX_SIZE
+rows or PROGRESS_TOUCH_FLUSH_INTERVAL seconds after the first pending touch,
+and at exit. A touch never moves last_accessed backwards, so a progress
+event saved in the meantime keeps its newer time. Touches lost with a
+crashing worker only make "last accessed" a little older.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .buffers import WriteBehindBuffer
+from .models import ModuleProgress
+
+
+class AccessBuffer(WriteBehindBuffer):
+    """Thread-safe, process-local buffer of pending last_accessed touches"""
+
+    description = 'last accessed buffer'
+    max_size_setting = 'PROGRESS_TOUCH_MAX_SIZE'
+    flush_interval_setting = 'PROGRESS_TOUCH_FLUSH_INTERVAL'
+
+    def touch(self, progress_id, accessed_at):
+        """Queue a last_accessed update of a stored progress row"""
+        self._queue(progress_id, accessed_at)
+
+    def is_pending(self, progress_id):
+        return progress_id in self._pending
+
+    def _write(self, pending):
+        to_update = []
+        for progress_id, accessed_at in pending.items():
+            row = ModuleProgress(pk=progress_id)
+            row.last_accessed = Greatest(F('last_accessed'), Value(accessed_at))
+            to_update.append(row)
+        ModuleProgress.objects.bulk_update(to_update, ['last_accessed'], batch_size=500)
+        return len(to_update)
+
+
+def get_access_buffer():
+    """Return the process-wide buffer of last_accessed touches"""
+    return AccessBuffer.instance()
+
+
+def record_access(progress, now=None):
+    """
+    Note that progress.user viewed progress.module. Returns whether a touch
+    was queued; rows that are not stored yet, or were touched within
+    PROGRESS_TOUCH_INTERVAL seconds, are left alone.
+    """
+    if progress.pk is None:
+        return False
+    now = now or timezone.now()
+    interval = timedelta(seconds=getattr(settings, 'PROGRESS_TOUCH_INTERVAL', 300))
+    buffer = get_access_buffer()
+    if progress.last_accessed > now - interval or buffer.is_pending(progress.pk):
+        return False
+    buffer.touch(progress.pk, now)
+    return True
+
@@ -2,9 +2,12 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import (
     User, GroupMember, ProfessionalCertification, Course,
-    Module, ModuleProgress, CourseCertificate,
-    ProfessionalCertificationCertificate, CertificationEnrollment
+    Module, ModuleProgress, CourseProgressSummary, CourseCertificate,
+    ProfessionalCertificationCertificate, CertificationEnrollment,
+    CourseDailyStats, ModuleDailyStats, SearchEntry
 )
+from .search import search_object_ids
+from .verification import normalize_certificate_id
 
 
 @admin.register(User)
@@ -51,7 +54,7 @@ class CourseAdmin(admin.ModelAdmin):
 class ModuleAdmin(admin.ModelAdmin):
     list_display = ['title', 'course', 'module_type', 'order', 'is_active', 'created_at']
     list_filter = ['module_type', 'course', 'is_active', 'created_at']
-    search_fields = ['title', 'text_content', 'course__title']
+    search_fields = ['title', 'course__title']
     readonly_fields = ['created_at', 'updated_at']
     ordering = ['course', 'order', 'title']
 
@@ -68,6 +71,17 @@ class ModuleAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # The changelist never shows lesson bodies; the change form loads them on access
+        return super().get_queryset(request).defer('text_content')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Lesson text is matched through the full-text index rather than an icontains scan
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            results |= queryset.filter(pk__in=search_object_ids(search_term, SearchEntry.KIND_MODULE))
+        return results, may_have_duplicates
+
 
 @admin.register(ModuleProgress)
 class ModuleProgressAdmin(admin.ModelAdmin):
@@ -89,8 +103,27 @@ class ModuleProgressAdmin(admin.ModelAdmin):
     get_progress_percentage.short_description = 'Progress'
 
 
+@admin.register(CourseProgressSummary)
+class CourseProgressSummaryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'course', 'completed_count', 'active_module_count', 'percent', 'completed_at']
+    list_filter = ['course']
+    search_fields = ['user__username', 'course__title']
+    readonly_fields = ['completed_count', 'active_module_count', 'percent', 'completed_at', 'updated_at']
+    ordering = ['-updated_at']
+
+
+class CertificateIdSearchMixin:
+    """Look a pasted certificate ID up through the unique index instead of a LIKE scan"""
+
+    def get_search_results(self, request, queryset, search_term):
+        certificate_id = normalize_certificate_id(search_term)
+        if certificate_id is not None:
+            return queryset.filter(certificate_id=certificate_id), False
+        return super().get_search_results(request, queryset, search_term)
+
+
 @admin.register(CourseCertificate)
-class CourseCertificateAdmin(admin.ModelAdmin):
+class CourseCertificateAdmin(CertificateIdSearchMixin, admin.ModelAdmin):
     list_display = ['user', 'course', 'certificate_id', 'issued_at']
     list_filter = ['issued_at', 'course']
     search_fields = ['user__username', 'course__title', 'certificate_id']
@@ -99,7 +132,7 @@ class CourseCertificateAdmin(admin.ModelAdmin):
 
 
 @admin.register(ProfessionalCertificationCertificate)
-class ProfessionalCertificationCertificateAdmin(admin.ModelAdmin):
+class ProfessionalCertificationCertificateAdmin(CertificateIdSearchMixin, admin.ModelAdmin):
     list_display = ['user', 'certification', 'certificate_id', 'issued_at']
     list_filter = ['issued_at', 'certification']
     search_fields = ['user__username', 'certification__title', 'certificate_id']
@@ -114,3 +147,21 @@ class CertificationEnrollmentAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'user__email', 'certification__title']
     readonly_fields = ['enrolled_at']
     ordering = ['-enrolled_at']
+
+
+@admin.register(CourseDailyStats)
+class CourseDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ['course', 'date', 'enrollments', 'active_learners', 'completions']
+    list_filter = ['date']
+    search_fields = ['course__title']
+    readonly_fields = ['enrollments', 'active_learners', 'completions']
+    ordering = ['-date']
+
+
+@admin.register(ModuleDailyStats)
+class ModuleDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ['module', 'date', 'started', 'completed', 'active_learners', 'watch_seconds']
+    list_filter = ['date']
+    search_fields = ['module__title', 'module__course__title']
+    readonly_fields = ['started', 'completed', 'active_learners', 'watch_seconds']
+    ordering = ['-date']
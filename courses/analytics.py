@@ -0,0 +1,329 @@
+"""
+Pre-aggregated instructor analytics.
+
+Counting learners straight from ModuleProgress means scanning every progress
+row of every course an instructor owns on each page view. Instead,
+refresh_rollups() (run by the refresh_analytics command) maintains two
+tables of daily aggregates:
+
+    CourseDailyStats  (course, date)  enrollments, active learners, completions
+    ModuleDailyStats  (module, date)  started, completed, active learners, watch seconds
+
+Each run only reads the source rows that changed since the previous run's
+watermark (ModuleProgress.last_accessed, CourseCertificate.issued_at and
+CertificationEnrollment.enrolled_at), collects the (course or module, day)
+buckets they fall into and recounts just those buckets. Started, completed,
+watch time, completions and enrollments are bucketed by timestamps that
+never move once set, so their recounts are exact. Active learners are
+bucketed by last_accessed, which moves on with every visit, so a bucket
+keeps the highest count it has seen; it is a lower bound for learners who
+came back on a later day before a refresh ran.
+
+Pages read only the rollup tables (see course_analytics()).
+"""
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from .models import (
+    Course, Module, ModuleProgress, CourseCertificate, CertificationEnrollment,
+    CourseDailyStats, ModuleDailyStats, RollupWatermark
+)
+
+WATERMARK_NAME = 'instructor-analytics'
+
+# Margin for rows written by a transaction that is still open during a
+# refresh, which become visible later with an older timestamp
+WATERMARK_MARGIN = timedelta(minutes=1)
+
+# Days counted by the "average daily active learners" figure
+ACTIVE_WINDOW_DAYS = 7
+
+CourseAnalytics = namedtuple(
+    'CourseAnalytics',
+    ['course', 'enrollments', 'completions', 'active_today', 'average_daily_active', 'funnel']
+)
+
+ModuleFunnelStep = namedtuple(
+    'ModuleFunnelStep',
+    ['module', 'started', 'completed', 'completion_rate', 'average_watch_percent']
+)
+
+
+# =====================================
+# REFRESH
+# =====================================
+
+def watermark_lag():
+    """
+    How far behind the clock each refresh stays. Buffered last_accessed
+    touches (see access.py) are stamped when queued and written up to
+    PROGRESS_TOUCH_FLUSH_INTERVAL seconds later, so the watermark must not
+    pass them before then.
+    """
+    flush_interval = timedelta(seconds=getattr(settings, 'PROGRESS_TOUCH_FLUSH_INTERVAL', 60))
+    return flush_interval + WATERMARK_MARGIN
+
+
+def _day_bounds(day):
+    """Aware datetimes [start, end) covering a local calendar day"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def _changed(queryset, field, since, until):
+    queryset = queryset.order_by().filter(**{f'{field}__lte': until})
+    if since is not None:
+        queryset = queryset.filter(**{f'{field}__gt': since})
+    return queryset
+
+
+def _touched_buckets(since, until, batch_size):
+    """{day: module ids} and {day: course ids} with source rows changed in (since, until]"""
+    module_days = defaultdict(set)
+    course_days = defaultdict(set)
+
+    progress_rows = _changed(ModuleProgress.objects, 'last_accessed', since, until).values_list(
+        'module_id', 'module__course_id', 'started_at', 'completed_at', 'last_accessed'
+    )
+    for module_id, course_id, started_at, completed_at, last_accessed in progress_rows.iterator(
+        chunk_size=batch_size
+    ):
+        module_days[timezone.localdate(started_at)].add(module_id)
+        module_days[timezone.localdate(last_accessed)].add(module_id)
+        if completed_at is not None:
+            module_days[timezone.localdate(completed_at)].add(module_id)
+        course_days[timezone.localdate(last_accessed)].add(course_id)
+
+    certificates = _changed(CourseCertificate.objects, 'issued_at', since, until)
+    for course_id, issued_at in certificates.values_list('course_id', 'issued_at').iterator(
+        chunk_size=batch_size
+    ):
+        course_days[timezone.localdate(issued_at)].add(course_id)
+
+    enrollment_days = defaultdict(set)
+    enrollments = _changed(CertificationEnrollment.objects, 'enrolled_at', since, until)
+    for certification_id, enrolled_at in enrollments.values_list('certification_id', 'enrolled_at').iterator(
+        chunk_size=batch_size
+    ):
+        enrollment_days[timezone.localdate(enrolled_at)].add(certification_id)
+    if enrollment_days:
+        courses_by_certification = defaultdict(list)
+        certification_ids = set().union(*enrollment_days.values())
+        for course_id, certification_id in Course.objects.filter(
+            certification_id__in=certification_ids
+        ).values_list('pk', 'certification_id'):
+            courses_by_certification[certification_id].append(course_id)
+        for day, certification_ids in enrollment_days.items():
+            for certification_id in certification_ids:
+                course_days[day].update(courses_by_certification[certification_id])
+
+    return module_days, course_days
+
+
+def _counts(queryset, key, **aggregates):
+    return {row.pop(key): row for row in queryset.order_by().values(key).annotate(**aggregates)}
+
+
+def _chunks(ids, size):
+    ids = sorted(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _store(model, key_field, day, rows, exact_fields):
+    """
+    Upsert the day's rollup rows ({object id: {field: value}}). exact_fields
+    replace the stored values; active_learners only ever grows.
+    """
+    existing = {
+        getattr(stats, key_field): stats
+        for stats in model.objects.filter(date=day, **{f'{key_field}__in': rows.keys()})
+    }
+    to_create, to_update = [], []
+    for object_id, values in rows.items():
+        stats = existing.get(object_id)
+        if stats is None:
+            to_create.append(model(date=day, **{key_field: object_id}, **values))
+            continue
+        values['active_learners'] = max(stats.active_learners, values['active_learners'])
+        if any(getattr(stats, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(stats, field, value)
+            to_update.append(stats)
+
+    model.objects.bulk_create(to_create)
+    model.objects.bulk_update(to_update, exact_fields + ['active_learners'])
+    return len(to_create) + len(to_update)
+
+
+def _refresh_module_day(day, module_ids):
+    start, end = _day_bounds(day)
+    progress = ModuleProgress.objects.filter(module_id__in=module_ids)
+    started = _counts(
+        progress.filter(started_at__gte=start, started_at__lt=end), 'module_id',
+        started=Count('id'),
+        watch_seconds=Sum(Least('video_watch_time', 'module__video_duration')),
+    )
+    completed = _counts(
+        progress.filter(is_completed=True, completed_at__gte=start, completed_at__lt=end), 'module_id',
+        completed=Count('id'),
+    )
+    active = _counts(
+        progress.filter(last_accessed__gte=start, last_accessed__lt=end), 'module_id',
+        active_learners=Count('id'),
+    )
+
+    rows = {
+        module_id: {
+            'started': started.get(module_id, {}).get('started', 0),
+            'watch_seconds': started.get(module_id, {}).get('watch_seconds') or 0,
+            'completed': completed.get(module_id, {}).get('completed', 0),
+            'active_learners': active.get(module_id, {}).get('active_learners', 0),
+        }
+        for module_id in module_ids
+    }
+    return _store(ModuleDailyStats, 'module_id', day, rows, ['started', 'completed', 'watch_seconds'])
+
+
+def _refresh_course_day(day, course_ids):
+    start, end = _day_bounds(day)
+    active = _counts(
+        ModuleProgress.objects.filter(
+            module__course_id__in=course_ids, last_accessed__gte=start, last_accessed__lt=end
+        ), 'module__course_id',
+        active_learners=Count('user_id', distinct=True),
+    )
+    completions = _counts(
+        CourseCertificate.objects.filter(course_id__in=course_ids, issued_at__gte=start, issued_at__lt=end),
+        'course_id',
+        completions=Count('id'),
+    )
+    enrollments = _counts(
+        CertificationEnrollment.objects.filter(
+            certification__courses__in=course_ids, is_active=True,
+            enrolled_at__gte=start, enrolled_at__lt=end
+        ), 'certification__courses',
+        enrollments=Count('id'),
+    )
+
+    rows = {
+        course_id: {
+            'enrollments': enrollments.get(course_id, {}).get('enrollments', 0),
+            'completions': completions.get(course_id, {}).get('completions', 0),
+            'active_learners': active.get(course_id, {}).get('active_learners', 0),
+        }
+        for course_id in course_ids
+    }
+    return _store(CourseDailyStats, 'course_id', day, rows, ['enrollments', 'completions'])
+
+
+def refresh_rollups(rebuild=False, batch_size=500, now=None):
+    """
+    Bring the rollup tables up to date with every source row changed since
+    the last run, and move the watermark forward.
+
+    With rebuild every bucket is recounted from scratch, which also drops
+    deleted enrollments, certificates and progress rows from the exact
+    counts. Returns a dict with the number of module and course rollup rows
+    written and the new watermark.
+    """
+    until = (now or timezone.now()) - watermark_lag()
+    written = {'modules': 0, 'courses': 0, 'processed_until': until}
+
+    with transaction.atomic():
+        RollupWatermark.objects.get_or_create(name=WATERMARK_NAME)
+        # Also keeps concurrent runs from interleaving
+        watermark = RollupWatermark.objects.select_for_update().get(name=WATERMARK_NAME)
+        since = None if rebuild else watermark.processed_until
+        if since is not None and since >= until:
+            written['processed_until'] = since
+            return written
+
+        if rebuild:
+            ModuleDailyStats.objects.update(started=0, completed=0, watch_seconds=0)
+            CourseDailyStats.objects.update(enrollments=0, completions=0)
+
+        module_days, course_days = _touched_buckets(since, until, batch_size)
+        for day, module_ids in sorted(module_days.items()):
+            for chunk in _chunks(module_ids, batch_size):
+                written['modules'] += _refresh_module_day(day, chunk)
+        for day, course_ids in sorted(course_days.items()):
+            for chunk in _chunks(course_ids, batch_size):
+                written['courses'] += _refresh_course_day(day, chunk)
+
+        watermark.processed_until = until
+        watermark.save()
+    return written
+
+
+# =====================================
+# READING
+# =====================================
+
+def last_refreshed():
+    """When the rollups were last brought up to date, or None"""
+    return RollupWatermark.objects.filter(name=WATERMARK_NAME).values_list(
+        'processed_until', flat=True
+    ).first()
+
+
+def _percent(part, whole):
+    return round(part / whole * 100, 1) if whole else 0
+
+
+def course_analytics(courses, today=None):
+    """CourseAnalytics for each course, read from the rollup tables in three queries"""
+    today = today or timezone.localdate()
+    course_ids = [course.pk for course in courses]
+
+    course_totals = _counts(
+        CourseDailyStats.objects.filter(course_id__in=course_ids), 'course_id',
+        enrollments=Sum('enrollments'),
+        completions=Sum('completions'),
+        active_today=Sum('active_learners', filter=Q(date=today)),
+        active_window=Sum(
+            'active_learners', filter=Q(date__gt=today - timedelta(days=ACTIVE_WINDOW_DAYS))
+        ),
+    )
+    module_totals = _counts(
+        ModuleDailyStats.objects.filter(module__course_id__in=course_ids), 'module_id',
+        started=Sum('started'),
+        completed=Sum('completed'),
+        watch_seconds=Sum('watch_seconds'),
+    )
+
+    funnels = defaultdict(list)
+    modules = Module.objects.filter(course_id__in=course_ids, is_active=True).order_by('course_id', 'order')
+    for module in modules.only('id', 'course_id', 'title', 'order', 'module_type', 'video_duration'):
+        totals = module_totals.get(module.pk, {})
+        started = totals.get('started', 0)
+        average_watch_percent = None
+        if module.module_type == 'video' and module.video_duration > 0:
+            average_watch_percent = _percent(totals.get('watch_seconds', 0), started * module.video_duration)
+        funnels[module.course_id].append(ModuleFunnelStep(
+            module=module,
+            started=started,
+            completed=totals.get('completed', 0),
+            completion_rate=_percent(totals.get('completed', 0), started),
+            average_watch_percent=average_watch_percent,
+        ))
+
+    analytics = []
+    for course in courses:
+        totals = course_totals.get(course.pk, {})
+        analytics.append(CourseAnalytics(
+            course=course,
+            enrollments=totals.get('enrollments', 0),
+            completions=totals.get('completions', 0),
+            active_today=totals.get('active_today') or 0,
+            average_daily_active=round((totals.get('active_window') or 0) / ACTIVE_WINDOW_DAYS, 1),
+            funnel=funnels[course.pk],
+        ))
+    return analytics
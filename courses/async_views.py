@@ -0,0 +1,148 @@
+"""
+Native async versions of the AJAX progress endpoints.
+
+Video heartbeats are tiny, frequent and I/O bound, so under an ASGI server
+(see DEPLOYMENT.md) these views let one process keep thousands of heartbeats
+in flight without a thread per request. The common case, a heartbeat below
+the completion threshold, is a single async UPDATE ... RETURNING.
+Completion transitions are rare and go through the same transactional code
+as the sync views.
+
+courses/urls.py routes to these views when ASYNC_PROGRESS_VIEWS is enabled.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.db import connection
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+
+from .models import Module, ModuleProgress, CourseProgressSummary
+from .heartbeats import get_heartbeat_buffer
+from .progress import (
+    apply_video_heartbeat, watch_time_update, progress_version, course_percent, completed_by_last_module,
+    CourseProgress, COURSE_COMPLETION_THRESHOLD, PROGRESS_MODULE_FIELDS
+)
+
+async def _acourse_progress(user, course_id):
+    """Course progress from the user's summary row, counted live if it is missing"""
+    summary = await CourseProgressSummary.objects.filter(
+        user=user,
+        course_id=course_id
+    ).values('completed_count', 'active_module_count', 'percent').afirst()
+    if summary is not None:
+        total, completed = summary['active_module_count'], summary['completed_count']
+        percent = summary['percent']
+    else:
+        total = await Module.objects.filter(course_id=course_id, is_active=True).acount()
+        completed = await ModuleProgress.objects.filter(
+            user=user,
+            module__course_id=course_id,
+            module__is_active=True,
+            is_completed=True
+        ).acount()
+        percent = course_percent(completed, total)
+    return CourseProgress(total, completed, percent, percent >= COURSE_COMPLETION_THRESHOLD)
+
+
+async def _aprogress_response(user, module, is_completed, changed, **data):
+    """Async counterpart of views._progress_response"""
+    version = progress_version(module.pk, is_completed)
+    data.update({
+        'success': True,
+        'changed': changed,
+        'is_completed': is_completed,
+        'version': version,
+    })
+
+    if changed:
+        course_progress = await _acourse_progress(user, module.course_id)
+        data['course_progress'] = course_progress.percent
+        data['is_course_complete'] = course_progress.is_completed
+        data['course_just_completed'] = completed_by_last_module(course_progress)
+
+    response = JsonResponse(data)
+    response['ETag'] = f'"{version}"'
+    return response
+
+
+@login_required
+@require_POST
+async def mark_module_complete(request, pk):
+    """Mark a text/picture module as complete (AJAX, async)"""
+    user = await request.auser()
+    module = await aget_object_or_404(Module.objects.only(*PROGRESS_MODULE_FIELDS), pk=pk)
+
+    # Only allow for text and picture modules
+    if module.module_type not in ['text', 'picture', 'text_picture']:
+        return JsonResponse({'success': False, 'error': 'Invalid module type'}, status=400)
+
+    # A first completion is a single INSERT of a completed row
+    progress, created = await ModuleProgress.objects.aget_or_create(
+        user=user,
+        module=module,
+        defaults={'is_completed': True, 'completed_at': timezone.now()}
+    )
+
+    changed = created or not progress.is_completed
+    if not progress.is_completed:
+        progress.module = module
+        await sync_to_async(progress.mark_as_completed)()
+
+    return await _aprogress_response(user, module, progress.is_completed, changed)
+
+
+@login_required
+@require_POST
+async def update_video_progress(request, pk):
+    """Update video watch progress (AJAX, async)"""
+    user = await request.auser()
+    module = await aget_object_or_404(Module.objects.only(*PROGRESS_MODULE_FIELDS), pk=pk)
+
+    if module.module_type != 'video':
+        return JsonResponse({'success': False, 'error': 'Invalid module type'}, status=400)
+
+    watch_time = int(request.POST.get('watch_time', 0))
+    threshold = module.video_duration * module.get_completion_threshold()
+    can_complete = module.video_duration > 0 and watch_time >= threshold
+
+    heartbeat_buffer = get_heartbeat_buffer()
+    if heartbeat_buffer is not None:
+        is_completed, stored_watch_time = await ModuleProgress.objects.filter(
+            user=user, module=module
+        ).values_list('is_completed', 'video_watch_time').afirst() or (False, 0)
+        # offer() may flush the buffer, which touches the database
+        if await sync_to_async(heartbeat_buffer.offer)(user.pk, module, watch_time, is_completed):
+            # Report the stored state and the furthest position, not this heartbeat's
+            progress = ModuleProgress(
+                user=user,
+                module=module,
+                is_completed=is_completed,
+                video_watch_time=heartbeat_buffer.pending_watch_time(
+                    user.pk, module.pk, max(watch_time, stored_watch_time)
+                )
+            )
+            return await _aprogress_response(
+                user, module, progress.is_completed, False,
+                progress_percentage=progress.get_progress_percentage(), buffered=True
+            )
+        watch_time = heartbeat_buffer.take(user.pk, module.pk, watch_time)
+
+    if not can_complete and connection.features.can_return_columns_from_insert:
+        # Hot path: one UPDATE that never lowers the stored watch time and
+        # returns the stored state, as the sync view reports it
+        async for progress in watch_time_update(user, module, watch_time):
+            progress.module = module
+            return await _aprogress_response(
+                user, module, progress.is_completed, False,
+                progress_percentage=progress.get_progress_percentage(), buffered=False
+            )
+
+    # First heartbeat for this module, or one that can complete it
+    progress, just_completed = await sync_to_async(apply_video_heartbeat)(user, module, watch_time)
+
+    return await _aprogress_response(
+        user, module, progress.is_completed, just_completed,
+        progress_percentage=progress.get_progress_percentage(), buffered=False
+    )
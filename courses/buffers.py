@@ -0,0 +1,109 @@
+"""
+Process-local write-behind buffers.
+
+A WriteBehindBuffer keeps the largest pending value per key and hands all of
+them to _write() in one batch when it holds max_size keys,
+flush_interval seconds after the first pending value, and at exit. Each
+subclass adds the method that queues its entries and implements _write()
+as a bulk statement; instance() returns the process-wide buffer of a
+subclass, configured from its max_size_setting and flush_interval_setting.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+class WriteBehindBuffer:
+    """Thread-safe, process-local buffer of pending values keyed by row"""
+
+    # Used in log messages
+    description = 'write-behind buffer'
+
+    # Settings configuring the process-wide buffer
+    max_size_setting = None
+    flush_interval_setting = None
+
+    def __init__(self, max_size=500, flush_interval=60):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+        self.stats = {'queued': 0, 'flushes': 0, 'rows_written': 0}
+
+    def __len__(self):
+        return len(self._pending)
+
+    @classmethod
+    def instance(cls):
+        """Return the process-wide buffer of this class, flushed at exit"""
+        buffer = _instances.get(cls)
+        if buffer is None:
+            with _instances_lock:
+                buffer = _instances.get(cls)
+                if buffer is None:
+                    buffer = _instances[cls] = cls(
+                        max_size=getattr(settings, cls.max_size_setting, 500),
+                        flush_interval=getattr(settings, cls.flush_interval_setting, 60),
+                    )
+                    atexit.register(buffer._flush_at_exit)
+        return buffer
+
+    def _queue(self, key, value):
+        """Keep the larger of value and the pending value of key"""
+        with self._lock:
+            self._pending[key] = max(value, self._pending.get(key, value))
+            self.stats['queued'] += 1
+            flush_now = len(self._pending) >= self.max_size
+            if not flush_now and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if flush_now:
+            self.flush()
+
+    def _write(self, pending):
+        """Write {key: value} in bulk and return the number of rows written"""
+        raise NotImplementedError
+
+    def flush(self):
+        """Write all pending values with a single bulk statement"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        if not pending:
+            return 0
+
+        written = self._write(pending)
+
+        with self._lock:
+            self.stats['flushes'] += 1
+            self.stats['rows_written'] += written
+        return written
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to flush %s", self.description)
+        finally:
+            # The timer thread owns its own database connection
+            connection.close()
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to flush %s at exit", self.description)
@@ -0,0 +1,160 @@
+"""
+Versioned cache of the certification and course catalogue.
+
+The catalogue (active certifications, their courses, each instructor's
+listings) only changes when an instructor or admin edits something, yet
+every dashboard request needs it. Cached copies are keyed by version
+numbers:
+
+    catalog:version                    bumped by any certification or course change
+    catalog:certification:<id>:version bumped by changes to that certification or its courses
+
+The versions live in the 'shared' cache, which every worker process reads
+(Redis, or a database table without REDIS_URL), and are bumped from the
+model signals in signals.py, so a change made in one worker or in the admin
+is seen by all of them on their next request. The catalogue data itself is
+stored under the version it was built for, so it can never be stale and may
+live in a per-process cache. Old versions simply expire. Templates cache
+the fragments rendered from catalogue data the same way, with {% cache %}
+keyed by catalog_version.
+
+Only catalogue data is cached here; per-user progress is always computed on
+top of it (see progress.build_progress).
+"""
+import time
+
+from django.core.cache import cache, caches
+from django.db.models import Count, Prefetch
+
+from .models import ProfessionalCertification, Course
+from .pagination import PAGE_SIZE, keyset_page
+
+CATALOG_CACHE_TIMEOUT = 60 * 60
+
+GLOBAL_VERSION_KEY = 'catalog:version'
+
+
+def _versions():
+    return caches['shared']
+
+
+def _certification_version_key(certification_id):
+    return f'catalog:certification:{certification_id}:version'
+
+
+def _new_version():
+    # Unique across workers and restarts, so a version that was evicted and
+    # recreated never matches data cached for an older one
+    return time.time_ns()
+
+
+def get_versions(keys):
+    """Current value of each version key, creating missing ones"""
+    versions = _versions().get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    for key, version in missing.items():
+        # Another worker may create the same key first; use its value then
+        if not _versions().add(key, version, timeout=None):
+            version = _versions().get(key, version)
+        versions[key] = version
+    return versions
+
+
+def catalog_version():
+    """Current version of the whole catalogue"""
+    return get_versions([GLOBAL_VERSION_KEY])[GLOBAL_VERSION_KEY]
+
+
+def certification_version(certification_id):
+    key = _certification_version_key(certification_id)
+    return get_versions([key])[key]
+
+
+def bump_versions(keys):
+    """Give the version keys a new value, as seen by every worker"""
+    version = _new_version()
+    _versions().set_many({key: version for key in keys}, timeout=None)
+
+
+def bump_catalog_versions(certification_ids=()):
+    """Invalidate the catalogue and the given certifications in every worker"""
+    bump_versions([GLOBAL_VERSION_KEY] + [
+        _certification_version_key(certification_id)
+        for certification_id in set(certification_ids)
+        if certification_id is not None
+    ])
+
+
+def _active_courses_prefetch():
+    return Prefetch(
+        'courses',
+        queryset=Course.objects.filter(is_active=True),
+        to_attr='active_courses'
+    )
+
+
+def _cached(key, build):
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, CATALOG_CACHE_TIMEOUT)
+    return value
+
+
+def _certification_page(cursor, limit):
+    return keyset_page(
+        ProfessionalCertification.objects.filter(is_active=True)
+        .prefetch_related('courses', _active_courses_prefetch()),
+        'created_at', cursor, limit
+    )
+
+
+def certification_page(cursor=None, limit=PAGE_SIZE):
+    """
+    A page of active certifications, newest first, with all their courses
+    prefetched (for get_total_courses) and their active courses in
+    .active_courses. Only first pages are cached; later ones are a cheap
+    keyset query and would let clients fill the cache with arbitrary cursors.
+    """
+    if cursor:
+        return _certification_page(cursor, limit)
+    return _cached(
+        f'catalog:certifications:{limit}:{catalog_version()}',
+        lambda: _certification_page(None, limit)
+    )
+
+
+def dashboard_catalog():
+    """(first page of certifications, number of active certifications), cached together"""
+    return _cached(
+        f'catalog:dashboard:{catalog_version()}',
+        lambda: (
+            _certification_page(None, PAGE_SIZE),
+            ProfessionalCertification.objects.filter(is_active=True).count(),
+        )
+    )
+
+
+def get_active_certification(certification_id):
+    """An active certification with .active_courses, or None"""
+    certification_id = int(certification_id)
+    return _cached(
+        f'catalog:certification:{certification_id}:{certification_version(certification_id)}',
+        lambda: ProfessionalCertification.objects.filter(pk=certification_id, is_active=True)
+        .prefetch_related(_active_courses_prefetch())
+        .first()
+    )
+
+
+def instructor_catalog(user):
+    """(certifications with course_count, courses with certification) created by an instructor"""
+    return _cached(
+        f'catalog:instructor:{user.pk}:{catalog_version()}',
+        lambda: (
+            list(
+                ProfessionalCertification.objects.filter(created_by=user)
+                .annotate(course_count=Count('courses'))
+            ),
+            list(Course.objects.filter(created_by=user).select_related('certification')),
+        )
+    )
@@ -0,0 +1,230 @@
+"""
+Certificate templates.
+
+A certificate page is split into a static layer (borders, headings, fixed
+wording, footer) and the per-learner fields (name, course or certification
+title, date, certificate id). The static layer of each template is drawn and
+compressed once per process and embedded in every PDF as a form XObject, so
+a render only draws and encodes the handful of fields that actually differ.
+
+Templates are plain data: add a new certificate design by pairing a
+draw_static and a draw_fields function in a CertificateTemplate.
+"""
+import io
+import threading
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfdoc import (
+    PDFArray, PDFDictionary, PDFFormXObject, PDFName, PDFStream, PDFZCompress
+)
+from reportlab.pdfgen import canvas
+
+# Fonts every template may use. They are registered with each document in
+# this order, so the font names baked into a cached static layer stay valid.
+TEMPLATE_FONTS = ['Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique']
+
+
+class CertificateTemplate:
+    """A certificate page whose static layer is built once per process"""
+
+    def __init__(self, name, draw_static, draw_fields, pagesize=A4):
+        self.name = name
+        self.draw_static = draw_static
+        self.draw_fields = draw_fields
+        self.pagesize = pagesize
+        self._static_stream = None
+        self._lock = threading.Lock()
+
+    def _new_canvas(self, buffer):
+        c = canvas.Canvas(buffer, pagesize=self.pagesize)
+        for font in TEMPLATE_FONTS:
+            c._doc.getInternalFontName(font)
+        return c
+
+    def _build_static_stream(self):
+        """Draw the static layer on a scratch canvas and return its compressed stream"""
+        c = self._new_canvas(io.BytesIO())
+        c.beginForm(self.name)
+        self.draw_static(c, *self.pagesize)
+        c.endForm()
+        form = c._doc.idToObject[c._doc.getXObjectName(self.name)]
+        return PDFZCompress.encode(form.stream)
+
+    def static_stream(self):
+        if self._static_stream is None:
+            with self._lock:
+                if self._static_stream is None:
+                    self._static_stream = self._build_static_stream()
+        return self._static_stream
+
+    def _add_static_form(self, c):
+        width, height = self.pagesize
+        form = PDFFormXObject(0, 0, width, height)
+        form.hasImages = 0
+        form.Contents = PDFStream(
+            dictionary=PDFDictionary({'Filter': PDFArray([PDFName(PDFZCompress.pdfname)])}),
+            content=self.static_stream()
+        )
+        c._doc.addForm(self.name, form)
+
+    def render(self, certificate, cache_static=True):
+        """
+        Render certificate and return the PDF bytes.
+
+        With cache_static=False the static layer is drawn from scratch, which
+        is how every certificate used to be rendered (kept for benchmarking).
+        """
+        buffer = io.BytesIO()
+        c = self._new_canvas(buffer)
+        if cache_static:
+            self._add_static_form(c)
+            c.doForm(self.name)
+        else:
+            c.saveState()
+            self.draw_static(c, *self.pagesize)
+            c.restoreState()
+        self.draw_fields(c, *self.pagesize, certificate)
+        c.save()
+        return buffer.getvalue()
+
+
+def _draw_centred_lines(c, text, font, size, width, y, max_width, leading):
+    """Draw text centred, wrapped to max_width points; returns the y below the last line"""
+    for line in simpleSplit(text, font, size, max_width):
+        c.drawCentredString(width / 2, y, line)
+        y -= leading
+    return y
+
+
+# =====================================
+# COURSE CERTIFICATE
+# =====================================
+
+def _draw_course_static(c, width, height):
+    # Draw border
+    c.setStrokeColor(colors.HexColor('#2563eb'))
+    c.setLineWidth(3)
+    c.rect(40, 40, width - 80, height - 80)
+
+    # Title
+    c.setFont("Helvetica-Bold", 36)
+    c.setFillColor(colors.HexColor('#1e40af'))
+    c.drawCentredString(width / 2, height - 120, "Certificate of Completion")
+
+    # Decorative line
+    c.setStrokeColor(colors.HexColor('#60a5fa'))
+    c.setLineWidth(2)
+    c.line(150, height - 140, width - 150, height - 140)
+
+    # Body text
+    c.setFont("Helvetica", 16)
+    c.setFillColor(colors.black)
+    c.drawCentredString(width / 2, height - 200, "This is to certify that")
+    c.drawCentredString(width / 2, height - 300, "has successfully completed the course")
+
+    # Footer
+    c.setFont("Helvetica-Oblique", 10)
+    c.setFillColor(colors.HexColor('#6b7280'))
+    c.drawCentredString(width / 2, 80, "Learning Platform - Excellence in Education")
+
+
+def _draw_course_fields(c, width, height, certificate):
+    c.setFont("Helvetica-Bold", 28)
+    c.setFillColor(colors.HexColor('#1e40af'))
+    c.drawCentredString(width / 2, height - 250, certificate.user.get_full_name())
+
+    # Course title, wrapped to the width of the decorative line
+    c.setFont("Helvetica-Bold", 22)
+    _draw_centred_lines(
+        c, certificate.course.title, "Helvetica-Bold", 22,
+        width, height - 350, width - 160, 30
+    )
+
+    # Date and certificate ID
+    c.setFont("Helvetica", 12)
+    c.setFillColor(colors.HexColor('#6b7280'))
+    c.drawCentredString(width / 2, 150, f"Issued on: {certificate.issued_at.strftime('%B %d, %Y')}")
+    c.drawCentredString(width / 2, 130, f"Certificate ID: {certificate.certificate_id}")
+
+
+COURSE_TEMPLATE = CertificateTemplate('CourseCertificate', _draw_course_static, _draw_course_fields)
+
+
+# =====================================
+# PROFESSIONAL CERTIFICATE
+# =====================================
+
+def _draw_professional_static(c, width, height):
+    # Draw border
+    c.setStrokeColor(colors.HexColor('#059669'))
+    c.setLineWidth(4)
+    c.rect(40, 40, width - 80, height - 80)
+
+    # Inner border
+    c.setStrokeColor(colors.HexColor('#10b981'))
+    c.setLineWidth(2)
+    c.rect(50, 50, width - 100, height - 100)
+
+    # Title
+    c.setFont("Helvetica-Bold", 32)
+    c.setFillColor(colors.HexColor('#065f46'))
+    c.drawCentredString(width / 2, height - 100, "Professional Certification")
+
+    # Decorative line
+    c.setStrokeColor(colors.HexColor('#34d399'))
+    c.setLineWidth(2)
+    c.line(150, height - 120, width - 150, height - 120)
+
+    # Body text
+    c.setFont("Helvetica", 16)
+    c.setFillColor(colors.black)
+    c.drawCentredString(width / 2, height - 170, "This is to certify that")
+    c.drawCentredString(width / 2, height - 250, "has successfully completed the professional certification")
+
+    c.setFont("Helvetica", 14)
+    c.drawCentredString(width / 2, height - 330, "Including completion of the following courses:")
+
+    # Footer
+    c.setFont("Helvetica-Oblique", 10)
+    c.setFillColor(colors.HexColor('#6b7280'))
+    c.drawCentredString(width / 2, 70, "Learning Platform - Professional Excellence")
+
+
+def certification_course_titles(certification):
+    """Titles of the certification's active courses, from a prefetch when available"""
+    courses = getattr(certification, 'active_courses', None)
+    if courses is None:
+        courses = certification.courses.filter(is_active=True).order_by('order')
+    return [course.title for course in courses]
+
+
+def _draw_professional_fields(c, width, height, certificate):
+    c.setFont("Helvetica-Bold", 26)
+    c.setFillColor(colors.HexColor('#065f46'))
+    c.drawCentredString(width / 2, height - 210, certificate.user.get_full_name())
+
+    c.setFont("Helvetica-Bold", 20)
+    c.drawCentredString(width / 2, height - 290, certificate.certification.title)
+
+    # Courses completed
+    y_pos = height - 370
+    c.setFont("Helvetica", 11)
+    c.setFillColor(colors.black)
+    for i, title in enumerate(certification_course_titles(certificate.certification), 1):
+        if y_pos < 200:  # Prevent overflow
+            break
+        c.drawCentredString(width / 2, y_pos, f"{i}. {title}")
+        y_pos -= 20
+
+    # Date and certificate ID
+    c.setFont("Helvetica", 12)
+    c.setFillColor(colors.HexColor('#6b7280'))
+    c.drawCentredString(width / 2, 130, f"Issued on: {certificate.issued_at.strftime('%B %d, %Y')}")
+    c.drawCentredString(width / 2, 110, f"Certificate ID: {certificate.certificate_id}")
+
+
+PROFESSIONAL_TEMPLATE = CertificateTemplate(
+    'ProfessionalCertificate', _draw_professional_static, _draw_professional_fields
+)
@@ -0,0 +1,103 @@
+"""
+Certificate PDF rendering and caching.
+
+A certificate never changes after issuance, so each PDF is rendered once and
+stored in the storage named by settings.CERTIFICATE_STORAGE under a name that
+includes CERTIFICATE_TEMPLATE_VERSION. Downloads are served from storage with
+ETag/Last-Modified validators, and repeat downloads get a 304 without touching
+storage. Bumping the template version invalidates every cached PDF lazily:
+the next download of each certificate renders and stores a fresh copy.
+"""
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .certificate_templates import COURSE_TEMPLATE, PROFESSIONAL_TEMPLATE
+
+# Bump whenever the certificate layout changes to re-render cached PDFs
+CERTIFICATE_TEMPLATE_VERSION = 2
+
+
+def get_certificate_storage():
+    """Storage backend for rendered certificate PDFs"""
+    return storages[getattr(settings, 'CERTIFICATE_STORAGE', 'default')]
+
+
+def certificate_pdf_name(certificate):
+    return f'certificates/{certificate.certificate_id}-v{CERTIFICATE_TEMPLATE_VERSION}.pdf'
+
+
+def certificate_etag(certificate):
+    return f'"{certificate.certificate_id}-v{CERTIFICATE_TEMPLATE_VERSION}"'
+
+
+def render_course_certificate(certificate):
+    """Render a course certificate and return the PDF bytes"""
+    return COURSE_TEMPLATE.render(certificate)
+
+
+def render_professional_certificate(certificate):
+    """Render a professional certification certificate and return the PDF bytes"""
+    return PROFESSIONAL_TEMPLATE.render(certificate)
+
+
+def store_certificate_pdf(certificate, render):
+    """
+    Make sure the PDF for the current template version is in storage.
+
+    Renders and saves it when missing, points certificate_file at it and
+    removes the copy rendered by an older template version.
+    """
+    storage = get_certificate_storage()
+    name = certificate_pdf_name(certificate)
+    if certificate.certificate_file.name == name:
+        return name
+
+    if not storage.exists(name):
+        name = storage.save(name, ContentFile(render(certificate)))
+
+    previous = certificate.certificate_file.name
+    type(certificate).objects.filter(pk=certificate.pk).update(certificate_file=name)
+    certificate.certificate_file.name = name
+
+    if previous and previous != name:
+        try:
+            storage.delete(previous)
+        except Exception:
+            # A stale copy left behind only costs storage space
+            pass
+    return name
+
+
+def _open_certificate_pdf(certificate, render):
+    storage = get_certificate_storage()
+    name = store_certificate_pdf(certificate, render)
+    try:
+        return storage.open(name, 'rb')
+    except FileNotFoundError:
+        # The stored copy vanished (e.g. an ephemeral disk); store it again
+        certificate.certificate_file.name = ''
+        return storage.open(store_certificate_pdf(certificate, render), 'rb')
+
+
+def certificate_download_response(request, certificate, render, filename):
+    """Serve a certificate PDF from storage, or 304 when the client's copy is current"""
+    etag = certificate_etag(certificate)
+    last_modified = int(certificate.issued_at.timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = FileResponse(
+            _open_certificate_pdf(certificate, render),
+            as_attachment=True,
+            filename=filename,
+            content_type='application/pdf'
+        )
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,112 @@
+"""
+Write-behind buffer for video heartbeat updates.
+
+The module player POSTs the current watch time every 5 seconds. When
+PROGRESS_WRITE_BEHIND is enabled, heartbeats that cannot complete the module
+are coalesced in a per-process buffer keyed by (user, module), keeping the
+largest watch time, and written to ModuleProgress with one bulk UPDATE when
+the buffer reaches PROGRESS_BUFFER_MAX_SIZE entries or PROGRESS_BUFFER_FLUSH_INTERVAL
+seconds after the first pending heartbeat.
+
+Heartbeats that reach the completion threshold of a module the learner has
+not completed yet are never buffered: the view writes them through
+immediately so completion and certificates stay exact. The view reads the
+stored row for that decision, and answers a buffered heartbeat with its
+stored completion and the larger of its stored and pending watch time, so
+the response never reports less progress than the page was rendered with.
+Watch times are absolute positions, so a heartbeat lost with a restarting
+worker is recovered by the next one.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .buffers import WriteBehindBuffer
+from .models import Module, ModuleProgress
+from .progress import create_missing_summaries
+
+
+class HeartbeatBuffer(WriteBehindBuffer):
+    """Thread-safe, process-local buffer of pending video watch times"""
+
+    description = 'video heartbeat buffer'
+    max_size_setting = 'PROGRESS_BUFFER_MAX_SIZE'
+    flush_interval_setting = 'PROGRESS_BUFFER_FLUSH_INTERVAL'
+
+    def offer(self, user_id, module, watch_time, is_completed):
+        """
+        Buffer a heartbeat. Returns False when it completes the module (not
+        completed yet, is_completed being the stored state) and must be
+        written through instead.
+        """
+        threshold = module.video_duration * module.get_completion_threshold()
+        if module.video_duration > 0 and watch_time >= threshold and not is_completed:
+            return False
+
+        self._queue((user_id, module.pk), watch_time)
+        return True
+
+    def pending_watch_time(self, user_id, module_id, watch_time=0):
+        """The larger of watch_time and the pending heartbeat, leaving it buffered"""
+        with self._lock:
+            return max(watch_time, self._pending.get((user_id, module_id), 0))
+
+    def take(self, user_id, module_id, watch_time):
+        """Remove a pending heartbeat and return the larger of it and watch_time"""
+        with self._lock:
+            return max(watch_time, self._pending.pop((user_id, module_id), 0))
+
+    def _rows(self, pairs):
+        """{(user id, module id): stored row} for the given pairs"""
+        rows = ModuleProgress.objects.filter(
+            user_id__in={user_id for user_id, _ in pairs},
+            module_id__in={module_id for _, module_id in pairs}
+        ).only('id', 'user_id', 'module_id')
+        return {(row.user_id, row.module_id): row for row in rows if (row.user_id, row.module_id) in pairs}
+
+    def _write(self, pending):
+        rows = self._rows(pending.keys())
+
+        # Rows for first heartbeats are inserted together, ignoring any a
+        # concurrent request inserted meanwhile, and then updated with the rest
+        missing = pending.keys() - rows.keys()
+        if missing:
+            with transaction.atomic():
+                ModuleProgress.objects.bulk_create(
+                    [ModuleProgress(user_id=user_id, module_id=module_id) for user_id, module_id in missing],
+                    ignore_conflicts=True
+                )
+                course_ids = dict(Module.objects.order_by().filter(
+                    pk__in={module_id for _, module_id in missing}
+                ).values_list('pk', 'course_id'))
+                create_missing_summaries(
+                    (user_id, course_ids[module_id]) for user_id, module_id in missing if module_id in course_ids
+                )
+            rows.update(self._rows(missing))
+
+        now = timezone.now()
+        to_update = []
+        for (user_id, module_id), watch_time in pending.items():
+            row = rows.get((user_id, module_id))
+            if row is None:
+                continue
+            # Never move watch time backwards, whatever order heartbeats arrive in
+            row.video_watch_time = Greatest(F('video_watch_time'), Value(watch_time))
+            row.last_accessed = now
+            to_update.append(row)
+
+        ModuleProgress.objects.bulk_update(
+            to_update,
+            ['video_watch_time', 'last_accessed'],
+            batch_size=500
+        )
+        return len(to_update)
+
+
+def get_heartbeat_buffer():
+    """Return the process-wide buffer, or None when write-behind mode is off"""
+    if not getattr(settings, 'PROGRESS_WRITE_BEHIND', False):
+        return None
+    return HeartbeatBuffer.instance()
@@ -0,0 +1,268 @@
+"""
+Bulk certificate issuance.
+
+Finds every (user, course) and (user, certification) pair that meets the
+completion rule, issues the missing certificate rows in bulk and renders
+their PDFs into certificate storage. Both steps skip work that is already
+done, so an interrupted run simply picks up where it stopped.
+
+A course is complete once its CourseProgressSummary reaches
+COURSE_COMPLETION_THRESHOLD, and a certification once an enrolled user has
+completed every active course in it. Certificates are issued as soon as a
+progress change completes a course (issue_completion_certificates, run from
+the courses_completed signal); generate_certificates backfills the rest.
+
+Rows are inserted with bulk_create, which sends no post_save. Instead the
+cached verification results of the new ids are dropped and
+certificates_issued is sent with the ids that were actually inserted.
+"""
+import logging
+import uuid
+
+from django.db.models import Count, Exists, F, OuterRef, Prefetch, Value
+from django.db.models.functions import Concat
+from django.dispatch import Signal
+
+from .certificates import (
+    CERTIFICATE_TEMPLATE_VERSION, store_certificate_pdf,
+    render_course_certificate, render_professional_certificate
+)
+from .models import (
+    Course, CourseCertificate, CertificationEnrollment, CourseProgressSummary,
+    ProfessionalCertificationCertificate
+)
+from .progress import COURSE_COMPLETION_THRESHOLD
+from .verification import invalidate_certificates
+
+logger = logging.getLogger(__name__)
+
+# Sent with the certificate model as sender and the certificate_ids of the
+# rows a bulk issuance inserted
+certificates_issued = Signal()
+
+KIND_COURSE = 'course'
+KIND_PROFESSIONAL = 'professional'
+
+# Certificate model, renderer and select_related fields per kind
+CERTIFICATE_KINDS = {
+    KIND_COURSE: (CourseCertificate, render_course_certificate, ('user', 'course')),
+    KIND_PROFESSIONAL: (
+        ProfessionalCertificationCertificate,
+        render_professional_certificate,
+        ('user', 'certification')
+    ),
+}
+
+
+def new_course_certificate_id():
+    return f'CERT-{uuid.uuid4().hex[:12].upper()}'
+
+
+def new_professional_certificate_id():
+    return f'PROF-{uuid.uuid4().hex[:12].upper()}'
+
+
+def _completed_summaries(user_ids=None):
+    summaries = CourseProgressSummary.objects.filter(
+        percent__gte=COURSE_COMPLETION_THRESHOLD,
+        course__is_active=True
+    )
+    if user_ids is not None:
+        summaries = summaries.filter(user_id__in=user_ids)
+    return summaries
+
+
+def eligible_course_pairs(user_ids=None, course_ids=None):
+    """(user_id, course_id) pairs that have completed a course but hold no certificate"""
+    issued = CourseCertificate.objects.filter(user=OuterRef('user'), course=OuterRef('course'))
+    summaries = _completed_summaries(user_ids).filter(~Exists(issued))
+    if course_ids is not None:
+        summaries = summaries.filter(course_id__in=course_ids)
+    return summaries.order_by().values_list('user_id', 'course_id')
+
+
+def eligible_certification_pairs(user_ids=None, certification_ids=None):
+    """(user_id, certification_id) pairs that have completed a certification but hold no certificate"""
+    courses = Course.objects.filter(
+        is_active=True,
+        certification__isnull=False,
+        certification__is_active=True
+    )
+    if certification_ids is not None:
+        courses = courses.filter(certification_id__in=certification_ids)
+    active_courses = dict(
+        courses.order_by()
+        .values('certification_id')
+        .annotate(total=Count('id'))
+        .values_list('certification_id', 'total')
+    )
+    if not active_courses:
+        return []
+
+    enrolled = CertificationEnrollment.objects.filter(
+        user=OuterRef('user'),
+        certification=OuterRef('course__certification')
+    )
+    issued = ProfessionalCertificationCertificate.objects.filter(
+        user=OuterRef('user'),
+        certification=OuterRef('course__certification')
+    )
+    rows = (
+        _completed_summaries(user_ids)
+        .filter(course__certification_id__in=active_courses.keys())
+        .filter(Exists(enrolled), ~Exists(issued))
+        .order_by()
+        .values('user_id', 'course__certification_id')
+        .annotate(done=Count('id'))
+        .values_list('user_id', 'course__certification_id', 'done')
+    )
+    return [
+        (user_id, certification_id)
+        for user_id, certification_id, done in rows
+        if done == active_courses[certification_id]
+    ]
+
+
+def _create_certificates(model, certificates, batch_size):
+    """
+    Insert certificates, ignoring pairs that were issued concurrently, and
+    return the number actually inserted.
+    """
+    model.objects.bulk_create(certificates, batch_size=batch_size, ignore_conflicts=True)
+
+    # ignore_conflicts does not say which rows were inserted; the new ids do
+    new_ids = [certificate.certificate_id for certificate in certificates]
+    issued = []
+    for start in range(0, len(new_ids), batch_size):
+        issued += model.objects.filter(
+            certificate_id__in=new_ids[start:start + batch_size]
+        ).values_list('certificate_id', flat=True)
+
+    if issued:
+        invalidate_certificates(issued)
+        for receiver, error in certificates_issued.send_robust(sender=model, certificate_ids=issued):
+            if isinstance(error, Exception):
+                logger.error("certificates_issued receiver %r failed", receiver, exc_info=error)
+    return len(issued)
+
+
+def issue_course_certificates(user_ids=None, course_ids=None, batch_size=1000, dry_run=False):
+    """Create the missing course certificates; returns how many were issued (or eligible, with dry_run)"""
+    pairs = list(eligible_course_pairs(user_ids, course_ids))
+    if dry_run:
+        return len(pairs)
+    return _create_certificates(
+        CourseCertificate,
+        [
+            CourseCertificate(
+                user_id=user_id,
+                course_id=course_id,
+                certificate_id=new_course_certificate_id()
+            )
+            for user_id, course_id in pairs
+        ],
+        batch_size
+    )
+
+
+def issue_certification_certificates(user_ids=None, certification_ids=None, batch_size=1000, dry_run=False):
+    """Create the missing professional certificates; returns how many were issued (or eligible, with dry_run)"""
+    pairs = eligible_certification_pairs(user_ids, certification_ids)
+    if dry_run:
+        return len(pairs)
+    return _create_certificates(
+        ProfessionalCertificationCertificate,
+        [
+            ProfessionalCertificationCertificate(
+                user_id=user_id,
+                certification_id=certification_id,
+                certificate_id=new_professional_certificate_id()
+            )
+            for user_id, certification_id in pairs
+        ],
+        batch_size
+    )
+
+
+def issue_missing_certificates(batch_size=1000, dry_run=False):
+    """
+    Create every missing certificate row with bulk_create.
+
+    Returns the number of course and professional certificates issued.
+    Conflicting rows (issued concurrently by the completion pipeline) are ignored.
+    """
+    return {
+        KIND_COURSE: issue_course_certificates(batch_size=batch_size, dry_run=dry_run),
+        KIND_PROFESSIONAL: issue_certification_certificates(batch_size=batch_size, dry_run=dry_run),
+    }
+
+
+def issue_completion_certificates(pairs):
+    """
+    Issue certificates for (user_id, course_id) pairs that just completed a course.
+
+    Also issues the professional certificate of every certification one of
+    those courses finishes. Runs from the courses_completed signal, after
+    the progress change has been committed.
+    """
+    user_ids = {user_id for user_id, _ in pairs}
+    course_ids = {course_id for _, course_id in pairs}
+    certification_ids = set(
+        Course.objects.filter(pk__in=course_ids, certification__isnull=False)
+        .values_list('certification_id', flat=True)
+    )
+
+    issued = {
+        KIND_COURSE: issue_course_certificates(user_ids, course_ids),
+        KIND_PROFESSIONAL: 0,
+    }
+    if certification_ids:
+        issued[KIND_PROFESSIONAL] = issue_certification_certificates(user_ids, certification_ids)
+
+    if any(issued.values()):
+        logger.info(
+            "Issued %d course and %d professional certificates for users %s",
+            issued[KIND_COURSE], issued[KIND_PROFESSIONAL], sorted(user_ids)
+        )
+    return issued
+
+
+def unrendered_certificate_ids():
+    """Ids of certificates without a PDF for the current template version, per kind"""
+    current_name = Concat(
+        Value('certificates/'),
+        F('certificate_id'),
+        Value(f'-v{CERTIFICATE_TEMPLATE_VERSION}.pdf')
+    )
+    return {
+        kind: list(
+            model.objects.annotate(current_name=current_name)
+            .exclude(certificate_file=F('current_name'))
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        for kind, (model, render, related) in CERTIFICATE_KINDS.items()
+    }
+
+
+def render_certificates(kind, certificate_ids):
+    """
+    Render and store the PDFs for a batch of certificates of one kind.
+
+    Module-level so it can run in a worker process. Returns the number of
+    certificates in the batch that now have a current PDF.
+    """
+    model, render, related = CERTIFICATE_KINDS[kind]
+    certificates = model.objects.select_related(*related).filter(pk__in=certificate_ids)
+    if kind == KIND_PROFESSIONAL:
+        # One query for every certification's course list in the batch
+        certificates = certificates.prefetch_related(Prefetch(
+            'certification__courses',
+            queryset=Course.objects.filter(is_active=True).order_by('order'),
+            to_attr='active_courses'
+        ))
+    rendered = 0
+    for certificate in certificates:
+        store_certificate_pdf(certificate, render)
+        rendered += 1
+    return rendered
@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from courses.issuance import (
+    issue_missing_certificates, unrendered_certificate_ids, render_certificates
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Issue every missing course and professional certificate and render their PDFs "
+        "in parallel. Also backfills completions from before certificates were issued "
+        "automatically. Safe to re-run: issued certificates and current PDFs are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Render processes (defaults to the number of CPU cores; 1 renders in-process)"
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=25,
+            help="Certificates rendered per worker task"
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Rows per bulk INSERT statement"
+        )
+        parser.add_argument(
+            '--skip-render',
+            action='store_true',
+            help="Only issue the missing certificate rows (backfill); PDFs render on first download"
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Report what would be issued and rendered without changing anything"
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        issued = issue_missing_certificates(batch_size=options['batch_size'], dry_run=dry_run)
+        verb = "Would issue" if dry_run else "Issued"
+        self.stdout.write(
+            f"{verb} {issued['course']} course and {issued['professional']} professional certificates"
+        )
+
+        if options['skip_render']:
+            return
+
+        pending = unrendered_certificate_ids()
+        total = sum(len(ids) for ids in pending.values())
+        if dry_run or total == 0:
+            self.stdout.write(f"{total} certificate PDFs to render")
+            return
+
+        chunk_size = max(1, options['chunk_size'])
+        tasks = [
+            (kind, ids[start:start + chunk_size])
+            for kind, ids in pending.items()
+            for start in range(0, len(ids), chunk_size)
+        ]
+        workers = max(1, min(options['workers'], len(tasks)))
+        self.stdout.write(f"Rendering {total} certificate PDFs with {workers} worker(s)")
+
+        started = time.perf_counter()
+        rendered = 0
+        for count in self._run(tasks, workers):
+            rendered += count
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"  {rendered}/{total} rendered ({rendered / elapsed:.1f}/s)")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {rendered} certificate PDFs in {elapsed:.1f}s ({rendered / elapsed:.1f}/s)"
+        ))
+
+    def _run(self, tasks, workers):
+        """Yield the number of PDFs rendered by each task as it finishes"""
+        if workers == 1:
+            for kind, ids in tasks:
+                yield render_certificates(kind, ids)
+            return
+
+        # Workers open their own connections; never share the parent's sockets
+        connections.close_all()
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(render_certificates, kind, ids) for kind, ids in tasks]
+            for future in as_completed(futures):
+                yield future.result()
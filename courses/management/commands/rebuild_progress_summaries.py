@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from courses.progress import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild every CourseProgressSummary row from ModuleProgress, or verify them with --verify"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Only report rows that are missing, stale or orphaned; exit with an error if any are found"
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Rows per bulk INSERT/UPDATE/DELETE statement"
+        )
+
+    def handle(self, *args, **options):
+        verify = options['verify']
+
+        with transaction.atomic():
+            stats = rebuild_summaries(batch_size=options['batch_size'], dry_run=verify)
+
+        summary = f"created={stats['created']} updated={stats['updated']} deleted={stats['deleted']}"
+        if not verify:
+            self.stdout.write(self.style.SUCCESS(f"Progress summaries rebuilt: {summary}"))
+            return
+
+        if any(stats.values()):
+            raise CommandError(f"Progress summaries are out of date: {summary}")
+        self.stdout.write(self.style.SUCCESS("Progress summaries are consistent."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import SearchEntry
+from courses.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite the search entry of every certification, course and module and drop "
+        "entries of deleted ones. Saves keep the index current; run this after the "
+        "search migration, bulk imports or queryset updates that bypass signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--if-empty',
+            action='store_true',
+            help="Only build the index when it has no entries yet (for deploy scripts)"
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Entries per bulk upsert"
+        )
+
+    def handle(self, *args, **options):
+        if options['if_empty'] and SearchEntry.objects.exists():
+            self.stdout.write("Search index already built.")
+            return
+
+        written = rebuild_index(batch_size=options['batch_size'])
+        summary = ' '.join(f"{kind}={count}" for kind, count in written.items())
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt: {summary}"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from courses.analytics import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Update the instructor analytics rollups with the progress, certificates and "
+        "enrollments changed since the last run. Run it every few minutes from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help="Recount every rollup from all source rows instead of only the changed ones"
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Modules or courses recounted per query, and source rows fetched per round trip"
+        )
+
+    def handle(self, *args, **options):
+        written = refresh_rollups(rebuild=options['rebuild'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Analytics rollups up to date until {written['processed_until']:%Y-%m-%d %H:%M:%S}: "
+            f"modules={written['modules']} courses={written['courses']}"
+        ))
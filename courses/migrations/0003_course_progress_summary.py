@@ -0,0 +1,70 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def populate_summaries(apps, schema_editor):
+    """Build a summary for every (user, course) pair that already has progress"""
+    Module = apps.get_model('courses', 'Module')
+    ModuleProgress = apps.get_model('courses', 'ModuleProgress')
+    CourseProgressSummary = apps.get_model('courses', 'CourseProgressSummary')
+
+    totals = dict(
+        Module.objects.filter(is_active=True).order_by()
+        .values('course_id').annotate(total=Count('id'))
+        .values_list('course_id', 'total')
+    )
+    completed = {
+        (row['user_id'], row['module__course_id']): row
+        for row in ModuleProgress.objects.filter(is_completed=True, module__is_active=True)
+        .order_by().values('user_id', 'module__course_id')
+        .annotate(done=Count('id'), last_completed=Max('completed_at'))
+    }
+    pairs = ModuleProgress.objects.order_by().values_list('user_id', 'module__course_id').distinct()
+
+    summaries = []
+    for user_id, course_id in pairs:
+        total = totals.get(course_id, 0)
+        row = completed.get((user_id, course_id))
+        done = row['done'] if row else 0
+        percent = (done / total) * 100 if total else 0
+        summaries.append(CourseProgressSummary(
+            user_id=user_id,
+            course_id=course_id,
+            completed_count=done,
+            active_module_count=total,
+            percent=percent,
+            completed_at=row['last_completed'] if row and percent >= 90 else None,
+        ))
+    CourseProgressSummary.objects.bulk_create(summaries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_course_created_by_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseProgressSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_count', models.PositiveIntegerField(default=0, help_text='Completed active modules in the course')),
+                ('active_module_count', models.PositiveIntegerField(default=0, help_text='Active modules in the course')),
+                ('percent', models.FloatField(default=0)),
+                ('completed_at', models.DateTimeField(blank=True, help_text='When the course crossed the completion threshold', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_summaries', to='courses.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_progress_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'course_progress_summaries',
+                'unique_together': {('user', 'course')},
+            },
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_course_progress_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessedProgressEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Client-generated idempotency key', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='processed_progress_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'processed_progress_events',
+                'unique_together': {('user', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:18
+
+import courses.certificates
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_processed_progress_event'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='coursecertificate',
+            name='certificate_file',
+            field=models.FileField(blank=True, help_text='Rendered PDF, cached for the current certificate template version', null=True, storage=courses.certificates.get_certificate_storage, upload_to='certificates/'),
+        ),
+        migrations.AlterField(
+            model_name='professionalcertificationcertificate',
+            name='certificate_file',
+            field=models.FileField(blank=True, help_text='Rendered PDF, cached for the current certificate template version', null=True, storage=courses.certificates.get_certificate_storage, upload_to='certificates/'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_certificate_file_storage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certificationenrollment',
+            index=models.Index(fields=['user', 'is_active', '-enrolled_at', '-id'], name='enrollment_user_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='professionalcertification',
+            index=models.Index(fields=['is_active', '-created_at', '-id'], name='cert_active_created_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('processed_until', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'rollup_watermarks',
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('enrollments', models.PositiveIntegerField(default=0, help_text="Learners who enrolled in the course's certification that day and are still enrolled")),
+                ('active_learners', models.PositiveIntegerField(default=0, help_text='Learners who opened or progressed in any module of the course that day')),
+                ('completions', models.PositiveIntegerField(default=0, help_text='Course certificates issued that day')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='courses.course')),
+            ],
+            options={
+                'verbose_name_plural': 'course daily stats',
+                'db_table': 'course_daily_stats',
+                'ordering': ['-date'],
+                'unique_together': {('course', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ModuleDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('started', models.PositiveIntegerField(default=0, help_text='Learners whose first progress on the module (a video heartbeat, completion or synced event) was recorded that day; opening the page alone does not count')),
+                ('completed', models.PositiveIntegerField(default=0, help_text='Learners who completed the module that day')),
+                ('active_learners', models.PositiveIntegerField(default=0, help_text='Learners who opened or progressed in the module that day')),
+                ('watch_seconds', models.PositiveBigIntegerField(default=0, help_text='Video seconds watched so far, capped at the video length, by the learners who started that day')),
+                ('module', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='courses.module')),
+            ],
+            options={
+                'verbose_name_plural': 'module daily stats',
+                'db_table': 'module_daily_stats',
+                'ordering': ['-date'],
+                'unique_together': {('module', 'date')},
+            },
+        ),
+    ]
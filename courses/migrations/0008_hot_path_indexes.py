@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:47
+
+from django.db import migrations, models
+
+
+def create_covering_progress_index(apps, schema_editor):
+    """
+    Lets progress lookups by (user, module set) read completion and watch
+    time from the index alone. Needs INCLUDE, so PostgreSQL only; elsewhere
+    the unique (user_id, module_id) index serves these lookups.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS progress_user_module_cover_idx '
+            'ON module_progress (user_id, module_id) INCLUDE (is_completed, video_watch_time)'
+        )
+
+
+def drop_covering_progress_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS progress_user_module_cover_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['certification', 'order'], name='course_active_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='module',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['course', 'order'], name='module_active_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moduleprogress',
+            index=models.Index(fields=['user', '-last_accessed'], name='progress_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moduleprogress',
+            index=models.Index(fields=['last_accessed'], name='progress_last_accessed_idx'),
+        ),
+        migrations.RunPython(create_covering_progress_index, drop_covering_progress_index),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:50
+
+from django.db import migrations, models
+
+POSTGRESQL_INDEX = [
+    # Titles rank above the certification/course they belong to, which rank above body text
+    """
+    ALTER TABLE search_entries ADD COLUMN document tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(context, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'D')
+    ) STORED
+    """,
+    'CREATE INDEX search_entries_document_idx ON search_entries USING GIN (document)',
+]
+
+SQLITE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE search_entries_fts USING fts5(
+        title, context, body, content='search_entries', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER search_entries_fts_insert AFTER INSERT ON search_entries BEGIN
+        INSERT INTO search_entries_fts(rowid, title, context, body)
+        VALUES (new.id, new.title, new.context, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER search_entries_fts_delete AFTER DELETE ON search_entries BEGIN
+        INSERT INTO search_entries_fts(search_entries_fts, rowid, title, context, body)
+        VALUES ('delete', old.id, old.title, old.context, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER search_entries_fts_update AFTER UPDATE ON search_entries BEGIN
+        INSERT INTO search_entries_fts(search_entries_fts, rowid, title, context, body)
+        VALUES ('delete', old.id, old.title, old.context, old.body);
+        INSERT INTO search_entries_fts(rowid, title, context, body)
+        VALUES (new.id, new.title, new.context, new.body);
+    END
+    """,
+]
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return 'ENABLE_FTS5' in {row[0] for row in cursor.fetchall()}
+
+
+def create_fulltext_index(apps, schema_editor):
+    """
+    Full-text index on search_entries for this database. Without one (other
+    databases, SQLite built without FTS5) search falls back to icontains.
+    """
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        statements = POSTGRESQL_INDEX
+    elif connection.vendor == 'sqlite' and _sqlite_has_fts5(connection):
+        statements = SQLITE_INDEX
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE search_entries DROP COLUMN IF EXISTS document')
+    elif connection.vendor == 'sqlite':
+        for trigger in ('insert', 'delete', 'update'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS search_entries_fts_{trigger}')
+        schema_editor.execute('DROP TABLE IF EXISTS search_entries_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('certification', 'Certification'), ('course', 'Course'), ('module', 'Module')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('context', models.CharField(blank=True, help_text='Title of the certification or course the entry belongs to', max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('is_active', models.BooleanField(default=True, help_text='Whether learners can find the entry')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'search entries',
+                'db_table': 'search_entries',
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
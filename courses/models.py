@@ -1,9 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 from cloudinary.models import CloudinaryField
 from django.utils import timezone
 
+from .certificates import get_certificate_storage
+
 
 class User(AbstractUser):
     """Extended User model with additional fields and role management"""
@@ -100,6 +102,10 @@ class ProfessionalCertification(models.Model):
     class Meta:
         ordering = ['-created_at']
         db_table = 'professional_certifications'
+        indexes = [
+            # Keyset pagination of the catalogue (see pagination.py)
+            models.Index(fields=['is_active', '-created_at', '-id'], name='cert_active_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.get_certification_type_display()})"
@@ -109,32 +115,13 @@ class ProfessionalCertification(models.Model):
 
     def get_user_progress(self, user):
         """Calculate user's progress across all courses in this certification (only if enrolled)"""
-        # Check if user is enrolled in this certification
-        if not self.enrollments.filter(user=user).exists():
-            return 0
-
-        total_courses = self.courses.filter(is_active=True).count()
-        if total_courses == 0:
-            return 0
-
-        completed_courses = sum(
-            1 for course in self.courses.filter(is_active=True)
-            if course.is_completed_by_user(user)
-        )
-
-        return (completed_courses / total_courses) * 100
+        from .progress import build_progress
+        return build_progress(user, certifications=[self]).certification(self).percent
 
     def is_completed_by_user(self, user):
         """Check if user has completed all courses in this certification (only if enrolled)"""
-        # Must be enrolled to get certification certificate
-        if not self.enrollments.filter(user=user).exists():
-            return False
-
-        active_courses = self.courses.filter(is_active=True)
-        if not active_courses.exists():
-            return False
-
-        return all(course.is_completed_by_user(user) for course in active_courses)
+        from .progress import build_progress
+        return build_progress(user, certifications=[self]).certification(self).is_completed
 
     def is_user_enrolled(self, user):
         """Check if user is enrolled in this certification"""
@@ -169,32 +156,41 @@ class Course(models.Model):
     class Meta:
         ordering = ['order', 'title']
         db_table = 'courses'
+        indexes = [
+            # Active courses of a certification, in display order
+            models.Index(
+                fields=['certification', 'order'], condition=models.Q(is_active=True),
+                name='course_active_order_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.certification.title} - {self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored certification so both catalogue entries are refreshed on a move
+        instance._saved_certification_id = instance.__dict__.get('certification_id')
+        return instance
+
     def get_total_modules(self):
         return self.modules.filter(is_active=True).count()
 
     def get_user_progress(self, user):
         """Calculate user's progress percentage for this course"""
-        total_modules = self.modules.filter(is_active=True).count()
-        if total_modules == 0:
-            return 0
-
-        completed_modules = ModuleProgress.objects.filter(
-            user=user,
-            module__course=self,
-            module__is_active=True,
-            is_completed=True
-        ).count()
-
-        return (completed_modules / total_modules) * 100
+        from .progress import build_progress
+        return build_progress(user, courses=[self]).course(self).percent
 
     def is_completed_by_user(self, user):
         """Check if user has completed at least 90% of the modules"""
-        progress = self.get_user_progress(user)
-        return progress >= 90
+        from .progress import build_progress
+        return build_progress(user, courses=[self]).course(self).is_completed
+
+    def progress_map_for(self, user, modules=None):
+        """Per-module progress and the course aggregate for user, from one query"""
+        from .progress import build_progress_map
+        return build_progress_map(user, self, modules)
 
 
 class Module(models.Model):
@@ -228,10 +224,24 @@ class Module(models.Model):
     class Meta:
         ordering = ['order', 'title']
         db_table = 'modules'
+        indexes = [
+            # Active modules of a course, in display order, and their counts
+            models.Index(
+                fields=['course', 'order'], condition=models.Q(is_active=True),
+                name='module_active_order_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored course so progress summaries of both courses stay correct on a move
+        instance._saved_course_id = instance.__dict__.get('course_id')
+        return instance
+
     def get_completion_threshold(self):
         """Get the completion threshold for video modules (85%)"""
         if self.module_type == 'video':
@@ -266,10 +276,42 @@ class ModuleProgress(models.Model):
         unique_together = ['user', 'module']
         db_table = 'module_progress'
         ordering = ['-last_accessed']
+        indexes = [
+            # A user's recent activity on the dashboard
+            models.Index(fields=['user', '-last_accessed'], name='progress_user_recent_idx'),
+            # Rows changed since the analytics watermark (see analytics.py)
+            models.Index(fields=['last_accessed'], name='progress_last_accessed_idx'),
+        ]
+        # PostgreSQL also gets a covering (user_id, module_id) index, see
+        # migration 0008_hot_path_indexes
 
     def __str__(self):
         return f"{self.user.username} - {self.module.title} - {'Completed' if self.is_completed else 'In Progress'}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored completion state so save() can detect transitions
+        instance._saved_is_completed = instance.__dict__.get('is_completed')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save and keep the user's CourseProgressSummary in the same transaction"""
+        from .progress import record_progress_change
+
+        previous = getattr(self, '_saved_is_completed', None)
+        if self._state.adding:
+            # A new row has not counted towards the summary yet
+            previous = False
+            changed = True
+        else:
+            changed = previous is None or previous != self.is_completed
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if changed:
+                record_progress_change(self, previous)
+        self._saved_is_completed = self.is_completed
+
     def mark_as_completed(self):
         """Mark module as completed"""
         if not self.is_completed:
@@ -279,13 +321,15 @@ class ModuleProgress(models.Model):
 
     def update_video_progress(self, watch_time):
         """Update video watch time and check if completion threshold is met"""
-        self.video_watch_time = watch_time
+        # Heartbeats can arrive out of order; never lower the watch time
+        self.video_watch_time = max(self.video_watch_time, watch_time)
 
         # Check if user has watched at least 85% of the video
-        if self.module.module_type == 'video' and self.module.video_duration > 0:
+        if not self.is_completed and self.module.module_type == 'video' and self.module.video_duration > 0:
             threshold = self.module.get_completion_threshold()
-            if watch_time >= (self.module.video_duration * threshold):
-                self.mark_as_completed()
+            if self.video_watch_time >= (self.module.video_duration * threshold):
+                self.is_completed = True
+                self.completed_at = timezone.now()
 
         self.save()
 
@@ -300,13 +344,62 @@ class ModuleProgress(models.Model):
         return 0
 
 
+class ProcessedProgressEvent(models.Model):
+    """Idempotency key of a progress event already applied through the batch sync endpoint"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='processed_progress_events')
+    key = models.CharField(max_length=100, help_text="Client-generated idempotency key")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['user', 'key']
+        db_table = 'processed_progress_events'
+
+    def __str__(self):
+        return f"{self.user.username} - {self.key}"
+
+
+class CourseProgressSummary(models.Model):
+    """Denormalized per-user course progress, maintained on every completion change"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='course_progress_summaries')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='progress_summaries')
+
+    completed_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Completed active modules in the course"
+    )
+    active_module_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Active modules in the course"
+    )
+    percent = models.FloatField(default=0)
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the course crossed the completion threshold"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['user', 'course']
+        db_table = 'course_progress_summaries'
+
+    def __str__(self):
+        return f"{self.user.username} - {self.course.title} - {self.percent:.0f}%"
+
+
 class CourseCertificate(models.Model):
     """Certificate issued when a user completes a course"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='course_certificates')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='certificates')
     certificate_id = models.CharField(max_length=100, unique=True)
     issued_at = models.DateTimeField(auto_now_add=True)
-    certificate_file = CloudinaryField('certificate', null=True, blank=True)
+    certificate_file = models.FileField(
+        upload_to='certificates/',
+        storage=get_certificate_storage,
+        null=True,
+        blank=True,
+        help_text="Rendered PDF, cached for the current certificate template version"
+    )
 
     class Meta:
         unique_together = ['user', 'course']
@@ -331,7 +424,13 @@ class ProfessionalCertificationCertificate(models.Model):
     )
     certificate_id = models.CharField(max_length=100, unique=True)
     issued_at = models.DateTimeField(auto_now_add=True)
-    certificate_file = CloudinaryField('certificate', null=True, blank=True)
+    certificate_file = models.FileField(
+        upload_to='certificates/',
+        storage=get_certificate_storage,
+        null=True,
+        blank=True,
+        help_text="Rendered PDF, cached for the current certificate template version"
+    )
 
     class Meta:
         unique_together = ['user', 'certification']
@@ -361,6 +460,125 @@ class CertificationEnrollment(models.Model):
         unique_together = ['user', 'certification']
         db_table = 'certification_enrollments'
         ordering = ['-enrolled_at']
+        indexes = [
+            # Keyset pagination of a user's enrollments (see pagination.py)
+            models.Index(fields=['user', 'is_active', '-enrolled_at', '-id'], name='enrollment_user_active_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.get_full_name()} enrolled in {self.certification.title}"
+
+
+class CourseDailyStats(models.Model):
+    """Per-course learner activity for one day, maintained by the refresh_analytics command"""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+
+    enrollments = models.PositiveIntegerField(
+        default=0,
+        help_text="Learners who enrolled in the course's certification that day and are still enrolled"
+    )
+    active_learners = models.PositiveIntegerField(
+        default=0,
+        help_text="Learners who opened or progressed in any module of the course that day"
+    )
+    completions = models.PositiveIntegerField(
+        default=0,
+        help_text="Course certificates issued that day"
+    )
+
+    class Meta:
+        unique_together = ['course', 'date']
+        db_table = 'course_daily_stats'
+        verbose_name_plural = 'course daily stats'
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.course.title} - {self.date}"
+
+
+class ModuleDailyStats(models.Model):
+    """Per-module learner funnel for one day, maintained by the refresh_analytics command"""
+    module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+
+    started = models.PositiveIntegerField(
+        default=0,
+        help_text=(
+            "Learners whose first progress on the module (a video heartbeat, completion or synced event) "
+            "was recorded that day; opening the page alone does not count"
+        )
+    )
+    completed = models.PositiveIntegerField(
+        default=0,
+        help_text="Learners who completed the module that day"
+    )
+    active_learners = models.PositiveIntegerField(
+        default=0,
+        help_text="Learners who opened or progressed in the module that day"
+    )
+    watch_seconds = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Video seconds watched so far, capped at the video length, by the learners who started that day"
+    )
+
+    class Meta:
+        unique_together = ['module', 'date']
+        db_table = 'module_daily_stats'
+        verbose_name_plural = 'module daily stats'
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.module.title} - {self.date}"
+
+
+class RollupWatermark(models.Model):
+    """How far a rollup job has processed its source rows"""
+    name = models.CharField(max_length=50, unique=True)
+    processed_until = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_watermarks'
+
+    def __str__(self):
+        return f"{self.name} - {self.processed_until}"
+
+
+class SearchEntry(models.Model):
+    """
+    Searchable text of one certification, course or module, kept up to date
+    by search.py. Migration 0009_search_index adds the full-text index on
+    top: a generated tsvector column on PostgreSQL, an FTS5 table fed by
+    triggers on SQLite. Altering this model on SQLite rebuilds the table and
+    drops those triggers, so such a migration has to recreate them.
+    """
+    KIND_CERTIFICATION = 'certification'
+    KIND_COURSE = 'course'
+    KIND_MODULE = 'module'
+
+    KIND_CHOICES = [
+        (KIND_CERTIFICATION, 'Certification'),
+        (KIND_COURSE, 'Course'),
+        (KIND_MODULE, 'Module'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    title = models.CharField(max_length=200)
+    context = models.CharField(
+        max_length=200,
+        blank=True,
+        help_text="Title of the certification or course the entry belongs to"
+    )
+    body = models.TextField(blank=True)
+    is_active = models.BooleanField(default=True, help_text="Whether learners can find the entry")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['kind', 'object_id']
+        db_table = 'search_entries'
+        verbose_name_plural = 'search entries'
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
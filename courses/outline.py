@@ -0,0 +1,82 @@
+"""
+Cached module outline per course.
+
+Navigation and listing pages only need each module's id, title, type, order
+and duration, never its content. get_course_outline() returns those for a
+course from the cache, with a position index so previous/next lookups are a
+dict access. Outlines are cached per process under a per-course version
+kept in the 'shared' cache, like the catalogue (see catalog.py); saving or
+deleting one of the course's modules bumps the version (see signals.py), so
+every worker rebuilds the outline on its next request.
+"""
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from .catalog import bump_versions, get_versions
+from .models import Module
+
+OUTLINE_CACHE_TIMEOUT = 60 * 10
+
+OUTLINE_FIELDS = ['id', 'title', 'module_type', 'order', 'video_duration', 'is_active']
+
+MODULE_TYPE_LABELS = dict(Module.MODULE_TYPES)
+
+
+class OutlineEntry(namedtuple('OutlineEntry', OUTLINE_FIELDS)):
+    """One module in an outline; quacks like a Module in templates"""
+    __slots__ = ()
+
+    @property
+    def pk(self):
+        return self.id
+
+    def get_module_type_display(self):
+        return MODULE_TYPE_LABELS.get(self.module_type, self.module_type)
+
+
+class CourseOutline:
+    """Ordered modules of a course, with every module and the active ones"""
+
+    def __init__(self, course_id, entries):
+        self.course_id = course_id
+        self.entries = entries
+        self.active = [entry for entry in entries if entry.is_active]
+        self._positions = {entry.id: index for index, entry in enumerate(self.active)}
+
+    def __len__(self):
+        return len(self.active)
+
+    def neighbours(self, module_id):
+        """(previous, next) active entries around module_id; None at either end"""
+        index = self._positions.get(module_id)
+        if index is None:
+            return None, None
+        previous = self.active[index - 1] if index > 0 else None
+        following = self.active[index + 1] if index + 1 < len(self.active) else None
+        return previous, following
+
+
+def _version_key(course_id):
+    return f'course-outline:{course_id}:version'
+
+
+def get_course_outline(course_id):
+    version_key = _version_key(course_id)
+    cache_key = f'course-outline:{course_id}:{get_versions([version_key])[version_key]}'
+    outline = cache.get(cache_key)
+    if outline is None:
+        entries = [
+            OutlineEntry(*row)
+            for row in Module.objects.filter(course_id=course_id)
+            .order_by('order', 'title', 'id')
+            .values_list(*OUTLINE_FIELDS)
+        ]
+        outline = CourseOutline(course_id, entries)
+        cache.set(cache_key, outline, OUTLINE_CACHE_TIMEOUT)
+    return outline
+
+
+def invalidate_course_outlines(course_ids):
+    """Make every worker rebuild the outlines of the given courses"""
+    bump_versions([_version_key(course_id) for course_id in set(course_ids) if course_id is not None])
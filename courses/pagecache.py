@@ -0,0 +1,95 @@
+"""
+Full-page cache for anonymous visitors.
+
+Pages wrapped in cache_anonymous_page() are rendered once and then served
+from the cache to every request that carries no session or messages cookie.
+Such a request is anonymous and has nothing personal to show, so all of them
+get the same page. Anyone with a session (logged in, or with a flash message
+waiting) always gets a freshly rendered page.
+
+Cached pages are keyed by the catalogue version and the group members
+version, both kept in the shared cache (see catalog.py), so certification,
+course and group member changes reach every worker immediately. A page that
+set a cookie, used the CSRF token or wrote to the session while rendering is
+never stored.
+
+The key is built from the path and the query parameters in
+CACHED_QUERY_PARAMS, in a canonical order. Requests carrying any other
+parameter (tracking tags, cache busters) bypass the cache, so arbitrary
+query strings cannot fill it with copies of the same page.
+"""
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .catalog import GLOBAL_VERSION_KEY, get_versions, bump_versions
+
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Query parameters that may select a different page; any other bypasses the cache
+CACHED_QUERY_PARAMS = frozenset({'page', 'cursor', 'q'})
+
+GROUP_MEMBERS_VERSION_KEY = 'group-members:version'
+
+
+def bump_group_members_version():
+    bump_versions([GROUP_MEMBERS_VERSION_KEY])
+
+
+def _is_cacheable_request(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and request.GET.keys() <= CACHED_QUERY_PARAMS
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def _is_cacheable_response(request, response):
+    session = getattr(request, 'session', None)
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        and not (session is not None and session.modified)
+    )
+
+
+def _page_key(request):
+    versions = get_versions([GLOBAL_VERSION_KEY, GROUP_MEMBERS_VERSION_KEY])
+    query = urlencode(sorted((name, value) for name, values in request.GET.lists() for value in values))
+    path = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    return (
+        f'anonymous-page:{path}:'
+        f'{versions[GLOBAL_VERSION_KEY]}:{versions[GROUP_MEMBERS_VERSION_KEY]}'
+    )
+
+
+def cache_anonymous_page(view):
+    """Serve the view's page from the cache to anonymous, cookie-less requests"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _is_cacheable_request(request):
+            return view(request, *args, **kwargs)
+
+        key = _page_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            response = view(request, *args, **kwargs)
+            if _is_cacheable_response(request, response):
+                cache.set(key, (response.content, response['Content-Type']), PAGE_CACHE_TIMEOUT)
+
+        # The page depends on whether the request has a session
+        patch_vary_headers(response, ['Cookie'])
+        return response
+    return wrapper
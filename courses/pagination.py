@@ -0,0 +1,55 @@
+"""
+Keyset (cursor) pagination for newest-first listings.
+
+A page is the next `limit` rows after the last row of the previous page in
+(timestamp, id) order, fetched with
+
+    WHERE ts < :ts OR (ts = :ts AND id < :id) ORDER BY ts DESC, id DESC LIMIT :limit + 1
+
+so every page costs the same index range scan, no matter how deep it is or
+how many rows exist, and rows added meanwhile never shift a page. The id
+breaks ties between equal timestamps. Cursors are opaque, URL-safe strings.
+"""
+import base64
+from collections import namedtuple
+from datetime import datetime
+
+from django.db.models import Q
+
+PAGE_SIZE = 12
+
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor from a client cannot be decoded"""
+
+
+def encode_cursor(timestamp, pk):
+    raw = f'{timestamp.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(timestamp, pk) encoded in cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, pk = raw.split('|')
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def keyset_page(queryset, field, cursor=None, limit=PAGE_SIZE):
+    """The page of queryset, newest first by field, that follows cursor"""
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'pk__lt': pk}))
+
+    items = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(getattr(items[-1], field), items[-1].pk)
+    return Page(items, next_cursor)
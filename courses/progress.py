@@ -0,0 +1,672 @@
+"""
+Batched progress engine for courses and certifications.
+
+Listing pages (dashboard, my enrollments, certification detail) need the
+progress of many courses and certifications at once. Instead of asking each
+model instance separately, build_progress() answers everything for a user
+from a fixed number of aggregate queries, regardless of how many
+certifications, courses or modules are involved.
+
+Course numbers come from CourseProgressSummary rows, which are kept up to
+date incrementally by ModuleProgress.save() and the Module signals, and can
+be rebuilt in bulk with the rebuild_progress_summaries command.
+"""
+from collections import namedtuple
+
+import logging
+
+from django.db import connection, transaction, IntegrityError
+from django.db.models import Count, Max
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import (
+    Course, Module, ModuleProgress, CertificationEnrollment, CourseProgressSummary
+)
+from .outline import get_course_outline
+
+
+logger = logging.getLogger(__name__)
+
+# A course counts as completed once this percentage of its modules is done
+COURSE_COMPLETION_THRESHOLD = 90
+
+# Module fields the progress endpoints need; skips the potentially large text_content
+PROGRESS_MODULE_FIELDS = ['id', 'course_id', 'module_type', 'video_duration', 'is_active']
+
+# Sent after commit with pairs=[(user_id, course_id), ...] whose summary just
+# crossed COURSE_COMPLETION_THRESHOLD
+courses_completed = Signal()
+
+CourseProgress = namedtuple(
+    'CourseProgress',
+    ['total_modules', 'completed_modules', 'percent', 'is_completed']
+)
+
+CertificationProgress = namedtuple(
+    'CertificationProgress',
+    ['is_enrolled', 'total_courses', 'completed_courses', 'percent', 'is_completed']
+)
+
+ModuleState = namedtuple(
+    'ModuleState',
+    ['is_started', 'is_completed', 'video_watch_time', 'percent']
+)
+
+EMPTY_COURSE_PROGRESS = CourseProgress(0, 0, 0, False)
+NOT_STARTED = ModuleState(False, False, 0, 0)
+EMPTY_CERTIFICATION_PROGRESS = CertificationProgress(False, 0, 0, 0, False)
+
+
+def _pk(obj):
+    """Accept either a model instance or a raw primary key"""
+    return getattr(obj, 'pk', obj)
+
+
+def _is_trackable(user):
+    return user is not None and user.is_authenticated
+
+
+class ProgressReport:
+    """Progress results for one user, keyed by course and certification id"""
+
+    def __init__(self, courses=None, certifications=None):
+        self.courses = courses or {}
+        self.certifications = certifications or {}
+
+    def course(self, course):
+        return self.courses.get(_pk(course), EMPTY_COURSE_PROGRESS)
+
+    def certification(self, certification):
+        return self.certifications.get(_pk(certification), EMPTY_CERTIFICATION_PROGRESS)
+
+
+def course_percent(completed_modules, total_modules):
+    """Percentage of completed modules, 0 for a course without active modules"""
+    if total_modules == 0:
+        return 0
+    return (completed_modules / total_modules) * 100
+
+
+def _active_module_counts(course_ids):
+    """Number of active modules per course id"""
+    return dict(
+        Module.objects.filter(course_id__in=course_ids, is_active=True)
+        .order_by()
+        .values('course_id')
+        .annotate(total=Count('id'))
+        .values_list('course_id', 'total')
+    )
+
+
+def _course_progress(user, course_ids):
+    """Progress for each course id, read from the user's summary rows"""
+    if not course_ids:
+        return {}
+
+    summaries = {}
+    if _is_trackable(user):
+        summaries = {
+            row['course_id']: row
+            for row in CourseProgressSummary.objects.filter(
+                user=user,
+                course_id__in=course_ids
+            ).values('course_id', 'completed_count', 'active_module_count', 'percent')
+        }
+
+    # Courses the user never started only need their module totals
+    missing = set(course_ids) - summaries.keys()
+    totals = _active_module_counts(missing) if missing else {}
+
+    results = {}
+    for course_id in course_ids:
+        summary = summaries.get(course_id)
+        if summary is None:
+            total, done, percent = totals.get(course_id, 0), 0, 0
+        else:
+            total = summary['active_module_count']
+            done = summary['completed_count']
+            percent = summary['percent']
+        results[course_id] = CourseProgress(
+            total_modules=total,
+            completed_modules=done,
+            percent=percent,
+            is_completed=percent >= COURSE_COMPLETION_THRESHOLD,
+        )
+    return results
+
+
+def build_progress(user, certifications=(), courses=()):
+    """
+    Compute progress for the given certifications and courses in bulk.
+
+    Active courses belonging to the certifications are included in the
+    course results automatically, taken from their .active_courses when
+    prefetched (see catalog.py). Uses at most four queries.
+    """
+    certification_ids = {_pk(cert) for cert in certifications}
+    course_ids = {_pk(course) for course in courses}
+
+    # Active courses of every requested certification
+    courses_by_certification = {cert_id: [] for cert_id in certification_ids}
+    unknown_ids = set()
+    for cert in certifications:
+        active_courses = getattr(cert, 'active_courses', None)
+        if active_courses is None:
+            unknown_ids.add(_pk(cert))
+            continue
+        for course in active_courses:
+            courses_by_certification[cert.pk].append(course.pk)
+            course_ids.add(course.pk)
+
+    if unknown_ids:
+        rows = Course.objects.filter(
+            certification_id__in=unknown_ids,
+            is_active=True
+        ).order_by().values_list('id', 'certification_id')
+        for course_id, cert_id in rows:
+            courses_by_certification[cert_id].append(course_id)
+            course_ids.add(course_id)
+
+    enrolled_ids = set()
+    if certification_ids and _is_trackable(user):
+        enrolled_ids = set(
+            CertificationEnrollment.objects.filter(
+                user=user,
+                certification_id__in=certification_ids
+            ).values_list('certification_id', flat=True)
+        )
+
+    course_results = _course_progress(user, course_ids)
+
+    certification_results = {}
+    for cert_id, cert_course_ids in courses_by_certification.items():
+        total = len(cert_course_ids)
+        is_enrolled = cert_id in enrolled_ids
+        if not is_enrolled or total == 0:
+            certification_results[cert_id] = CertificationProgress(
+                is_enrolled=is_enrolled,
+                total_courses=total,
+                completed_courses=0,
+                percent=0,
+                is_completed=False,
+            )
+            continue
+
+        done = sum(1 for course_id in cert_course_ids if course_results[course_id].is_completed)
+        certification_results[cert_id] = CertificationProgress(
+            is_enrolled=True,
+            total_courses=total,
+            completed_courses=done,
+            percent=(done / total) * 100,
+            is_completed=done == total,
+        )
+
+    return ProgressReport(course_results, certification_results)
+
+
+def completed_by_last_module(course_progress):
+    """True when the most recently completed module is the one that completed the course"""
+    previous = course_percent(course_progress.completed_modules - 1, course_progress.total_modules)
+    return course_progress.is_completed and previous < COURSE_COMPLETION_THRESHOLD
+
+
+class CourseProgressMap:
+    """One user's progress in every module of a course, plus the course aggregate"""
+
+    def __init__(self, modules, course):
+        self.modules = modules
+        self.course = course
+
+    def module(self, module):
+        return self.modules.get(_pk(module), NOT_STARTED)
+
+
+def _module_percent(module, is_completed, video_watch_time):
+    """Same rule as ModuleProgress.get_progress_percentage()"""
+    if is_completed:
+        return 100
+    if module.module_type == 'video' and module.video_duration > 0:
+        return min(100, (video_watch_time / module.video_duration) * 100)
+    return 0
+
+
+def build_progress_map(user, course, modules=None):
+    """
+    Progress of user in each active module of course, from a single query.
+
+    modules defaults to the course's cached outline. The course aggregate is
+    derived from the same rows, so it matches CourseProgressSummary.
+    """
+    if modules is None:
+        modules = get_course_outline(_pk(course)).active
+    modules = {module.pk: module for module in modules}
+
+    rows = []
+    if modules and _is_trackable(user):
+        # No ORDER BY, so the (user_id, module_id) index answers it alone
+        rows = ModuleProgress.objects.filter(
+            user=user,
+            module_id__in=modules.keys()
+        ).order_by().values_list('module_id', 'is_completed', 'video_watch_time')
+
+    states = {}
+    for module_id, is_completed, video_watch_time in rows:
+        states[module_id] = ModuleState(
+            is_started=True,
+            is_completed=is_completed,
+            video_watch_time=video_watch_time,
+            percent=_module_percent(modules[module_id], is_completed, video_watch_time),
+        )
+
+    total = len(modules)
+    done = sum(1 for state in states.values() if state.is_completed)
+    percent = course_percent(done, total)
+    return CourseProgressMap(
+        states,
+        CourseProgress(
+            total_modules=total,
+            completed_modules=done,
+            percent=percent,
+            is_completed=percent >= COURSE_COMPLETION_THRESHOLD,
+        )
+    )
+
+
+def progress_version(module_id, is_completed):
+    """ETag-style token that changes only when a module's completion state does"""
+    return f"{module_id}-{'c' if is_completed else 'p'}"
+
+
+# =====================================
+# COURSE PROGRESS SUMMARY MAINTENANCE
+# =====================================
+
+def _apply_counts(summary, completed_count, active_module_count, completed_at=None):
+    """
+    Set the counts on a summary and derive percent and completed_at from them.
+
+    Returns True when this change completed the course.
+    """
+    was_completed = summary.completed_at is not None
+    summary.completed_count = completed_count
+    summary.active_module_count = active_module_count
+    summary.percent = course_percent(completed_count, active_module_count)
+    if summary.percent >= COURSE_COMPLETION_THRESHOLD:
+        if summary.completed_at is None:
+            summary.completed_at = completed_at or timezone.now()
+    else:
+        summary.completed_at = None
+    return not was_completed and summary.completed_at is not None
+
+
+def _send_courses_completed(pairs):
+    for receiver, error in courses_completed.send_robust(sender=CourseProgressSummary, pairs=pairs):
+        if isinstance(error, Exception):
+            logger.error("courses_completed receiver %r failed", receiver, exc_info=error)
+
+
+def _notify_completions(pairs):
+    """Send courses_completed for pairs once the current transaction commits"""
+    pairs = list(pairs)
+    if pairs:
+        transaction.on_commit(lambda: _send_courses_completed(pairs))
+
+
+def _completed_counts(course_ids, user_ids=None):
+    """Completed active modules and latest completion time per (user_id, course_id)"""
+    progress = ModuleProgress.objects.filter(
+        module__course_id__in=course_ids,
+        module__is_active=True,
+        is_completed=True
+    )
+    if user_ids is not None:
+        progress = progress.filter(user_id__in=user_ids)
+
+    rows = progress.order_by().values('user_id', 'module__course_id').annotate(
+        done=Count('id'),
+        last_completed=Max('completed_at'),
+    )
+    return {
+        (row['user_id'], row['module__course_id']): (row['done'], row['last_completed'])
+        for row in rows
+    }
+
+
+def record_progress_change(progress, previous_is_completed):
+    """
+    Update the summary for progress.user in the module's course.
+
+    Called by ModuleProgress.save() inside its transaction. A known completion
+    transition is applied as an increment, and a new row that is not
+    completed leaves an existing summary alone; anything else recalculates
+    the summary for that single (user, course) pair.
+    """
+    module = progress.module
+    summary = CourseProgressSummary.objects.select_for_update().filter(
+        user_id=progress.user_id,
+        course_id=module.course_id
+    ).first()
+
+    if summary is not None and previous_is_completed is not None:
+        if module.is_active and progress.is_completed != previous_is_completed:
+            delta = 1 if progress.is_completed else -1
+            completed = _apply_counts(
+                summary,
+                max(0, summary.completed_count + delta),
+                summary.active_module_count,
+                progress.completed_at
+            )
+            summary.save()
+            if completed:
+                _notify_completions([(progress.user_id, module.course_id)])
+        return summary
+
+    active = _active_module_counts([module.course_id]).get(module.course_id, 0)
+    done, last_completed = _completed_counts(
+        [module.course_id], user_ids=[progress.user_id]
+    ).get((progress.user_id, module.course_id), (0, None))
+
+    if summary is None:
+        summary = CourseProgressSummary(user_id=progress.user_id, course_id=module.course_id)
+    if _apply_counts(summary, done, active, last_completed):
+        _notify_completions([(progress.user_id, module.course_id)])
+    summary.save()
+    return summary
+
+
+def sync_course_summaries(course_ids, user_ids=None):
+    """
+    Recalculate existing summaries for the given courses in bulk.
+
+    Used when modules are created, deactivated, moved or deleted, which
+    changes the counts of every learner in the course. Only existing rows are
+    touched, so this is safe to call while a course or user is being deleted.
+    """
+    course_ids = [course_id for course_id in course_ids if course_id is not None]
+    if not course_ids:
+        return 0
+
+    summaries = CourseProgressSummary.objects.filter(course_id__in=course_ids)
+    if user_ids is not None:
+        summaries = summaries.filter(user_id__in=user_ids)
+    summaries = list(summaries)
+    if not summaries:
+        return 0
+
+    totals = _active_module_counts(course_ids)
+    completed = _completed_counts(course_ids, user_ids=user_ids)
+
+    changed, newly_completed = [], []
+    for summary in summaries:
+        done, last_completed = completed.get((summary.user_id, summary.course_id), (0, None))
+        before = (summary.completed_count, summary.active_module_count, summary.completed_at)
+        if _apply_counts(summary, done, totals.get(summary.course_id, 0), last_completed):
+            newly_completed.append((summary.user_id, summary.course_id))
+        if before != (summary.completed_count, summary.active_module_count, summary.completed_at):
+            changed.append(summary)
+
+    CourseProgressSummary.objects.bulk_update(
+        changed,
+        ['completed_count', 'active_module_count', 'percent', 'completed_at'],
+        batch_size=500
+    )
+    _notify_completions(newly_completed)
+    return len(changed)
+
+
+def refresh_user_summaries(user_id, course_ids):
+    """
+    Recalculate one user's summaries for the given courses, creating missing rows.
+
+    Used after bulk writes to ModuleProgress, which bypass save().
+    """
+    course_ids = set(course_ids)
+    if not course_ids:
+        return
+
+    totals = _active_module_counts(course_ids)
+    completed = _completed_counts(course_ids, user_ids=[user_id])
+    existing = {
+        summary.course_id: summary
+        for summary in CourseProgressSummary.objects.select_for_update().filter(
+            user_id=user_id,
+            course_id__in=course_ids
+        )
+    }
+
+    to_create, to_update, newly_completed = [], [], []
+    for course_id in course_ids:
+        done, last_completed = completed.get((user_id, course_id), (0, None))
+        summary = existing.get(course_id)
+        if summary is None:
+            summary = CourseProgressSummary(user_id=user_id, course_id=course_id)
+            to_create.append(summary)
+        else:
+            to_update.append(summary)
+        if _apply_counts(summary, done, totals.get(course_id, 0), last_completed):
+            newly_completed.append((user_id, course_id))
+
+    CourseProgressSummary.objects.bulk_create(to_create)
+    CourseProgressSummary.objects.bulk_update(
+        to_update,
+        ['completed_count', 'active_module_count', 'percent', 'completed_at']
+    )
+    _notify_completions(newly_completed)
+
+
+def create_missing_summaries(pairs):
+    """
+    Create the summaries missing for (user_id, course_id) pairs.
+
+    Used after bulk inserts of ModuleProgress rows, which bypass save();
+    existing summaries are left alone.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return
+    user_ids = {user_id for user_id, _ in pairs}
+    course_ids = {course_id for _, course_id in pairs}
+    missing = pairs - set(
+        CourseProgressSummary.objects.filter(
+            user_id__in=user_ids,
+            course_id__in=course_ids
+        ).values_list('user_id', 'course_id')
+    )
+    if not missing:
+        return
+
+    totals = _active_module_counts(course_ids)
+    completed = _completed_counts(course_ids, user_ids=user_ids)
+    to_create, newly_completed = [], []
+    for user_id, course_id in missing:
+        summary = CourseProgressSummary(user_id=user_id, course_id=course_id)
+        done, last_completed = completed.get((user_id, course_id), (0, None))
+        if _apply_counts(summary, done, totals.get(course_id, 0), last_completed):
+            newly_completed.append((user_id, course_id))
+        to_create.append(summary)
+
+    # A concurrent save() may have created some of them meanwhile
+    CourseProgressSummary.objects.bulk_create(to_create, ignore_conflicts=True)
+    _notify_completions(newly_completed)
+
+
+def rebuild_summaries(batch_size=1000, dry_run=False):
+    """
+    Rebuild every CourseProgressSummary from ModuleProgress in bulk.
+
+    Returns a dict with the number of rows created, updated and deleted. With
+    dry_run the table is left untouched and the counts describe what a
+    rebuild would change, which doubles as a consistency check. No
+    courses_completed signals are sent; run generate_certificates afterwards.
+    """
+    # Every (user, course) pair with at least one progress row gets a summary
+    pairs = set(
+        ModuleProgress.objects.order_by()
+        .values_list('user_id', 'module__course_id')
+        .distinct()
+    )
+    course_ids = {course_id for _, course_id in pairs}
+    totals = _active_module_counts(course_ids)
+    completed = _completed_counts(course_ids)
+
+    existing = {
+        (summary.user_id, summary.course_id): summary
+        for summary in CourseProgressSummary.objects.all().iterator(chunk_size=batch_size)
+    }
+
+    to_create, to_update = [], []
+    for user_id, course_id in pairs:
+        done, last_completed = completed.get((user_id, course_id), (0, None))
+        summary = existing.pop((user_id, course_id), None)
+        if summary is None:
+            summary = CourseProgressSummary(user_id=user_id, course_id=course_id)
+            _apply_counts(summary, done, totals.get(course_id, 0), last_completed)
+            to_create.append(summary)
+            continue
+
+        before = (summary.completed_count, summary.active_module_count, summary.percent)
+        had_completed_at = summary.completed_at is not None
+        _apply_counts(summary, done, totals.get(course_id, 0), last_completed)
+        after = (summary.completed_count, summary.active_module_count, summary.percent)
+        if before != after or had_completed_at != (summary.completed_at is not None):
+            to_update.append(summary)
+
+    # Leftover rows have no progress behind them any more
+    stale_ids = [summary.pk for summary in existing.values()]
+
+    if not dry_run:
+        CourseProgressSummary.objects.bulk_create(to_create, batch_size=batch_size)
+        CourseProgressSummary.objects.bulk_update(
+            to_update,
+            ['completed_count', 'active_module_count', 'percent', 'completed_at'],
+            batch_size=batch_size
+        )
+        for start in range(0, len(stale_ids), batch_size):
+            CourseProgressSummary.objects.filter(
+                pk__in=stale_ids[start:start + batch_size]
+            ).delete()
+
+    return {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'deleted': len(stale_ids),
+    }
+
+
+# =====================================
+# VIDEO HEARTBEATS
+# =====================================
+
+def _heartbeat_update_sql(can_complete):
+    """Conditional UPDATE ... RETURNING that never moves watch time backwards"""
+    greatest = 'MAX' if connection.vendor == 'sqlite' else 'GREATEST'
+    table = ModuleProgress._meta.db_table
+    watched = f"{greatest}(video_watch_time, %(watch_time)s)"
+
+    assignments = [f"video_watch_time = {watched}", "last_accessed = %(now)s"]
+    just_completed = "FALSE"
+    if can_complete:
+        # Column references on the right-hand side see the values before the update
+        reached = f"{watched} >= %(threshold)s"
+        assignments += [
+            f"is_completed = (is_completed OR {reached})",
+            f"completed_at = CASE WHEN NOT is_completed AND {reached} THEN %(now)s ELSE completed_at END",
+        ]
+        # Only a row completed by this very statement carries this exact timestamp
+        just_completed = "(completed_at IS NOT NULL AND completed_at = %(now)s)"
+
+    return (
+        f"UPDATE {table} SET {', '.join(assignments)} "
+        "WHERE user_id = %(user_id)s AND module_id = %(module_id)s "
+        "RETURNING id, user_id, module_id, is_completed, video_watch_time, "
+        f"completed_at, started_at, last_accessed, {just_completed} AS just_completed"
+    )
+
+
+def _run_heartbeat_update(sql, params):
+    rows = list(ModuleProgress.objects.raw(sql, params))
+    return rows[0] if rows else None
+
+
+def watch_time_update(user, module, watch_time):
+    """
+    Raw queryset running the UPDATE ... RETURNING of a heartbeat that cannot
+    complete module. Yields the stored row after the update, or nothing when
+    there is none; iterate it with `async for` from async code. Only for
+    databases with UPDATE ... RETURNING.
+    """
+    params = {
+        'watch_time': watch_time,
+        'now': connection.ops.adapt_datetimefield_value(timezone.now()),
+        'user_id': user.pk,
+        'module_id': module.pk,
+    }
+    return ModuleProgress.objects.raw(_heartbeat_update_sql(can_complete=False), params)
+
+
+def apply_video_heartbeat(user, module, watch_time):
+    """
+    Apply a video heartbeat for user on module in a single statement.
+
+    The row is updated with one atomic UPDATE ... RETURNING guarded by the
+    module's completion threshold, so out-of-order heartbeats never lower the
+    stored watch time and the caller gets the post-update state without a
+    second query. A missing row is inserted instead. Databases without
+    UPDATE ... RETURNING use a locked read-modify-write.
+
+    Returns (progress, just_completed).
+    """
+    now = timezone.now()
+    can_complete = module.module_type == 'video' and module.video_duration > 0
+    threshold = module.video_duration * module.get_completion_threshold() if can_complete else None
+
+    if not connection.features.can_return_columns_from_insert:
+        return _apply_video_heartbeat_locked(user, module, watch_time, threshold, now)
+
+    sql = _heartbeat_update_sql(can_complete)
+    params = {
+        'watch_time': watch_time,
+        'threshold': threshold,
+        'now': connection.ops.adapt_datetimefield_value(now),
+        'user_id': user.pk,
+        'module_id': module.pk,
+    }
+
+    with transaction.atomic():
+        progress = _run_heartbeat_update(sql, params)
+        if progress is None:
+            try:
+                with transaction.atomic():
+                    progress = ModuleProgress(user=user, module=module, video_watch_time=watch_time)
+                    if can_complete and watch_time >= threshold:
+                        progress.is_completed = True
+                        progress.completed_at = now
+                    progress.save()
+                return progress, progress.is_completed
+            except IntegrityError:
+                # A concurrent heartbeat inserted the row first
+                progress = _run_heartbeat_update(sql, params)
+
+        progress.module = module
+        just_completed = bool(progress.just_completed)
+        if just_completed:
+            record_progress_change(progress, False)
+
+    return progress, just_completed
+
+
+def _apply_video_heartbeat_locked(user, module, watch_time, threshold, now):
+    with transaction.atomic():
+        progress, created = ModuleProgress.objects.select_for_update().get_or_create(
+            user=user,
+            module=module
+        )
+        progress.module = module
+        was_completed = progress.is_completed
+        progress.video_watch_time = max(progress.video_watch_time, watch_time)
+        if threshold is not None and progress.video_watch_time >= threshold and not was_completed:
+            progress.is_completed = True
+            progress.completed_at = now
+        progress.save()
+    return progress, progress.is_completed and not was_completed
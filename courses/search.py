@@ -0,0 +1,275 @@
+"""
+Full-text search over certifications, courses and modules.
+
+Each certification, course and module has one SearchEntry row with the text
+learners can search for (its title, the title of its certification or
+course, and its description or lesson text) and whether it is visible. The
+signal handlers in signals.py rewrite the affected rows whenever one of
+those objects is saved or deleted; rebuild_index() (the
+rebuild_search_index command) rewrites all of them.
+
+Matching and ranking run on the database's own full-text index, created by
+migration 0009_search_index:
+
+    PostgreSQL  search_entries.document, a generated tsvector column with a GIN index
+    SQLite      search_entries_fts, an FTS5 table kept in step by triggers
+
+Both match the words of the query with stemming, and its last word (which
+may still be being typed) as a prefix. A first pass finds the entries whose
+title contains every word, a second one the remaining matches; each pass
+ranks every match and keeps the best `limit` with a single ORDER BY ...
+LIMIT, which the database runs as a top-N sort. On any other database, or
+SQLite built without FTS5, search falls back to unindexed icontains matching.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.urls import reverse
+from django.utils.html import strip_tags
+
+from .models import ProfessionalCertification, Course, Module, SearchEntry
+
+DEFAULT_LIMIT = 20
+MAX_RESULTS = 50
+MAX_QUERY_LENGTH = 200
+MAX_TERMS = 10
+
+# Keeps huge lessons within PostgreSQL's 1 MB tsvector limit
+MAX_BODY_LENGTH = 100000
+
+SNIPPET_LENGTH = 160
+
+DETAIL_URLS = {
+    SearchEntry.KIND_CERTIFICATION: 'certification_detail',
+    SearchEntry.KIND_COURSE: 'course_detail',
+    SearchEntry.KIND_MODULE: 'module_view',
+}
+
+SearchHit = namedtuple('SearchHit', ['kind', 'object_id', 'title', 'context', 'snippet', 'url'])
+
+_fts5_tables = {}
+
+
+# =====================================
+# INDEXING
+# =====================================
+
+def _certification_entry(certification):
+    return SearchEntry(
+        kind=SearchEntry.KIND_CERTIFICATION,
+        object_id=certification.pk,
+        title=certification.title,
+        body=certification.description[:MAX_BODY_LENGTH],
+        is_active=certification.is_active,
+    )
+
+
+def _course_entry(course):
+    return SearchEntry(
+        kind=SearchEntry.KIND_COURSE,
+        object_id=course.pk,
+        title=course.title,
+        context=course.certification.title if course.certification else '',
+        body=course.description[:MAX_BODY_LENGTH],
+        is_active=course.is_active,
+    )
+
+
+def _module_entry(module):
+    return SearchEntry(
+        kind=SearchEntry.KIND_MODULE,
+        object_id=module.pk,
+        title=module.title,
+        context=module.course.title,
+        body=strip_tags(module.text_content or '')[:MAX_BODY_LENGTH],
+        is_active=module.is_active and module.course.is_active,
+    )
+
+
+INDEXED = {
+    SearchEntry.KIND_CERTIFICATION: (ProfessionalCertification.objects.all, _certification_entry),
+    SearchEntry.KIND_COURSE: (lambda: Course.objects.select_related('certification'), _course_entry),
+    SearchEntry.KIND_MODULE: (lambda: Module.objects.select_related('course'), _module_entry),
+}
+
+
+def _write(entries, batch_size=500):
+    SearchEntry.objects.bulk_create(
+        entries,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['title', 'context', 'body', 'is_active', 'updated_at'],
+    )
+
+
+def index_objects(kind, object_ids):
+    """Rewrite the entries of the given certifications, courses or modules; drop deleted ones"""
+    object_ids = set(object_ids)
+    if not object_ids:
+        return
+    queryset, build = INDEXED[kind]
+    entries = [build(obj) for obj in queryset().filter(pk__in=object_ids)]
+    _write(entries)
+    remove_entries(kind, object_ids - {entry.object_id for entry in entries})
+
+
+def remove_entries(kind, object_ids):
+    if object_ids:
+        SearchEntry.objects.filter(kind=kind, object_id__in=object_ids).delete()
+
+
+def rebuild_index(batch_size=500):
+    """Rewrite every entry and drop those of deleted objects; returns entries written per kind"""
+    written = {}
+    for kind, (queryset, build) in INDEXED.items():
+        seen, entries = set(), []
+        for obj in queryset().order_by('pk').iterator(chunk_size=batch_size):
+            entries.append(build(obj))
+            seen.add(obj.pk)
+            if len(entries) >= batch_size:
+                _write(entries, batch_size)
+                entries = []
+        _write(entries, batch_size)
+        SearchEntry.objects.filter(kind=kind).exclude(object_id__in=seen).delete()
+        written[kind] = len(seen)
+    return written
+
+
+# =====================================
+# QUERYING
+# =====================================
+
+def _terms(query):
+    """Lowercased words of a query; everything else, including query syntax, is dropped"""
+    return re.findall(r'[^\W_]+', query[:MAX_QUERY_LENGTH].lower())[:MAX_TERMS]
+
+
+def _prefix_markers(terms, prefix, exact):
+    """(term, marker) pairs; only the last word, which may still be being typed, is a prefix"""
+    return [(term, exact) for term in terms[:-1]] + [(terms[-1], prefix)]
+
+
+def _has_fts5_table():
+    name = connection.settings_dict['NAME']
+    if name not in _fts5_tables:
+        _fts5_tables[name] = 'search_entries_fts' in connection.introspection.table_names()
+    return _fts5_tables[name]
+
+
+def _filters(alias, include_inactive, kinds):
+    sql, params = [], []
+    if not include_inactive:
+        sql.append(f'{alias}is_active')
+    if kinds:
+        sql.append(f"{alias}kind IN ({', '.join(['%s'] * len(kinds))})")
+        params.extend(kinds)
+    return ''.join(f' AND {clause}' for clause in sql), params
+
+
+def _postgresql_ids(terms, limit, include_inactive, kinds, title_only):
+    filters, params = _filters('', include_inactive, kinds)
+    weight = 'A' if title_only else ''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT id FROM search_entries, to_tsquery('english', %s) query "
+            f"WHERE document @@ query{filters} ORDER BY ts_rank(document, query) DESC, id LIMIT %s",
+            [' & '.join(f'{term}{marker}{weight}' for term, marker in _prefix_markers(terms, ':*', ':')),
+             *params, limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _sqlite_ids(terms, limit, include_inactive, kinds, title_only):
+    filters, params = _filters('e.', include_inactive, kinds)
+    match = ' '.join(f'"{term}"{marker}' for term, marker in _prefix_markers(terms, '*', ''))
+    if title_only:
+        match = f'{{title}} : ({match})'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT e.id FROM search_entries_fts "
+            "JOIN search_entries e ON e.id = search_entries_fts.rowid "
+            f"WHERE search_entries_fts MATCH %s{filters} "
+            "ORDER BY bm25(search_entries_fts, 10.0, 2.0, 1.0), e.id LIMIT %s",
+            [match, *params, limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fallback_ids(terms, limit, include_inactive, kinds):
+    entries = SearchEntry.objects.all()
+    if not include_inactive:
+        entries = entries.filter(is_active=True)
+    if kinds:
+        entries = entries.filter(kind__in=kinds)
+    for term in terms:
+        entries = entries.filter(
+            Q(title__icontains=term) | Q(context__icontains=term) | Q(body__icontains=term)
+        )
+    title_matches = Q()
+    for term in terms:
+        title_matches &= Q(title__icontains=term)
+    return list(
+        entries.annotate(
+            title_rank=Case(When(title_matches, then=Value(0)), default=Value(1), output_field=IntegerField())
+        ).order_by('title_rank', 'pk').values_list('pk', flat=True)[:limit]
+    )
+
+
+def search_entry_ids(query, limit=DEFAULT_LIMIT, include_inactive=False, kinds=None):
+    """Ids of the SearchEntry rows matching every word of query, title matches first, best first"""
+    terms = _terms(query)
+    if not terms:
+        return []
+    if connection.vendor == 'postgresql':
+        find = _postgresql_ids
+    elif connection.vendor == 'sqlite' and _has_fts5_table():
+        find = _sqlite_ids
+    else:
+        return _fallback_ids(terms, limit, include_inactive, kinds)
+
+    ids = find(terms, limit, include_inactive, kinds, title_only=True)
+    if len(ids) < limit:
+        seen = set(ids)
+        others = find(terms, limit + len(ids), include_inactive, kinds, title_only=False)
+        ids += [pk for pk in others if pk not in seen][:limit - len(ids)]
+    return ids
+
+
+def search_object_ids(query, kind, limit=1000):
+    """Ids of the certifications, courses or modules of one kind matching query, active or not"""
+    ids = search_entry_ids(query, limit=limit, include_inactive=True, kinds=[kind])
+    return list(SearchEntry.objects.filter(pk__in=ids).values_list('object_id', flat=True))
+
+
+def _snippet(body, terms):
+    """About SNIPPET_LENGTH characters of body around the first matched word"""
+    lowered = body.lower()
+    positions = [position for position in (lowered.find(term) for term in terms) if position >= 0]
+    start = max(0, min(positions) - SNIPPET_LENGTH // 4) if positions else 0
+    snippet = body[start:start + SNIPPET_LENGTH].strip()
+    if start > 0:
+        snippet = '…' + snippet
+    if start + SNIPPET_LENGTH < len(body):
+        snippet += '…'
+    return snippet
+
+
+def search_catalog(query, limit=DEFAULT_LIMIT):
+    """SearchHit for each visible certification, course and module matching query, best first"""
+    ids = search_entry_ids(query, limit=min(limit, MAX_RESULTS))
+    entries = SearchEntry.objects.in_bulk(ids)
+    terms = _terms(query)
+    return [
+        SearchHit(
+            kind=entry.kind,
+            object_id=entry.object_id,
+            title=entry.title,
+            context=entry.context,
+            snippet=_snippet(entry.body, terms),
+            url=reverse(DETAIL_URLS[entry.kind], args=[entry.object_id]),
+        )
+        for entry in (entries[pk] for pk in ids if pk in entries)
+    ]
@@ -0,0 +1,151 @@
+"""
+Signal handlers that keep CourseProgressSummary rows in step with module changes.
+
+Creating, deactivating, moving or deleting a module changes the module counts
+of every learner in the course, so the affected summaries are recalculated in
+bulk, and the course's cached module outline is dropped. Completion changes
+are handled by ModuleProgress.save() itself.
+
+Whenever a summary crosses the completion threshold, courses_completed issues
+the learner's course certificate and any professional certificate it earns.
+Cached verification results are dropped when a certificate is issued or
+deleted, or when its holder's name changes. Saving or deleting a
+certification or course, from the instructor views or the admin, bumps the
+catalogue versions so every worker rebuilds its cached listings; group
+member changes likewise drop the cached anonymous home page. The search
+entries of saved or deleted certifications, courses and modules, and of
+everything below them that shows their title or visibility, are rewritten.
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .catalog import bump_catalog_versions
+from .issuance import issue_completion_certificates
+from .models import (
+    User, GroupMember, ProfessionalCertification, Course, Module, ModuleProgress, CourseProgressSummary,
+    CourseCertificate, ProfessionalCertificationCertificate, SearchEntry
+)
+from .outline import invalidate_course_outlines
+from .pagecache import bump_group_members_version
+from .progress import sync_course_summaries, courses_completed
+from .search import index_objects, remove_entries
+from .verification import invalidate_certificates, invalidate_user_certificates
+
+GROUP_MEMBER_USER_FIELDS = {'first_name', 'last_name', 'username', 'profile_picture'}
+
+
+def _deleted_directly(origin, model):
+    """Whether a delete started from model's own rows rather than cascading from another model"""
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return origin is None or isinstance(origin, model)
+
+
+@receiver(post_save, sender=ProfessionalCertification)
+@receiver(post_delete, sender=ProfessionalCertification)
+def certification_changed(sender, instance, **kwargs):
+    bump_catalog_versions([instance.pk])
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, **kwargs):
+    bump_catalog_versions([instance.certification_id, getattr(instance, '_saved_certification_id', None)])
+    instance._saved_certification_id = instance.certification_id
+
+
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    bump_catalog_versions([instance.certification_id])
+
+
+@receiver(post_save, sender=Module)
+def module_saved(sender, instance, **kwargs):
+    course_ids = {instance.course_id, getattr(instance, '_saved_course_id', None)}
+    sync_course_summaries(course_ids)
+    invalidate_course_outlines(course_ids)
+    instance._saved_course_id = instance.course_id
+
+
+@receiver(post_delete, sender=Module)
+def module_deleted(sender, instance, **kwargs):
+    sync_course_summaries([instance.course_id])
+    invalidate_course_outlines([instance.course_id])
+
+
+@receiver(post_delete, sender=ModuleProgress)
+def module_progress_deleted(sender, instance, origin=None, **kwargs):
+    # Rows deleted along with their module, course or user are covered by
+    # module_deleted or go with the summaries themselves
+    if not instance.is_completed or not _deleted_directly(origin, ModuleProgress):
+        return
+    course_id = Module.objects.filter(pk=instance.module_id).values_list('course_id', flat=True).first()
+    if course_id is not None:
+        sync_course_summaries([course_id], user_ids=[instance.user_id])
+
+
+@receiver(courses_completed, sender=CourseProgressSummary)
+def issue_certificates_on_completion(sender, pairs, **kwargs):
+    issue_completion_certificates(pairs)
+
+
+@receiver(post_save, sender=CourseCertificate)
+@receiver(post_delete, sender=CourseCertificate)
+@receiver(post_save, sender=ProfessionalCertificationCertificate)
+@receiver(post_delete, sender=ProfessionalCertificationCertificate)
+def certificate_changed(sender, instance, **kwargs):
+    invalidate_certificates([instance.certificate_id])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Verification results show the holder's name; logins only touch last_login
+    if created or (update_fields is not None and not {'first_name', 'last_name', 'username'} & set(update_fields)):
+        return
+    invalidate_user_certificates(instance.pk)
+
+
+@receiver(post_save, sender=GroupMember)
+@receiver(post_delete, sender=GroupMember)
+def group_member_changed(sender, instance, **kwargs):
+    bump_group_members_version()
+
+
+@receiver(post_save, sender=User)
+def group_member_user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # The home page shows each member's name and profile picture
+    if created or (update_fields is not None and not GROUP_MEMBER_USER_FIELDS & set(update_fields)):
+        return
+    if GroupMember.objects.filter(user=instance).exists():
+        bump_group_members_version()
+
+
+@receiver(post_save, sender=ProfessionalCertification)
+def index_certification(sender, instance, **kwargs):
+    index_objects(SearchEntry.KIND_CERTIFICATION, [instance.pk])
+    # Course entries show their certification's title
+    index_objects(SearchEntry.KIND_COURSE, instance.courses.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, **kwargs):
+    index_objects(SearchEntry.KIND_COURSE, [instance.pk])
+    # Module entries show their course's title and are hidden with it
+    index_objects(SearchEntry.KIND_MODULE, instance.modules.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Module)
+def index_module(sender, instance, **kwargs):
+    index_objects(SearchEntry.KIND_MODULE, [instance.pk])
+
+
+@receiver(post_delete, sender=ProfessionalCertification)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Module)
+def remove_search_entry(sender, instance, **kwargs):
+    kind = {
+        ProfessionalCertification: SearchEntry.KIND_CERTIFICATION,
+        Course: SearchEntry.KIND_COURSE,
+        Module: SearchEntry.KIND_MODULE,
+    }[sender]
+    remove_entries(kind, [instance.pk])
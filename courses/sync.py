@@ -0,0 +1,202 @@
+"""
+Batch progress sync.
+
+Clients that queue progress while offline (mobile apps, the module player on
+a bad connection) send every queued event in one POST. Each event names a
+module, a kind and a client-generated idempotency key:
+
+    [
+        {"key": "a1", "module": 12, "kind": "video_time", "watch_time": 340},
+        {"key": "a2", "module": 13, "kind": "mark_read"}
+    ]
+
+All modules are validated with one query, the events are applied with bulk
+writes in one transaction, and keys that were already applied are skipped,
+so replaying a batch is a cheap no-op.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Module, ModuleProgress, ProcessedProgressEvent
+from .progress import build_progress, refresh_user_summaries, PROGRESS_MODULE_FIELDS
+
+KIND_VIDEO_TIME = 'video_time'
+KIND_MARK_READ = 'mark_read'
+
+# Module types each event kind applies to
+EVENT_MODULE_TYPES = {
+    KIND_VIDEO_TIME: {'video'},
+    KIND_MARK_READ: {'text', 'picture', 'text_picture'},
+}
+
+MAX_EVENTS_PER_BATCH = 200
+MAX_KEY_LENGTH = ProcessedProgressEvent._meta.get_field('key').max_length
+
+
+class InvalidEvent(ValueError):
+    """Raised when a single event in a batch is malformed"""
+
+
+def parse_event(raw):
+    """Validate the shape of one event and return (key, module_id, kind, watch_time)"""
+    if not isinstance(raw, dict):
+        raise InvalidEvent('Event must be an object')
+
+    key = raw.get('key')
+    if not isinstance(key, str) or not key or len(key) > MAX_KEY_LENGTH:
+        raise InvalidEvent(f'Event key must be a string of 1-{MAX_KEY_LENGTH} characters')
+
+    kind = raw.get('kind')
+    if kind not in EVENT_MODULE_TYPES:
+        raise InvalidEvent(f'Unknown event kind: {kind}')
+
+    module_id = raw.get('module')
+    if not isinstance(module_id, int) or isinstance(module_id, bool):
+        raise InvalidEvent('Event module must be an integer id')
+
+    watch_time = 0
+    if kind == KIND_VIDEO_TIME:
+        watch_time = raw.get('watch_time')
+        if not isinstance(watch_time, int) or isinstance(watch_time, bool) or watch_time < 0:
+            raise InvalidEvent('watch_time must be a non-negative integer')
+
+    return key, module_id, kind, watch_time
+
+
+def _module_state(progress, module):
+    return {
+        'is_completed': progress.is_completed,
+        'video_watch_time': progress.video_watch_time,
+        'progress_percentage': progress.get_progress_percentage(),
+        'course': module.course_id,
+    }
+
+
+def _locked_progress_rows(user, module_ids):
+    """{module id: ModuleProgress} of user's existing rows, locked for update"""
+    return {
+        row.module_id: row
+        for row in ModuleProgress.objects.select_for_update().filter(user=user, module_id__in=module_ids)
+    }
+
+
+def apply_progress_events(user, raw_events):
+    """
+    Apply a batch of progress events for user.
+
+    Returns a dict with a per-event status list plus the resulting state of
+    every module and course the batch touched.
+    """
+    results = []
+    parsed = []
+    seen_keys = set()
+    for raw in raw_events:
+        try:
+            key, module_id, kind, watch_time = parse_event(raw)
+        except InvalidEvent as exc:
+            key = raw.get('key') if isinstance(raw, dict) else None
+            results.append({'key': key, 'status': 'error', 'error': str(exc)})
+            continue
+        if key in seen_keys:
+            results.append({'key': key, 'status': 'duplicate'})
+            continue
+        seen_keys.add(key)
+        parsed.append((key, module_id, kind, watch_time))
+        results.append(None)  # filled in below
+
+    modules = Module.objects.filter(
+        pk__in={module_id for _, module_id, _, _ in parsed},
+        is_active=True
+    ).only(*PROGRESS_MODULE_FIELDS).in_bulk()
+
+    now = timezone.now()
+    with transaction.atomic():
+        applied_keys = set(
+            ProcessedProgressEvent.objects.filter(
+                user=user,
+                key__in=seen_keys
+            ).values_list('key', flat=True)
+        )
+
+        # Rows for modules an event will be applied to. Missing ones are
+        # inserted first, ignoring rows a concurrent sync inserted meanwhile,
+        # so that every row is then updated under the lock
+        wanted = {
+            module_id for key, module_id, kind, _ in parsed
+            if module_id in modules and key not in applied_keys
+            and modules[module_id].module_type in EVENT_MODULE_TYPES[kind]
+        }
+        progress_rows = _locked_progress_rows(user, modules.keys())
+        missing = wanted - progress_rows.keys()
+        if missing:
+            ModuleProgress.objects.bulk_create(
+                [ModuleProgress(user=user, module_id=module_id) for module_id in missing],
+                ignore_conflicts=True
+            )
+            progress_rows.update(_locked_progress_rows(user, missing))
+
+        statuses = []
+        new_keys = []
+        changed = {}
+        for key, module_id, kind, watch_time in parsed:
+            module = modules.get(module_id)
+            if module is None:
+                statuses.append({'key': key, 'status': 'error', 'error': 'Module not found'})
+                continue
+            if module.module_type not in EVENT_MODULE_TYPES[kind]:
+                statuses.append({'key': key, 'status': 'error', 'error': 'Invalid module type'})
+                continue
+            if key in applied_keys:
+                statuses.append({'key': key, 'status': 'duplicate'})
+                continue
+
+            progress = changed[module_id] = progress_rows[module_id]
+            progress.module = module
+
+            if kind == KIND_VIDEO_TIME:
+                progress.video_watch_time = max(progress.video_watch_time, watch_time)
+                threshold = module.video_duration * module.get_completion_threshold()
+                reached = module.video_duration > 0 and progress.video_watch_time >= threshold
+            else:
+                reached = True
+
+            if reached and not progress.is_completed:
+                progress.is_completed = True
+                progress.completed_at = now
+            progress.last_accessed = now
+
+            new_keys.append(ProcessedProgressEvent(user=user, key=key))
+            statuses.append({'key': key, 'status': 'applied'})
+
+        ModuleProgress.objects.bulk_update(
+            changed.values(),
+            ['video_watch_time', 'is_completed', 'completed_at', 'last_accessed']
+        )
+        ProcessedProgressEvent.objects.bulk_create(new_keys, ignore_conflicts=True)
+
+        touched_courses = {progress.module.course_id for progress in changed.values()}
+        refresh_user_summaries(user.pk, touched_courses)
+
+    # Merge per-event statuses back in request order
+    statuses = iter(statuses)
+    results = [result if result is not None else next(statuses) for result in results]
+
+    module_ids = {module_id for _, module_id, _, _ in parsed if module_id in modules}
+    course_ids = {modules[module_id].course_id for module_id in module_ids}
+    report = build_progress(user, courses=course_ids)
+
+    return {
+        'results': results,
+        'modules': {
+            module_id: _module_state(progress_rows[module_id], modules[module_id])
+            for module_id in module_ids
+            if module_id in progress_rows
+        },
+        'courses': {
+            course_id: {
+                'progress': report.course(course_id).percent,
+                'is_completed': report.course(course_id).is_completed,
+            }
+            for course_id in course_ids
+        },
+    }
@@ -1,3 +1,1542 @@
-from django.test import TestCase
+import gc
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache, caches
+from django.db import connection, transaction
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from learning_platform import sessions, timing
+
+from .access import AccessBuffer, get_access_buffer
+from .analytics import course_analytics, refresh_rollups, watermark_lag
+from .catalog import certification_page
+from .issuance import (
+    KIND_COURSE, KIND_PROFESSIONAL, certificates_issued, issue_completion_certificates, issue_missing_certificates
+)
+from .models import (
+    User, GroupMember, ProfessionalCertification, Course, Module, ModuleProgress,
+    CourseCertificate, ProfessionalCertificationCertificate, CertificationEnrollment,
+    CourseDailyStats, ModuleDailyStats, SearchEntry, CourseProgressSummary
+)
+from .outline import get_course_outline
+from .pagination import PAGE_SIZE, InvalidCursor, encode_cursor, keyset_page
+from .progress import NOT_STARTED, rebuild_summaries
+from .search import rebuild_index, search_catalog
+from .verification import verify_certificate
+from . import async_views, buffers, heartbeats, issuance, sync
+
+
+def worker(name):
+    """Settings giving this process the per-process cache of another worker"""
+    return override_settings(CACHES={
+        **settings.CACHES,
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': name},
+    })
+
+
+async def async_post(view, user, url_name, pk, data=None):
+    """Response of an async progress view to a POST from user"""
+    async def auser():
+        return user
+
+    request = AsyncRequestFactory().post(reverse(url_name, args=[pk]), data or {})
+    request.user, request.auser = user, auser
+    return await view(request, pk=pk)
+
+
+class CourseProgressMapTests(TestCase):
+    """Course.progress_map_for() and the course_detail view built on it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='learner', password='learner-pass-123')
+        cls.certification = ProfessionalCertification.objects.create(
+            title='Data Engineering',
+            description='Pipelines and warehouses'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def make_course(self, module_count, completed=0):
+        course = Course.objects.create(
+            certification=self.certification,
+            title=f'Course with {module_count} modules',
+            description='Test course'
+        )
+        modules = [
+            Module.objects.create(course=course, title=f'Module {i}', module_type='text', order=i)
+            for i in range(module_count)
+        ]
+        for module in modules[:completed]:
+            ModuleProgress.objects.create(user=self.user, module=module, is_completed=True)
+        return course, modules
+
+    def test_states_and_aggregate(self):
+        course, modules = self.make_course(3, completed=2)
+        video = Module.objects.create(
+            course=course, title='Video', module_type='video', order=10, video_duration=200
+        )
+        ModuleProgress.objects.create(user=self.user, module=video, video_watch_time=50)
+
+        progress_map = course.progress_map_for(self.user)
+
+        self.assertTrue(progress_map.module(modules[0]).is_completed)
+        self.assertEqual(progress_map.module(modules[0]).percent, 100)
+        self.assertEqual(progress_map.module(modules[2]), NOT_STARTED)
+        self.assertTrue(progress_map.module(video).is_started)
+        self.assertFalse(progress_map.module(video).is_completed)
+        self.assertEqual(progress_map.module(video).percent, 25)
+        self.assertEqual(progress_map.course.total_modules, 4)
+        self.assertEqual(progress_map.course.completed_modules, 2)
+        self.assertEqual(progress_map.course.percent, 50)
+        self.assertFalse(progress_map.course.is_completed)
+
+    def test_aggregate_matches_summary(self):
+        course, modules = self.make_course(10, completed=9)
+        self.assertEqual(course.progress_map_for(self.user).course.percent, course.get_user_progress(self.user))
+        self.assertTrue(course.progress_map_for(self.user).course.is_completed)
+
+    def test_one_query_regardless_of_module_count(self):
+        for module_count in (3, 60):
+            course, modules = self.make_course(module_count, completed=module_count // 2)
+            get_course_outline(course.pk)  # warm the outline cache
+
+            with self.assertNumQueries(2):  # the shared outline version and the progress rows
+                progress_map = course.progress_map_for(self.user)
+            self.assertEqual(progress_map.course.completed_modules, module_count // 2)
+
+    def test_anonymous_user_needs_no_progress_queries(self):
+        course, modules = self.make_course(3)
+        get_course_outline(course.pk)
+
+        with self.assertNumQueries(1):  # the shared outline version
+            progress_map = course.progress_map_for(AnonymousUser())
+        self.assertEqual(progress_map.module(modules[0]), NOT_STARTED)
+        self.assertEqual(progress_map.course.percent, 0)
+
+    def test_course_detail_query_count_is_constant(self):
+        self.client.login(username='learner', password='learner-pass-123')
+
+        query_counts = []
+        for module_count in (3, 60):
+            course, modules = self.make_course(module_count, completed=module_count // 2)
+            url = reverse('course_detail', args=[course.pk])
+            self.client.get(url)  # warm the outline cache
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, f'Module {module_count - 1}')
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+
+class CourseProgressSummaryTests(TestCase):
+    """CourseProgressSummary follows completion changes and course edits"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='learner', password='learner-pass-123')
+        certification = ProfessionalCertification.objects.create(title='Data Engineering', description='Pipelines')
+        cls.course = Course.objects.create(certification=certification, title='Streaming', description='Kafka')
+        cls.modules = [
+            Module.objects.create(course=cls.course, title=f'Module {i}', module_type='text', order=i)
+            for i in range(4)
+        ]
+
+    def complete(self, *modules):
+        for module in modules:
+            progress, created = ModuleProgress.objects.get_or_create(user=self.user, module=module)
+            progress.mark_as_completed()
+
+    def assertSummary(self, completed_count, active_module_count, percent):
+        summary = CourseProgressSummary.objects.get(user=self.user, course=self.course)
+        self.assertEqual(
+            (summary.completed_count, summary.active_module_count),
+            (completed_count, active_module_count)
+        )
+        self.assertAlmostEqual(summary.percent, percent)
+        return summary
+
+    def test_completing_modules(self):
+        self.complete(self.modules[0])
+        self.assertSummary(1, 4, 25)
+        self.complete(self.modules[1])
+        summary = self.assertSummary(2, 4, 50)
+        self.assertIsNone(summary.completed_at)
+
+    def test_uncompleting_a_module(self):
+        self.complete(*self.modules[:2])
+        progress = ModuleProgress.objects.get(user=self.user, module=self.modules[0])
+        progress.is_completed = False
+        progress.completed_at = None
+        progress.save()
+        self.assertSummary(1, 4, 25)
+
+    def test_deactivating_modules(self):
+        self.complete(*self.modules[:2])
+        self.modules[3].is_active = False
+        self.modules[3].save()
+        self.assertSummary(2, 3, 200 / 3)
+
+        # A deactivated module no longer counts as completed either
+        self.modules[0].is_active = False
+        self.modules[0].save()
+        self.assertSummary(1, 2, 50)
+
+    def test_new_rows_keep_the_summary_consistent(self):
+        ModuleProgress.objects.create(user=self.user, module=self.modules[0])
+        self.assertSummary(0, 4, 0)
+        ModuleProgress.objects.create(
+            user=self.user, module=self.modules[1], is_completed=True, completed_at=timezone.now()
+        )
+        self.assertSummary(1, 4, 25)
+        ModuleProgress.objects.create(user=self.user, module=self.modules[2])
+        self.assertSummary(1, 4, 25)
+        self.assertEqual(rebuild_summaries(dry_run=True), {'created': 0, 'updated': 0, 'deleted': 0})
+
+    def test_deleting_a_module_resyncs_its_course_once(self):
+        learners = [self.user] + [
+            User.objects.create_user(username=f'learner{n}', password='learner-pass-123') for n in range(5)
+        ]
+        for learner in learners:
+            for module in self.modules[:2]:
+                ModuleProgress.objects.create(
+                    user=learner, module=module, is_completed=True, completed_at=timezone.now()
+                )
+
+        # Independent of the number of completers
+        with self.assertNumQueries(14):
+            self.modules[0].delete()
+        self.assertSummary(1, 3, 100 / 3)
+
+        # Deleting a progress row itself still resyncs its learner
+        ModuleProgress.objects.filter(user=self.user, module=self.modules[1]).delete()
+        self.assertSummary(0, 3, 0)
+
+    def test_adding_a_module_reopens_a_completed_course(self):
+        self.complete(*self.modules)
+        self.assertIsNotNone(self.assertSummary(4, 4, 100).completed_at)
+
+        Module.objects.create(course=self.course, title='Module 4', module_type='text', order=4)
+        summary = self.assertSummary(4, 5, 80)
+        self.assertIsNone(summary.completed_at)
+
+
+class ModuleProgressTests(TestCase):
+    """ModuleProgress.update_video_progress() completes on the stored maximum"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='learner', password='learner-pass-123')
+        certification = ProfessionalCertification.objects.create(title='Data Engineering', description='Pipelines')
+        course = Course.objects.create(certification=certification, title='Streaming', description='Kafka')
+        cls.module = Module.objects.create(
+            course=course, title='Lecture', module_type='video', order=1, video_duration=1000
+        )
+
+    def progress(self, watch_time):
+        return ModuleProgress.objects.create(user=self.user, module=self.module, video_watch_time=watch_time)
+
+    def updates(self, queries):
+        return [query['sql'] for query in queries if query['sql'].startswith('UPDATE "module_progress"')]
+
+    def test_late_heartbeat_never_lowers_watch_time(self):
+        progress = self.progress(500)
+        progress.update_video_progress(100)
+        progress.refresh_from_db()
+        self.assertEqual(progress.video_watch_time, 500)
+        self.assertFalse(progress.is_completed)
+
+    def test_completion_uses_the_stored_maximum_and_saves_once(self):
+        progress = ModuleProgress.objects.get(pk=self.progress(900).pk)
+        with CaptureQueriesContext(connection) as queries:
+            progress.update_video_progress(100)
+
+        self.assertEqual(len(self.updates(queries)), 1)
+        progress.refresh_from_db()
+        self.assertTrue(progress.is_completed)
+        self.assertIsNotNone(progress.completed_at)
+        self.assertEqual(progress.video_watch_time, 900)
+
+
+class ProgressSyncTests(TestCase):
+    """Batch progress sync applies each idempotency key once and never lowers watch time"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='learner', password='learner-pass-123')
+        certification = ProfessionalCertification.objects.create(title='Data Engineering', description='Pipelines')
+        course = Course.objects.create(certification=certification, title='Streaming', description='Kafka')
+        cls.text = Module.objects.create(course=course, title='Reading', module_type='text', order=1)
+        cls.video = Module.objects.create(
+            course=course, title='Lecture', module_type='video', order=2, video_duration=1000
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def sync(self, *events):
+        response = self.client.post(reverse('sync_progress'), json.dumps(events), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def statuses(self, data):
+        return [result['status'] for result in data['results']]
+
+    def watch(self, key, watch_time):
+        return {'key': key, 'module': self.video.pk, 'kind': 'video_time', 'watch_time': watch_time}
+
+    def progress(self, module):
+        return ModuleProgress.objects.get(user=self.user, module=module)
+
+    def test_replayed_batch_is_reported_as_duplicate(self):
+        batch = [self.watch('w1', 300), {'key': 'r1', 'module': self.text.pk, 'kind': 'mark_read'}]
+        self.assertEqual(self.statuses(self.sync(*batch)), ['applied', 'applied'])
+
+        data = self.sync(*batch)
+        self.assertEqual(self.statuses(data), ['duplicate', 'duplicate'])
+        self.assertEqual(data['modules'][str(self.video.pk)]['video_watch_time'], 300)
+        self.assertEqual(ModuleProgress.objects.filter(user=self.user).count(), 2)
+        self.assertTrue(self.progress(self.text).is_completed)
+
+    def test_duplicate_key_within_a_batch_is_applied_once(self):
+        data = self.sync(self.watch('w1', 300), self.watch('w1', 900))
+        self.assertEqual(self.statuses(data), ['applied', 'duplicate'])
+        self.assertEqual(self.progress(self.video).video_watch_time, 300)
+        self.assertFalse(self.progress(self.video).is_completed)
+
+    def test_unknown_module_fails_only_its_event(self):
+        data = self.sync(
+            {'key': 'x1', 'module': self.video.pk + 1000, 'kind': 'mark_read'},
+            {'key': 'x2', 'module': self.video.pk, 'kind': 'mark_read'},
+            {'key': 'x3', 'module': self.text.pk, 'kind': 'mark_read'},
+        )
+        self.assertEqual(
+            [(result['status'], result.get('error')) for result in data['results']],
+            [('error', 'Module not found'), ('error', 'Invalid module type'), ('applied', None)]
+        )
+        self.assertFalse(ModuleProgress.objects.filter(user=self.user, module=self.video).exists())
+
+    def test_watch_time_stays_at_the_maximum(self):
+        self.sync(self.watch('w1', 500), self.watch('w2', 200))
+        self.assertEqual(self.progress(self.video).video_watch_time, 500)
+        self.sync(self.watch('w3', 100))
+        self.assertEqual(self.progress(self.video).video_watch_time, 500)
+
+        data = self.sync(self.watch('w4', 900))
+        self.assertTrue(data['modules'][str(self.video.pk)]['is_completed'])
+        self.assertEqual(data['courses'][str(self.video.course_id)]['progress'], 50)
+
+    def test_row_inserted_by_a_concurrent_sync_is_updated(self):
+        # Another device inserts the row after this sync found it missing
+        ModuleProgress.objects.create(user=self.user, module=self.video, video_watch_time=600)
+        locked_rows = sync._locked_progress_rows
+        lookups = iter([lambda user, module_ids: {}, locked_rows])
+        with mock.patch.object(
+            sync, '_locked_progress_rows', side_effect=lambda *args: next(lookups)(*args)
+        ):
+            data = self.sync(self.watch('w1', 300))
+
+        self.assertEqual(self.statuses(data), ['applied'])
+        self.assertEqual(ModuleProgress.objects.filter(user=self.user, module=self.video).count(), 1)
+        self.assertEqual(self.progress(self.video).video_watch_time, 600)
+
+
+class CertificateIssuanceTests(TestCase):
+    """Completing the last module issues each certificate exactly once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='learner', password='learner-pass-123')
+        cls.certification = ProfessionalCertification.objects.create(title='Data Engineering', description='Pipelines')
+        cls.course = Course.objects.create(certification=cls.certification, title='Streaming', description='Kafka')
+        cls.modules = [
+            Module.objects.create(course=cls.course, title=f'Module {i}', module_type='text', order=i)
+            for i in range(2)
+        ]
+        CertificationEnrollment.objects.create(user=cls.user, certification=cls.certification)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.issued = []
+        receiver = lambda sender, certificate_ids, **kwargs: self.issued.extend(certificate_ids)
+        certificates_issued.connect(receiver, weak=False)
+        self.addCleanup(certificates_issued.disconnect, receiver)
+
+    def complete(self, module):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('mark_module_complete', args=[module.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def assertCertificates(self, count):
+        self.assertEqual(CourseCertificate.objects.filter(user=self.user, course=self.course).count(), count)
+        self.assertEqual(
+            ProfessionalCertificationCertificate.objects.filter(
+                user=self.user, certification=self.certification
+            ).count(),
+            count
+        )
+
+    def test_last_module_issues_both_certificates_once(self):
+        certificate_id = 'CERT-0000000000AA'
+        self.assertFalse(verify_certificate(certificate_id)['valid'])
+
+        self.complete(self.modules[0])
+        self.assertCertificates(0)
+        with mock.patch.object(issuance, 'new_course_certificate_id', return_value=certificate_id):
+            self.complete(self.modules[1])
+        self.assertCertificates(1)
+        self.assertEqual(len(self.issued), 2)
+        # bulk_create sends no post_save; the cached "not found" must still go
+        self.assertTrue(verify_certificate(certificate_id)['valid'])
+
+        # A duplicate completion notification issues nothing
+        issued = issue_completion_certificates([(self.user.pk, self.course.pk)])
+        self.assertEqual(issued, {KIND_COURSE: 0, KIND_PROFESSIONAL: 0})
+        self.assertCertificates(1)
+        self.assertEqual(len(self.issued), 2)
+
+    def test_concurrent_issuance_inserts_nothing(self):
+        for module in self.modules:
+            self.complete(module)
+        self.issued.clear()
+
+        # Both pairs look eligible to a call that raced the one above
+        with mock.patch.object(issuance, 'eligible_course_pairs', return_value=[(self.user.pk, self.course.pk)]), \
+                mock.patch.object(
+                    issuance, 'eligible_certification_pairs', return_value=[(self.user.pk, self.certification.pk)]
+                ):
+            issued = issue_completion_certificates([(self.user.pk, self.course.pk)])
+
+        self.assertEqual(issued, {KIND_COURSE: 0, KIND_PROFESSIONAL: 0})
+        self.assertCertificates(1)
+        self.assertEqual(self.issued, [])
+
+
+class CertificateVerificationTests(TestCase):
+    """Verification results are shared by all workers and only briefly cached by HTTP caches"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='learner', password='learner-pass-123', first_name='Ada')
+        certification = ProfessionalCertification.objects.create(title='Data Engineering', description='Pipelines')
+        course = Course.objects.create(certification=certification, title='Streaming', description='Kafka')
+        cls.certificate = CourseCertificate.objects.create(user=user, course=course, certificate_id='CERT-0000000000BB')
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+
+    def verify(self, **headers):
+        return self.client.get(
+            reverse('api_verify_certificate', args=[self.certificate.certificate_id]), headers=headers
+        )
+
+    def test_revoked_certificate_stops_verifying_on_every_worker(self):
+        with worker('worker-a'):
+            self.assertTrue(self.verify().json()['valid'])
+        with worker('worker-b'):
+            self.assertTrue(self.verify().json()['valid'])
+            CourseCertificate.objects.filter(pk=self.certificate.pk).delete()
+        with worker('worker-a'):
+            response = self.verify()
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.json()['valid'])
+
+    def test_public_response_is_short_lived_and_revalidated(self):
+        response = self.verify()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=60', response['Cache-Control'])
+
+        revalidated = self.verify(if_none_match=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], response['ETag'])
+
+        # Renaming the holder changes the record and so the ETag
+        self.certificate.user.first_name = 'Grace'
+        self.certificate.user.save()
+        renamed = self.verify(if_none_match=response['ETag'])
+        self.assertEqual(renamed.status_code, 200)
+        self.assertEqual(renamed.json()['holder'], 'Grace')
+
+
+class CatalogCacheTests(TestCase):
+    """Cached catalogue listings follow certification and course changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user(
+            username='instructor', password='instructor-pass-123', role=User.ROLE_INSTRUCTOR
+        )
+        cls.first = ProfessionalCertification.objects.create(
+            title='First Certification', description='First', created_by=cls.instructor
+        )
+        cls.second = ProfessionalCertification.objects.create(
+            title='Second Certification', description='Second', created_by=cls.instructor
+        )
+        cls.course = Course.objects.create(
+            certification=cls.first, title='Moving Course', description='Course', created_by=cls.instructor
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.client.force_login(self.instructor)
+
+    def test_listings_are_served_from_cache(self):
+        self.assertEqual(len(certification_page().items), 2)
+        with self.assertNumQueries(1):  # the shared version lookup
+            self.assertEqual(len(certification_page().items), 2)
+
+    def test_certification_edit_refreshes_listings(self):
+        self.assertContains(self.client.get(reverse('dashboard')), 'First Certification')
+
+        certification = ProfessionalCertification.objects.get(pk=self.first.pk)
+        certification.title = 'Renamed Certification'
+        certification.save()
+
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'Renamed Certification')
+        self.assertNotContains(response, 'First Certification')
+        self.assertContains(self.client.get(reverse('instructor_dashboard')), 'Renamed Certification')
+
+    def test_moving_a_course_refreshes_both_certifications(self):
+        first_url = reverse('certification_detail', args=[self.first.pk])
+        second_url = reverse('certification_detail', args=[self.second.pk])
+        self.assertContains(self.client.get(first_url), 'Moving Course')
+        self.assertNotContains(self.client.get(second_url), 'Moving Course')
+
+        course = Course.objects.get(pk=self.course.pk)
+        course.certification = self.second
+        course.save()
+
+        self.assertNotContains(self.client.get(first_url), 'Moving Course')
+        self.assertContains(self.client.get(second_url), 'Moving Course')
+
+    def test_outline_changes_reach_other_workers(self):
+        with worker('worker-a'):
+            cache.clear()
+            self.assertEqual(len(get_course_outline(self.course.pk)), 0)
+        with worker('worker-b'):
+            Module.objects.create(course=self.course, title='New Module', module_type='text', order=1)
+        with worker('worker-a'):
+            self.assertEqual([entry.title for entry in get_course_outline(self.course.pk).active], ['New Module'])
+
+    def test_deleted_certification_is_hidden(self):
+        self.assertEqual(self.client.get(reverse('certification_detail', args=[self.second.pk])).status_code, 200)
+
+        ProfessionalCertification.objects.get(pk=self.second.pk).delete()
+
+        self.assertEqual(self.client.get(reverse('certification_detail', args=[self.second.pk])).status_code, 404)
+        self.assertEqual([cert.pk for cert in certification_page().items], [self.first.pk])
+
+
+class KeysetPaginationTests(TestCase):
+    """Dashboard and enrollment listings are paginated by cursor"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='learner', password='learner-pass-123')
+        cls.other = User.objects.create_user(username='other', password='other-pass-123')
+        cls.certifications = ProfessionalCertification.objects.bulk_create([
+            ProfessionalCertification(title=f'Certification {n}', description='Paged')
+            for n in range(PAGE_SIZE + 3)
+        ])
+        CertificationEnrollment.objects.bulk_create([
+            CertificationEnrollment(user=user, certification=certification)
+            for user in (cls.user, cls.other)
+            for certification in cls.certifications
+        ])
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.client.force_login(self.user)
+
+    def test_pages_cover_every_row_once_despite_equal_timestamps(self):
+        ProfessionalCertification.objects.update(created_at=timezone.now())
+        queryset = ProfessionalCertification.objects.all()
+
+        seen, cursor = [], None
+        while True:
+            page = keyset_page(queryset, 'created_at', cursor, limit=4)
+            seen.extend(cert.pk for cert in page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(seen, sorted((cert.pk for cert in self.certifications), reverse=True))
+
+    def test_invalid_cursor_is_rejected(self):
+        for cursor in ('not-a-cursor', encode_cursor(timezone.now(), 1)[:-3]):
+            with self.assertRaises(InvalidCursor):
+                keyset_page(ProfessionalCertification.objects.all(), 'created_at', cursor)
+
+        response = self.client.get(reverse('more_certifications'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('more_enrollments'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_dashboard_loads_more_certifications(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(len(response.context['certification_data']), PAGE_SIZE)
+        self.assertEqual(response.context['certification_count'], PAGE_SIZE + 3)
+        self.assertContains(response, reverse('more_certifications'))
+
+        response = self.client.get(reverse('more_certifications'), {'cursor': response.context['next_cursor']})
+        data = response.json()
+        self.assertIsNone(data['next_cursor'])
+        for certification in self.certifications[:3]:
+            self.assertIn(f'>{certification.title}<', data['html'])
+        self.assertNotIn(f'>{self.certifications[3].title}<', data['html'])
+
+    def test_enrollments_load_more_of_own_enrollments(self):
+        response = self.client.get(reverse('my_enrollments'))
+        first_page = [item['enrollment'] for item in response.context['enrollment_data']]
+        self.assertEqual(len(first_page), PAGE_SIZE)
+        self.assertTrue(all(enrollment.user_id == self.user.pk for enrollment in first_page))
+
+        response = self.client.get(reverse('more_enrollments'), {'cursor': response.context['next_cursor']})
+        data = response.json()
+        self.assertIsNone(data['next_cursor'])
+        self.assertEqual(data['html'].count('Enrolled:'), 3)
+
+
+class AnalyticsRollupTests(TestCase):
+    """refresh_rollups() keeps the daily rollups in step with changed rows only"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user(
+            username='instructor', password='instructor-pass-123', role=User.ROLE_INSTRUCTOR
+        )
+        cls.learners = [
+            User.objects.create_user(username=f'learner{n}', password='learner-pass-123') for n in range(3)
+        ]
+        cls.certification = ProfessionalCertification.objects.create(
+            title='Analytics Certification', description='Rollups', created_by=cls.instructor
+        )
+        cls.course = Course.objects.create(
+            certification=cls.certification, title='Analytics Course', description='Course',
+            created_by=cls.instructor
+        )
+        cls.text = Module.objects.create(
+            course=cls.course, title='Reading', order=1, module_type='text', text_content='Text'
+        )
+        cls.video = Module.objects.create(
+            course=cls.course, title='Lecture', order=2, module_type='video', video_duration=100
+        )
+
+    def refresh(self, days=0, **kwargs):
+        # Offset the watermark lag so rows written just now are included
+        return refresh_rollups(now=timezone.now() + watermark_lag() + timedelta(days=days), **kwargs)
+
+    def analytics(self, **kwargs):
+        courses = [Course.objects.select_related('certification').get(pk=self.course.pk)]
+        return course_analytics(courses, **kwargs)[0]
+
+    def test_rollups_count_enrollments_activity_and_funnel(self):
+        first, second, third = self.learners
+        for learner in self.learners:
+            CertificationEnrollment.objects.create(user=learner, certification=self.certification)
+        ModuleProgress.objects.create(user=first, module=self.text, is_completed=True, completed_at=timezone.now())
+        ModuleProgress.objects.create(user=second, module=self.text)
+        ModuleProgress.objects.create(user=second, module=self.video, video_watch_time=50)
+        ModuleProgress.objects.create(user=third, module=self.video, video_watch_time=500)
+        CourseCertificate.objects.create(user=first, course=self.course)
+
+        self.refresh()
+
+        stats = self.analytics()
+        self.assertEqual((stats.enrollments, stats.completions, stats.active_today), (3, 1, 3))
+        reading, lecture = stats.funnel
+        self.assertEqual((reading.started, reading.completed, reading.completion_rate), (2, 1, 50.0))
+        self.assertIsNone(reading.average_watch_percent)
+        # Watch time is capped at the video length: (50 + 100) / (2 * 100)
+        self.assertEqual(lecture.average_watch_percent, 75.0)
+
+    def test_refresh_only_recounts_changed_buckets(self):
+        ModuleProgress.objects.create(user=self.learners[0], module=self.text)
+        self.assertEqual(self.refresh()['modules'], 1)
+        self.assertEqual(self.refresh()['modules'], 0)
+
+        progress = ModuleProgress.objects.get(user=self.learners[0], module=self.text)
+        progress.mark_as_completed()
+        ModuleProgress.objects.create(user=self.learners[1], module=self.video, video_watch_time=10)
+
+        written = self.refresh()
+        self.assertEqual(written['modules'], 2)
+        self.assertEqual(ModuleDailyStats.objects.get(module=self.text).completed, 1)
+
+    def test_active_learners_survive_a_later_visit(self):
+        progress = ModuleProgress.objects.create(user=self.learners[0], module=self.text)
+        self.refresh()
+
+        tomorrow = timezone.now() + timedelta(days=1)
+        ModuleProgress.objects.filter(pk=progress.pk).update(last_accessed=tomorrow)
+        self.refresh(days=1)
+
+        days = dict(CourseDailyStats.objects.values_list('date', 'active_learners'))
+        self.assertEqual(days, {timezone.localdate(): 1, timezone.localdate(tomorrow): 1})
+        self.assertEqual(self.analytics(today=timezone.localdate(tomorrow)).average_daily_active, round(2 / 7, 1))
+
+    @override_settings(PROGRESS_TOUCH_FLUSH_INTERVAL=300)
+    def test_late_flushed_touches_are_counted(self):
+        progress = ModuleProgress.objects.create(user=self.learners[0], module=self.text)
+        self.refresh()
+
+        # A touch queued tomorrow, a refresh before the buffer flushes, then the flush
+        touched_at = timezone.now() + timedelta(days=1)
+        buffer = AccessBuffer(flush_interval=300)
+        buffer.touch(progress.pk, touched_at)
+        refresh_rollups(now=touched_at + timedelta(seconds=290))
+        buffer.flush()
+        refresh_rollups(now=touched_at + timedelta(seconds=300) + watermark_lag())
+
+        stats = CourseDailyStats.objects.get(course=self.course, date=timezone.localdate(touched_at))
+        self.assertEqual(stats.active_learners, 1)
+
+    def test_rebuild_drops_deleted_rows(self):
+        enrollment = CertificationEnrollment.objects.create(user=self.learners[0], certification=self.certification)
+        self.refresh()
+        self.assertEqual(self.analytics().enrollments, 1)
+
+        enrollment.delete()
+        self.refresh(rebuild=True)
+        self.assertEqual(self.analytics().enrollments, 0)
+
+    def test_analytics_page_is_for_instructors(self):
+        ModuleProgress.objects.create(user=self.learners[0], module=self.text)
+        self.refresh()
+
+        self.client.force_login(self.instructor)
+        self.assertContains(self.client.get(reverse('instructor_analytics')), 'Analytics Course')
+
+        self.client.force_login(self.learners[0])
+        self.assertRedirects(self.client.get(reverse('instructor_analytics')), reverse('dashboard'))
+
+
+class SearchTests(TestCase):
+    """Full-text search ranks visible entries and follows catalogue changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='learner', password='learner-pass-123')
+        cls.certification = ProfessionalCertification.objects.create(
+            title='Data Engineering', description='Build reliable data platforms'
+        )
+        cls.course = Course.objects.create(
+            certification=cls.certification, title='Streaming Pipelines', description='Real-time processing'
+        )
+        cls.module = Module.objects.create(
+            course=cls.course, title='Kafka Basics', order=1, module_type='text',
+            text_content='<p>Partitions, consumer groups and why pipelines need back pressure.</p>'
+        )
+        cls.hidden = Module.objects.create(
+            course=cls.course, title='Draft Lesson', order=2, module_type='text',
+            text_content='Consumer offsets, unfinished', is_active=False
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def titles(self, query):
+        return [hit.title for hit in search_catalog(query)]
+
+    def test_title_matches_rank_above_body_matches(self):
+        self.assertEqual(self.titles('pipelines'), ['Streaming Pipelines', 'Kafka Basics'])
+
+    def test_best_match_wins_whenever_it_was_indexed(self):
+        filler = ' '.join(f'topic{n}' for n in range(40))
+        Module.objects.bulk_create([
+            Module(course=self.course, title=f'Lesson {n}', order=10 + n, module_type='text',
+                   text_content=f'{filler} backpressure')
+            for n in range(30)
+        ])
+        best = Module.objects.create(
+            course=self.course, title='Flow Control', order=99, module_type='text',
+            text_content='backpressure, backpressure and more backpressure'
+        )
+        rebuild_index()
+        self.assertEqual(search_catalog('backpressure', limit=1)[0].object_id, best.pk)
+
+    def test_words_match_stemmed_and_last_word_as_prefix(self):
+        self.assertEqual(self.titles('consumers GROUP'), ['Kafka Basics'])
+        self.assertEqual(self.titles('partition consu'), ['Kafka Basics'])
+        self.assertEqual(self.titles('consu partition'), [])
+        self.assertEqual(self.titles('consumer offsets'), [])
+        hit = search_catalog('partitions')[0]
+        self.assertEqual((hit.context, hit.url), ('Streaming Pipelines', reverse('module_view', args=[self.module.pk])))
+        self.assertTrue(hit.snippet.startswith('Partitions, consumer groups'))
+
+    def test_query_syntax_is_treated_as_words(self):
+        for query in ('"kafka', 'kafka OR NEAR(', '*', 'title:kafka'):
+            with self.subTest(query):
+                search_catalog(query)
+        self.assertEqual(self.titles('title:kafka'), [])
+        self.assertEqual(self.titles('"kafka*'), ['Kafka Basics'])
+
+    def test_index_follows_saves_and_deletes(self):
+        module = Module.objects.get(pk=self.module.pk)
+        module.title = 'Event Streaming'
+        module.save()
+        self.assertEqual(self.titles('kafka'), [])
+        self.assertEqual(self.titles('event'), ['Event Streaming'])
+
+        certification = ProfessionalCertification.objects.get(pk=self.certification.pk)
+        certification.title = 'Platform Engineering'
+        certification.save()
+        self.assertEqual(search_catalog('streaming pipelines')[0].context, 'Platform Engineering')
+
+        course = Course.objects.get(pk=self.course.pk)
+        course.is_active = False
+        course.save()
+        self.assertEqual(self.titles('event'), [])
+
+        module.delete()
+        self.assertFalse(SearchEntry.objects.filter(kind=SearchEntry.KIND_MODULE, object_id=self.module.pk).exists())
+
+    def test_rebuild_restores_the_index(self):
+        SearchEntry.objects.all().delete()
+        self.assertEqual(self.titles('kafka'), [])
+
+        written = rebuild_index()
+        self.assertEqual(written, {'certification': 1, 'course': 1, 'module': 2})
+        self.assertEqual(self.titles('kafka'), ['Kafka Basics'])
+
+    def test_search_page_and_api(self):
+        self.assertContains(self.client.get(reverse('search'), {'q': 'kafka'}), 'Kafka Basics')
+
+        data = self.client.get(reverse('api_search'), {'q': 'data', 'limit': 1}).json()
+        self.assertEqual([hit['title'] for hit in data['results']], ['Data Engineering'])
+        self.assertEqual(data['results'][0]['kind'], 'certification')
+
+        response = self.client.get(reverse('api_search'), {'q': 'data', 'limit': 'all'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ModuleAccessTests(TestCase):
+    """Viewing a module never writes; last_accessed is touched in throttled batches"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='learner', password='learner-pass-123')
+        certification = ProfessionalCertification.objects.create(title='Data Engineering', description='Pipelines')
+        course = Course.objects.create(certification=certification, title='Streaming', description='Kafka')
+        cls.module = Module.objects.create(course=course, title='Consumers', module_type='text', order=1)
+
+    def setUp(self):
+        cache.clear()
+        get_access_buffer().flush()
+        self.client.force_login(self.user)
+
+    def view(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('module_view', args=[self.module.pk]))
+        self.assertEqual(response.status_code, 200)
+        return [
+            query['sql'] for query in queries.captured_queries
+            if '"module_progress"' in query['sql'] and not query['sql'].startswith('SELECT')
+        ]
+
+    def age(self, progress, minutes):
+        accessed_at = timezone.now() - timedelta(minutes=minutes)
+        ModuleProgress.objects.filter(pk=progress.pk).update(last_accessed=accessed_at)
+        return accessed_at
+
+    def test_view_without_progress_creates_no_row(self):
+        self.assertEqual(self.view(), [])
+        self.assertFalse(ModuleProgress.objects.filter(user=self.user).exists())
+        self.assertEqual(len(get_access_buffer()), 0)
+
+    def test_stale_row_is_touched_once_per_interval(self):
+        progress = ModuleProgress.objects.create(user=self.user, module=self.module)
+        self.view()
+        self.assertEqual(len(get_access_buffer()), 0)
+
+        stale = self.age(progress, 10)
+        self.assertEqual(self.view(), [])
+        self.assertEqual(self.view(), [])
+        self.assertEqual(len(get_access_buffer()), 1)
+        self.assertEqual(ModuleProgress.objects.get(pk=progress.pk).last_accessed, stale)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_access_buffer().flush(), 1)
+        self.assertEqual(len(queries), 1)
+        self.assertGreater(ModuleProgress.objects.get(pk=progress.pk).last_accessed, stale)
+
+    def test_full_buffer_flushes_without_waiting(self):
+        progress = ModuleProgress.objects.create(user=self.user, module=self.module)
+        stale = self.age(progress, 10)
+        buffer = AccessBuffer(max_size=1, flush_interval=3600)
+        buffer.touch(progress.pk, timezone.now())
+
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.stats, {'queued': 1, 'flushes': 1, 'rows_written': 1})
+        self.assertGreater(ModuleProgress.objects.get(pk=progress.pk).last_accessed, stale)
+
+    def test_touch_never_moves_last_accessed_back(self):
+        progress = ModuleProgress.objects.create(user=self.user, module=self.module)
+        self.age(progress, 10)
+        self.view()
+        newer = timezone.now() + timedelta(minutes=1)
+        ModuleProgress.objects.filter(pk=progress.pk).update(last_accessed=newer)
+
+        get_access_buffer().flush()
+        self.assertEqual(ModuleProgress.objects.get(pk=progress.pk).last_accessed, newer)
+
+
+@override_settings(PROGRESS_WRITE_BEHIND=True)
+class BufferedHeartbeatTests(TestCase):
+    """Buffered video heartbeats answer like written-through ones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='learner', password='learner-pass-123')
+        certification = ProfessionalCertification.objects.create(title='Data Engineering', description='Pipelines')
+        course = Course.objects.create(certification=certification, title='Streaming', description='Kafka')
+        cls.module = Module.objects.create(
+            course=course, title='Lecture', module_type='video', order=1, video_duration=1000
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.buffer = heartbeats.HeartbeatBuffer(flush_interval=3600)
+        patcher = mock.patch.dict(buffers._instances, {heartbeats.HeartbeatBuffer: self.buffer})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.buffer.flush)
+        self.client.force_login(self.user)
+
+    def heartbeat(self, watch_time):
+        response = self.client.post(reverse('update_video_progress', args=[self.module.pk]), {'watch_time': watch_time})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_buffered_response_reports_the_furthest_position(self):
+        self.heartbeat(300)
+        response = self.heartbeat(100)
+        data = response.json()
+        self.assertTrue(data['buffered'])
+        self.assertEqual(data['progress_percentage'], 30)
+        self.assertEqual(response['ETag'], f'"{data["version"]}"')
+        self.assertFalse(ModuleProgress.objects.filter(user=self.user).exists())
+
+    def test_rewatching_a_completed_module_keeps_its_version(self):
+        ModuleProgress.objects.create(
+            user=self.user, module=self.module, video_watch_time=1000,
+            is_completed=True, completed_at=timezone.now()
+        )
+        page = self.client.get(reverse('module_view', args=[self.module.pk]))
+
+        data = self.heartbeat(50).json()
+        self.assertTrue(data['buffered'])
+        self.assertEqual(data['version'], page.context['progress_version'])
+        self.assertEqual(data['version'], f'{self.module.pk}-c')
+        self.assertEqual((data['is_completed'], data['progress_percentage']), (True, 100))
+
+    def test_buffered_response_never_reports_less_than_is_stored(self):
+        ModuleProgress.objects.create(user=self.user, module=self.module, video_watch_time=600)
+        data = self.heartbeat(100).json()
+        self.assertTrue(data['buffered'])
+        self.assertEqual((data['version'], data['progress_percentage']), (f'{self.module.pk}-p', 60))
+
+    def test_buffered_and_written_through_responses_have_the_same_keys(self):
+        buffered = self.heartbeat(300).json()
+        self.buffer.flush()
+        with override_settings(PROGRESS_WRITE_BEHIND=False):
+            written = self.heartbeat(400).json()
+
+        self.assertFalse(written['buffered'])
+        self.assertEqual(buffered.keys(), written.keys())
+        self.assertEqual(
+            ModuleProgress.objects.get(user=self.user, module=self.module).video_watch_time, 400
+        )
+
+    def test_flush_inserts_missing_rows_in_bulk(self):
+        learners = [User.objects.create_user(username=f'viewer{n}', password='!') for n in range(5)]
+        ModuleProgress.objects.create(user=self.user, module=self.module, video_watch_time=500)
+        self.buffer.offer(self.user.pk, self.module, 200, is_completed=False)
+        for learner in learners:
+            self.buffer.offer(learner.pk, self.module, 120, is_completed=False)
+
+        # Independent of the number of missing rows
+        with self.assertNumQueries(11):
+            self.assertEqual(self.buffer.flush(), 6)
+
+        watch_times = dict(ModuleProgress.objects.values_list('user__username', 'video_watch_time'))
+        self.assertEqual(watch_times, {'learner': 500, **{learner.username: 120 for learner in learners}})
+        self.assertEqual(rebuild_summaries(dry_run=True), {'created': 0, 'updated': 0, 'deleted': 0})
+
+    async def aheartbeat(self, watch_time):
+        return await async_post(
+            async_views.update_video_progress, self.user, 'update_video_progress', self.module.pk,
+            {'watch_time': watch_time}
+        )
+
+    async def test_async_view_answers_the_same(self):
+        await self.aheartbeat(300)
+        response = await self.aheartbeat(100)
+
+        data = json.loads(response.content)
+        self.assertTrue(data['buffered'])
+        self.assertEqual(data['progress_percentage'], 30)
+        self.assertEqual(response['ETag'], f'"{data["version"]}"')
+
+    async def test_async_rewatch_of_a_completed_module_keeps_its_version(self):
+        await ModuleProgress.objects.acreate(
+            user=self.user, module=self.module, video_watch_time=1000,
+            is_completed=True, completed_at=timezone.now()
+        )
+        data = json.loads((await self.aheartbeat(50)).content)
+        self.assertTrue(data['buffered'])
+        self.assertEqual((data['version'], data['progress_percentage']), (f'{self.module.pk}-c', 100))
+
+
+class AsyncProgressViewTests(TestCase):
+    """The async progress views answer like the sync ones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='learner', password='learner-pass-123')
+        certification = ProfessionalCertification.objects.create(title='Data Engineering', description='Pipelines')
+        cls.course = Course.objects.create(certification=certification, title='Streaming', description='Kafka')
+        cls.video = Module.objects.create(
+            course=cls.course, title='Lecture', module_type='video', order=1, video_duration=1000
+        )
+        cls.text = Module.objects.create(course=cls.course, title='Reading', module_type='text', order=2)
+
+    async def heartbeat(self, watch_time):
+        response = await async_post(
+            async_views.update_video_progress, self.user, 'update_video_progress', self.video.pk,
+            {'watch_time': watch_time}
+        )
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    async def test_late_heartbeat_reports_the_stored_position(self):
+        await self.heartbeat(600)
+        data = await self.heartbeat(100)
+        self.assertEqual((data['buffered'], data['changed']), (False, False))
+        self.assertEqual((data['version'], data['progress_percentage']), (f'{self.video.pk}-p', 60))
+        progress = await ModuleProgress.objects.aget(user=self.user, module=self.video)
+        self.assertEqual(progress.video_watch_time, 600)
+
+    async def test_completing_heartbeat_reports_course_progress(self):
+        await self.heartbeat(300)
+        data = await self.heartbeat(950)
+        self.assertTrue(data['changed'])
+        self.assertEqual((data['version'], data['progress_percentage']), (f'{self.video.pk}-c', 100))
+        self.assertEqual((data['course_progress'], data['course_just_completed']), (50, False))
+
+        # Later heartbeats of the completed module stay completed
+        data = await self.heartbeat(10)
+        self.assertEqual((data['changed'], data['version']), (False, f'{self.video.pk}-c'))
+
+    async def test_marking_a_module_complete(self):
+        await self.heartbeat(1000)
+        responses = [
+            json.loads((await async_post(
+                async_views.mark_module_complete, self.user, 'mark_module_complete', self.text.pk
+            )).content)
+            for _ in range(2)
+        ]
+        self.assertEqual([data['changed'] for data in responses], [True, False])
+        self.assertEqual(responses[0]['version'], f'{self.text.pk}-c')
+        self.assertTrue(responses[0]['course_just_completed'])
+
+
+@override_settings(SESSION_REFRESH_INTERVAL=300, SESSION_SAVE_EVERY_REQUEST=False)
+class SessionRefreshTests(TestCase):
+    """Sessions are saved at most once per SESSION_REFRESH_INTERVAL, so expiry still slides"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='learner', password='learner-pass-123')
+
+    def setUp(self):
+        clock = mock.patch.object(sessions, 'time')
+        self.clock = clock.start()
+        self.addCleanup(clock.stop)
+        self.clock.time.return_value = 1_000_000_000
+
+    def get(self, url_name, seconds_later=0):
+        """(session writes, whether the session cookie was sent) for one request"""
+        self.clock.time.return_value += seconds_later
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name))
+        writes = [
+            query['sql'] for query in queries.captured_queries
+            if '"django_session"' in query['sql'] and not query['sql'].startswith('SELECT')
+        ]
+        return len(writes), settings.SESSION_COOKIE_NAME in response.cookies
+
+    def test_session_is_refreshed_once_per_interval(self):
+        self.client.login(username='learner', password='learner-pass-123')
+        self.assertEqual(self.get('profile'), (1, True))
+        self.assertEqual(self.get('profile', seconds_later=10), (0, False))
+        self.assertEqual(self.get('profile', seconds_later=280), (0, False))
+        self.assertEqual(self.get('profile', seconds_later=20), (1, True))
+        self.assertEqual(self.get('profile', seconds_later=5), (0, False))
+
+    def test_anonymous_visitors_get_no_session(self):
+        self.assertEqual(self.get('login'), (0, False))
+        self.assertEqual(self.get('login', seconds_later=600), (0, False))
+
+
+@override_settings(
+    MIDDLEWARE=['learning_platform.timing.ServerTimingMiddleware', *settings.MIDDLEWARE],
+    TEMPLATES=[{**settings.TEMPLATES[0], 'BACKEND': 'learning_platform.timing.TimedDjangoTemplates'}],
+    SERVER_TIMING_SAMPLE_RATE=1.0
+)
+class ServerTimingTests(TestCase):
+    """ServerTimingMiddleware as installed by SERVER_TIMING=True"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='learner', password='learner-pass-123')
+
+    def setUp(self):
+        cache.clear()
+
+    def server_timing(self, response):
+        """{metric: {param: value}} from the Server-Timing header"""
+        metrics = {}
+        for entry in response['Server-Timing'].split(', '):
+            name, *params = entry.split(';')
+            metrics[name] = dict(param.split('=', 1) for param in params)
+        return metrics
+
+    def get(self, url_name):
+        """Response to a timed GET and the request_timing fields it logged"""
+        with self.assertLogs('learning_platform.timing', 'INFO') as logs:
+            response = self.client.get(reverse(url_name))
+        timed, = [record.timing for record in logs.records if record.msg.startswith('request_timing')]
+        return response, timed
+
+    def test_header_reports_sql_template_and_total_time(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response, timed = self.get('profile')
+
+        self.assertEqual((timed['view'], timed['status'], timed['queries']), ('profile', 200, len(queries)))
+        metrics = self.server_timing(response)
+        self.assertEqual(list(metrics), ['sql', 'template', 'app', 'total'])
+        self.assertEqual(metrics['sql']['desc'], f'"{len(queries)} queries"')
+        self.assertGreater(float(metrics['template']['dur']), 0)
+        self.assertGreaterEqual(
+            float(metrics['total']['dur']),
+            float(metrics['sql']['dur']) + float(metrics['template']['dur'])
+        )
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_zero_sample_rate_disables_timing(self):
+        with self.assertNoLogs('learning_platform.timing'):
+            response = self.client.get(reverse('login'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response)
+
+    def test_each_request_starts_from_zero(self):
+        self.client.force_login(self.user)
+        first, _ = self.get('profile')
+        self.assertIsNone(timing._current_timing.get())
+
+        # Queries between requests are not counted towards the next one
+        list(User.objects.all())
+        second, _ = self.get('profile')
+        self.assertEqual(self.server_timing(second)['sql']['desc'], self.server_timing(first)['sql']['desc'])
+
+    def test_state_is_reset_when_the_view_raises(self):
+        def failing_view(request):
+            raise ValueError('boom')
+
+        middleware = timing.ServerTimingMiddleware(failing_view)
+        with self.assertRaises(ValueError):
+            middleware(RequestFactory().get('/'))
+        self.assertIsNone(timing._current_timing.get())
+
+
+class AnonymousPageCacheTests(TestCase):
+    """The home page is cached for anonymous visitors and follows content changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member_user = User.objects.create_user(
+            username='member', password='member-pass-123', first_name='Grace', last_name='Hopper'
+        )
+        cls.certification = ProfessionalCertification.objects.create(
+            title='Cloud Foundations', description='Cloud'
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+
+    def test_repeat_visits_are_served_from_cache(self):
+        first = self.client.get(reverse('home'))
+        with self.assertNumQueries(1):  # the shared version lookup
+            second = self.client.get(reverse('home'))
+        self.assertEqual(first.content, second.content)
+        self.assertIn('Cookie', second['Vary'])
+
+    def test_group_member_changes_refresh_the_page(self):
+        self.assertNotContains(self.client.get(reverse('home')), 'Grace Hopper')
+
+        GroupMember.objects.create(user=self.member_user, matric_number='M-1', title='Developer')
+        self.assertContains(self.client.get(reverse('home')), 'Grace Hopper')
+
+        self.member_user.first_name = 'Ada'
+        self.member_user.save()
+        self.assertContains(self.client.get(reverse('home')), 'Ada Hopper')
+
+    def test_certification_changes_refresh_the_page(self):
+        self.assertContains(self.client.get(reverse('home')), 'Cloud Foundations')
+
+        self.certification.title = 'Cloud Architecture'
+        self.certification.save()
+        self.assertContains(self.client.get(reverse('home')), 'Cloud Architecture')
+
+    def test_cache_key_uses_only_known_query_parameters(self):
+        self.client.get(reverse('home'), {'page': '2', 'q': 'cloud'})
+        with self.assertNumQueries(1):  # the shared version lookup
+            self.client.get(f"{reverse('home')}?q=cloud&page=2")
+
+        # Unknown parameters are rendered every time and never stored
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('home'), {'utm_source': 'newsletter'})
+            self.assertGreater(len(queries), 1)
+
+    def test_requests_with_a_session_are_not_served_from_cache(self):
+        self.client.get(reverse('home'))
+        self.client.force_login(self.member_user)
+        self.assertContains(self.client.get(reverse('home')), reverse('dashboard'))
+
+    def test_healthz_needs_no_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('healthz'))
+        self.assertEqual(response.content, b'ok')
+
+
+# =====================================
+# VIEW PERFORMANCE REGRESSION SUITE
+# =====================================
+
+# Wall-clock timings per (role, view) are compared against this file. It is
+# machine specific, so it is not committed: the first run (or a run with
+# PERF_UPDATE_BASELINE=1) records it, later runs fail when a view gets more
+# than PERF_TOLERANCE times slower (plus PERF_SLACK_MS of noise).
+PERF_BASELINE = Path(os.getenv('PERF_BASELINE', settings.BASE_DIR / 'perf_baseline.json'))
+PERF_UPDATE_BASELINE = os.getenv('PERF_UPDATE_BASELINE', 'False') == 'True'
+PERF_TOLERANCE = float(os.getenv('PERF_TOLERANCE', '3.0'))
+PERF_SLACK_MS = float(os.getenv('PERF_SLACK_MS', '25'))
+
+# Timed runs per GET view; the fastest one is kept
+PERF_REPEATS = 3
+
+ANONYMOUS, LEARNER, INSTRUCTOR = 'anonymous', 'learner', 'instructor'
+
+LEARNER_PASSWORD = 'learner-pass-123'
+
+# Seeded catalogue size. Budgets below hold for any size; a view that runs a
+# query per certification, course or module blows through them.
+SEED_CERTIFICATIONS = 6
+SEED_COURSES_PER_CERTIFICATION = 5
+SEED_MODULES_PER_COURSE = 12
+
+# Views that show or edit a lesson body; every other view must leave
+# modules.text_content in the database
+LESSON_BODY_VIEWS = {'module_view', 'edit_module'}
+
+
+class ViewCase(namedtuple('ViewCase', ['url_name', 'args', 'method', 'data', 'budgets'])):
+    """
+    One request against a URL. args maps the seeded fixtures to URL
+    arguments; budgets maps each role to its maximum number of queries.
+    """
+    __slots__ = ()
+
+    @property
+    def label(self):
+        return self.url_name if self.method == 'get' else f'{self.url_name} ({self.method.upper()})'
+
+
+def case(url_name, budgets, args=lambda seed: [], method='get', data=None):
+    return ViewCase(url_name, args, method, data, budgets)
+
+
+def per_role(anonymous, learner, instructor):
+    return {ANONYMOUS: anonymous, LEARNER: learner, INSTRUCTOR: instructor}
+
+
+VIEW_CASES = [
+    # Authentication
+    case('register', per_role(0, 5, 5)),
+    case('login', per_role(0, 5, 5)),
+    case('login', per_role(9, 5, 5), method='post',
+         data=lambda seed: {'username': 'learner', 'password': LEARNER_PASSWORD}),
+    case('logout', per_role(0, 4, 4)),
+
+    # Main pages
+    case('healthz', per_role(0, 4, 4)),
+    case('home', per_role(1, 8, 8)),
+    case('dashboard', per_role(0, 13, 14)),
+    case('more_certifications', per_role(0, 10, 11),
+         data=lambda seed: {'cursor': encode_cursor(seed.certification.created_at, seed.certification.pk)}),
+
+    # Profile
+    case('profile', per_role(0, 5, 5)),
+    case('change_password', per_role(0, 5, 5)),
+
+    # Enrollments
+    case('my_enrollments', per_role(0, 9, 6)),
+    case('more_enrollments', per_role(0, 9, 6),
+         data=lambda seed: {'cursor': encode_cursor(seed.enrollment.enrolled_at, seed.enrollment.pk)}),
+    case('enroll_certification', per_role(0, 7, 7), args=lambda seed: [seed.open_certification.pk]),
+    case('unenroll_certification', per_role(0, 7, 7), args=lambda seed: [seed.certification.pk]),
+
+    # Search
+    case('search', per_role(0, 7, 7), data=lambda seed: {'q': 'certification 1 module'}),
+    case('api_search', per_role(0, 7, 7), data=lambda seed: {'q': 'course'}),
+
+    # Learner pages
+    case('certification_detail', per_role(0, 8, 9), args=lambda seed: [seed.certification.pk]),
+    case('course_detail', per_role(0, 9, 9), args=lambda seed: [seed.course.pk]),
+    case('module_view', per_role(0, 8, 8), args=lambda seed: [seed.module.pk]),
+
+    # AJAX progress tracking. Budgets are the measured counts of a first
+    # write to the module, which include the session and user lookups, the
+    # session save and the savepoints of the nested atomic blocks; the
+    # instructor has no summary row for the course yet, so theirs is created
+    case('mark_module_complete', per_role(0, 15, 17), args=lambda seed: [seed.module.pk], method='post'),
+    case('update_video_progress', per_role(0, 15, 18), args=lambda seed: [seed.video.pk], method='post',
+         data=lambda seed: {'watch_time': 60}),
+    case('sync_progress', per_role(0, 19, 19), method='post', data=lambda seed: json.dumps([
+        {'key': 'perf-1', 'module': seed.module.pk, 'kind': 'mark_read'},
+        {'key': 'perf-2', 'module': seed.video.pk, 'kind': 'video_time', 'watch_time': 90},
+    ])),
+
+    # Certificate downloads
+    case('download_course_certificate', per_role(0, 6, 6), args=lambda seed: [seed.course_certificate.pk]),
+    case('download_professional_certificate', per_role(0, 6, 6),
+         args=lambda seed: [seed.professional_certificate.pk]),
+
+    # Public certificate verification; results live in the 'shared' cache,
+    # a database table here, so cache reads and writes are counted too
+    case('verify_certificate', per_role(0, 5, 5)),
+    case('verify_certificate_id', per_role(1, 6, 6),
+         args=lambda seed: [seed.course_certificate.certificate_id]),
+    case('api_verify_certificate', per_role(1, 5, 5),
+         args=lambda seed: [seed.professional_certificate.certificate_id]),
+    case('api_verify_certificates', per_role(12, 16, 16), method='post', data=lambda seed: json.dumps({
+        'ids': [seed.course_certificate.certificate_id, seed.professional_certificate.certificate_id]
+    })),
+
+    # Instructor pages
+    case('instructor_dashboard', per_role(0, 5, 7)),
+    case('instructor_analytics', per_role(0, 5, 10)),
+    case('create_certification', per_role(0, 5, 5)),
+    case('edit_certification', per_role(0, 6, 7), args=lambda seed: [seed.certification.pk]),
+    case('delete_certification', per_role(0, 6, 6), args=lambda seed: [seed.certification.pk]),
+    case('create_course', per_role(0, 5, 6)),
+    case('create_course_for_cert', per_role(0, 5, 7), args=lambda seed: [seed.certification.pk]),
+    case('edit_course', per_role(0, 6, 9), args=lambda seed: [seed.course.pk]),
+    case('delete_course', per_role(0, 6, 7), args=lambda seed: [seed.course.pk]),
+    case('create_module', per_role(0, 6, 6), args=lambda seed: [seed.course.pk]),
+    case('edit_module', per_role(0, 6, 7), args=lambda seed: [seed.module.pk]),
+    case('edit_module', per_role(0, 6, 18), args=lambda seed: [seed.module.pk], method='post',
+         data=lambda seed: {
+             'title': 'Renamed module', 'module_type': 'text', 'order': 1,
+             'text_content': 'Updated', 'video_duration': 0,
+         }),
+    case('delete_module', per_role(0, 6, 7), args=lambda seed: [seed.module.pk]),
+]
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='perf-media-'))
+class ViewPerformanceTests(TestCase):
+    """
+    Query budgets and wall-clock timings for every URL as an anonymous user,
+    a learner and an instructor, against a realistically sized catalogue.
+    Each request runs in a rolled-back transaction, so cases don't affect
+    each other.
+    """
+
+    timings = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user(
+            username='instructor', password='instructor-pass-123', role=User.ROLE_INSTRUCTOR
+        )
+        cls.learner = User.objects.create_user(
+            username='learner', password=LEARNER_PASSWORD, first_name='Ada', last_name='Learner'
+        )
+
+        certifications = ProfessionalCertification.objects.bulk_create([
+            ProfessionalCertification(
+                title=f'Certification {c}', description='Seeded certification', created_by=cls.instructor
+            )
+            for c in range(SEED_CERTIFICATIONS)
+        ])
+        courses = Course.objects.bulk_create([
+            Course(
+                certification=certification, title=f'{certification.title} / Course {n}',
+                description='Seeded course', order=n, created_by=cls.instructor
+            )
+            for certification in certifications
+            for n in range(SEED_COURSES_PER_CERTIFICATION)
+        ])
+        modules = Module.objects.bulk_create([
+            Module(
+                course=course, title=f'{course.title} / Module {n}', order=n,
+                module_type='video' if n % 4 == 3 else 'text',
+                video_duration=300 if n % 4 == 3 else 0,
+                text_content='Lorem ipsum dolor sit amet. ' * 200,
+            )
+            for course in courses
+            for n in range(SEED_MODULES_PER_COURSE)
+        ])
+
+        # Enrolled in all but the last certification; the first one is
+        # finished, every other course is half done
+        CertificationEnrollment.objects.bulk_create([
+            CertificationEnrollment(user=cls.learner, certification=certification)
+            for certification in certifications[:-1]
+        ])
+        finished = {course.pk for course in courses[:SEED_COURSES_PER_CERTIFICATION]}
+        ModuleProgress.objects.bulk_create([
+            ModuleProgress(user=cls.learner, module=module, is_completed=True)
+            for module in modules
+            if module.course_id in finished or module.order < SEED_MODULES_PER_COURSE // 2
+        ])
+        rebuild_summaries()
+        issue_missing_certificates()
+        refresh_rollups(now=timezone.now() + watermark_lag())
+
+        cls.certification = certifications[1]
+        cls.open_certification = certifications[-1]
+        cls.course = courses[SEED_COURSES_PER_CERTIFICATION + 1]
+        course_modules = [module for module in modules if module.course_id == cls.course.pk]
+        cls.module = next(
+            module for module in course_modules
+            if module.module_type == 'text' and module.order >= SEED_MODULES_PER_COURSE // 2
+        )
+        cls.video = next(
+            module for module in course_modules
+            if module.module_type == 'video' and module.order >= SEED_MODULES_PER_COURSE // 2
+        )
+        cls.enrollment = CertificationEnrollment.objects.get(user=cls.learner, certification=cls.certification)
+        cls.course_certificate = CourseCertificate.objects.filter(user=cls.learner).first()
+        cls.professional_certificate = ProfessionalCertificationCertificate.objects.get(user=cls.learner)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        if PERF_UPDATE_BASELINE or not PERF_BASELINE.exists():
+            PERF_BASELINE.write_text(json.dumps(cls.timings, indent=2, sort_keys=True) + '\n')
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, role):
+        self.client.logout()
+        if role == LEARNER:
+            self.client.force_login(self.learner)
+        elif role == INSTRUCTOR:
+            self.client.force_login(self.instructor)
+
+    def request(self, view_case):
+        url = reverse(view_case.url_name, args=view_case.args(self))
+        data = view_case.data(self) if view_case.data else None
+        if view_case.method == 'get':
+            return self.client.get(url, data)
+        if isinstance(data, str):
+            return self.client.post(url, data, content_type='application/json')
+        return self.client.post(url, data or {})
+
+    def measure(self, role, view_case):
+        """Query count and fastest wall-clock time (ms) of one case, rolled back"""
+        self.login(role)
+        # GETs are measured with warm caches, as most requests see them;
+        # logging out is not repeatable, so it is measured once
+        repeats = PERF_REPEATS if view_case.method == 'get' and view_case.url_name != 'logout' else 1
+
+        with transaction.atomic():
+            if repeats > 1:
+                self.request(view_case)
+            # Keep collections of earlier tests' garbage out of the timings
+            gc.collect()
+            gc.disable()
+            try:
+                best = None
+                for _ in range(repeats):
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        response = self.request(view_case)
+                        elapsed = (time.perf_counter() - started) * 1000
+                    best = elapsed if best is None else min(best, elapsed)
+            finally:
+                gc.enable()
+            transaction.set_rollback(True)
+
+        cache.clear()
+        self.assertLess(response.status_code, 500)
+        return queries, best
+
+    def check_role(self, role):
+        baseline = json.loads(PERF_BASELINE.read_text()) if PERF_BASELINE.exists() else {}
+        check_timings = not PERF_UPDATE_BASELINE
+
+        for view_case in VIEW_CASES:
+            key = f'{role}: {view_case.label}'
+            with self.subTest(key):
+                queries, elapsed = self.measure(role, view_case)
+                budget = view_case.budgets[role]
+                self.timings[key] = {'queries': len(queries), 'ms': round(elapsed, 2)}
+
+                self.assertLessEqual(
+                    len(queries), budget,
+                    f'{key} ran {len(queries)} queries (budget {budget}):\n' +
+                    '\n'.join(query['sql'] for query in queries.captured_queries)
+                )
+                if view_case.url_name not in LESSON_BODY_VIEWS:
+                    self.assertEqual(
+                        [query['sql'] for query in queries.captured_queries
+                         if '"modules"."text_content"' in query['sql']], [],
+                        f'{key} loaded lesson bodies'
+                    )
+                if check_timings and key in baseline:
+                    limit = baseline[key]['ms'] * PERF_TOLERANCE + PERF_SLACK_MS
+                    self.assertLessEqual(
+                        elapsed, limit,
+                        f'{key} took {elapsed:.1f} ms, baseline {baseline[key]["ms"]:.1f} ms'
+                    )
+
+    def test_anonymous_views(self):
+        self.check_role(ANONYMOUS)
+
+    def test_learner_views(self):
+        self.check_role(LEARNER)
+
+    def test_instructor_views(self):
+        self.check_role(INSTRUCTOR)
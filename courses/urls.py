@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, async_views
+
+# Under ASGI the hot AJAX progress endpoints run as native async views
+progress_views = async_views if settings.ASYNC_PROGRESS_VIEWS else views
 
 urlpatterns = [
     # =====================================
@@ -13,7 +17,9 @@ urlpatterns = [
     # MAIN PAGES
     # =====================================
     path('', views.home, name='home'),
+    path('healthz', views.healthz, name='healthz'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/more/', views.more_certifications, name='more_certifications'),
 
     # =====================================
     # USER PROFILE MANAGEMENT
@@ -25,6 +31,7 @@ urlpatterns = [
     # ENROLLMENTS
     # =====================================
     path('my-enrollments/', views.my_enrollments, name='my_enrollments'),
+    path('my-enrollments/more/', views.more_enrollments, name='more_enrollments'),
     path('certification/<int:pk>/enroll/', views.enroll_certification, name='enroll_certification'),
     path('certification/<int:pk>/unenroll/', views.unenroll_certification, name='unenroll_certification'),
 
@@ -35,11 +42,18 @@ urlpatterns = [
     path('course/<int:pk>/', views.course_detail, name='course_detail'),
     path('module/<int:pk>/', views.module_view, name='module_view'),
 
+    # =====================================
+    # SEARCH
+    # =====================================
+    path('search/', views.search, name='search'),
+    path('api/search/', views.api_search, name='api_search'),
+
     # =====================================
     # AJAX PROGRESS TRACKING
     # =====================================
-    path('module/<int:pk>/complete/', views.mark_module_complete, name='mark_module_complete'),
-    path('module/<int:pk>/video-progress/', views.update_video_progress, name='update_video_progress'),
+    path('module/<int:pk>/complete/', progress_views.mark_module_complete, name='mark_module_complete'),
+    path('module/<int:pk>/video-progress/', progress_views.update_video_progress, name='update_video_progress'),
+    path('progress/sync/', views.sync_progress, name='sync_progress'),
 
     # =====================================
     # CERTIFICATE DOWNLOADS
@@ -47,10 +61,19 @@ urlpatterns = [
     path('certificate/course/<int:pk>/download/', views.download_course_certificate, name='download_course_certificate'),
     path('certificate/professional/<int:pk>/download/', views.download_professional_certificate, name='download_professional_certificate'),
 
+    # =====================================
+    # PUBLIC CERTIFICATE VERIFICATION
+    # =====================================
+    path('verify/', views.verify_certificate, name='verify_certificate'),
+    path('verify/<str:certificate_id>/', views.verify_certificate, name='verify_certificate_id'),
+    path('api/certificates/verify/', views.api_verify_certificates, name='api_verify_certificates'),
+    path('api/certificates/verify/<str:certificate_id>/', views.api_verify_certificate, name='api_verify_certificate'),
+
     # =====================================
     # INSTRUCTOR: DASHBOARD
     # =====================================
     path('instructor/', views.instructor_dashboard, name='instructor_dashboard'),
+    path('instructor/analytics/', views.instructor_analytics, name='instructor_analytics'),
 
     # =====================================
     # INSTRUCTOR: CERTIFICATION MANAGEMENT
@@ -0,0 +1,160 @@
+"""
+Public certificate verification.
+
+Employers check a certificate by its id (CERT-... for courses, PROF-... for
+professional certifications). Lookups go through the unique certificate_id
+index of both certificate tables in a single UNION query, and every result,
+including "not found", is cached in the 'shared' cache so that every worker
+sees the same answer. Certificates never change after issuance, so found
+results are kept for a day; the cache entry is dropped when a certificate is
+deleted (revoked) or its holder renames themselves (see signals.py), and
+when issuance inserts a certificate.
+
+Public responses may be reused by browsers and proxies for HTTP_MAX_AGE
+seconds only, and carry an ETag of the result so that they can be
+revalidated cheaply afterwards.
+"""
+import hashlib
+import json
+import re
+
+from django.core.cache import caches
+from django.db.models import F, Value
+
+from .models import CourseCertificate, ProfessionalCertificationCertificate
+
+CERTIFICATE_ID_RE = re.compile(r'^(CERT|PROF)-[0-9A-F]{12}$')
+
+MAX_VERIFY_BATCH = 500
+
+# Seconds to keep verification results in the shared cache
+VERIFIED_TIMEOUT = 60 * 60 * 24
+NOT_FOUND_TIMEOUT = 60 * 5
+
+# Seconds HTTP caches may serve a result before revalidating; bounds how
+# long a revoked certificate can still show as valid to them
+HTTP_MAX_AGE = 60
+
+CACHE_KEY_PREFIX = 'certificate-verify:'
+
+# Certificate model and the field holding the title per id prefix
+CERTIFICATE_TYPES = {
+    'CERT': ('course', CourseCertificate, 'course__title'),
+    'PROF': ('professional', ProfessionalCertificationCertificate, 'certification__title'),
+}
+
+
+def normalize_certificate_id(raw):
+    """Canonical form of a certificate id, or None if it cannot be one"""
+    if not isinstance(raw, str):
+        return None
+    certificate_id = raw.strip().upper()
+    if not CERTIFICATE_ID_RE.match(certificate_id):
+        return None
+    return certificate_id
+
+
+def _cache():
+    return caches['shared']
+
+
+def _cache_key(certificate_id):
+    return f'{CACHE_KEY_PREFIX}{certificate_id}'
+
+
+def record_etag(record):
+    """ETag of a verification record (or list of them)"""
+    digest = hashlib.md5(json.dumps(record, sort_keys=True).encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+def _holder_name(row):
+    return f"{row['first_name']} {row['last_name']}".strip() or row['username']
+
+
+def _lookup(certificate_ids):
+    """Verification records for existing ids, from one query over both tables"""
+    queries = []
+    for prefix, (kind, model, title_field) in CERTIFICATE_TYPES.items():
+        ids = [certificate_id for certificate_id in certificate_ids if certificate_id.startswith(prefix)]
+        if not ids:
+            continue
+        queries.append(
+            model.objects.filter(certificate_id__in=ids).order_by().values(
+                'certificate_id',
+                'issued_at',
+                kind=Value(kind),
+                title=F(title_field),
+                first_name=F('user__first_name'),
+                last_name=F('user__last_name'),
+                username=F('user__username'),
+            )
+        )
+    if not queries:
+        return {}
+
+    rows = queries[0].union(*queries[1:], all=True) if len(queries) > 1 else queries[0]
+    return {
+        row['certificate_id']: {
+            'certificate_id': row['certificate_id'],
+            'valid': True,
+            'type': row['kind'],
+            'holder': _holder_name(row),
+            'title': row['title'],
+            'issued_at': row['issued_at'].isoformat(),
+        }
+        for row in rows
+    }
+
+
+def not_found(certificate_id):
+    return {'certificate_id': certificate_id, 'valid': False}
+
+
+def verify_certificates(certificate_ids):
+    """
+    Verify normalized certificate ids.
+
+    Returns a dict mapping every id to its verification record; unknown ids
+    map to a record with valid=False.
+    """
+    cache = _cache()
+    certificate_ids = set(certificate_ids)
+    cached = cache.get_many([_cache_key(certificate_id) for certificate_id in certificate_ids])
+    results = {
+        certificate_id: cached[_cache_key(certificate_id)]
+        for certificate_id in certificate_ids
+        if _cache_key(certificate_id) in cached
+    }
+
+    missing = certificate_ids - results.keys()
+    if missing:
+        found = _lookup(missing)
+        unknown = {certificate_id: not_found(certificate_id) for certificate_id in missing - found.keys()}
+        cache.set_many(
+            {_cache_key(certificate_id): record for certificate_id, record in found.items()},
+            VERIFIED_TIMEOUT
+        )
+        cache.set_many(
+            {_cache_key(certificate_id): record for certificate_id, record in unknown.items()},
+            NOT_FOUND_TIMEOUT
+        )
+        results.update(found)
+        results.update(unknown)
+    return results
+
+
+def verify_certificate(certificate_id):
+    return verify_certificates([certificate_id])[certificate_id]
+
+
+def invalidate_certificates(certificate_ids):
+    _cache().delete_many([_cache_key(certificate_id) for certificate_id in certificate_ids])
+
+
+def invalidate_user_certificates(user_id):
+    """Drop cached results that show this user's name"""
+    certificate_ids = []
+    for kind, model, title_field in CERTIFICATE_TYPES.values():
+        certificate_ids += model.objects.filter(user_id=user_id).values_list('certificate_id', flat=True)
+    invalidate_certificates(certificate_ids)
@@ -1,20 +1,16 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.contrib.auth import login, authenticate, logout as auth_logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
-from django.views.decorators.http import require_POST, require_GET
-from django.db.models import Count, Q
+from django.http import JsonResponse, HttpResponse, Http404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST, require_GET, require_safe
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.db.models import Q
 from django.utils import timezone
 from django.conf import settings
-import uuid
-import io
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.units import inch
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+import json
 import cloudinary.uploader
 
 from .models import (
@@ -22,16 +18,47 @@ from .models import (
     Module, ModuleProgress, CourseCertificate,
     ProfessionalCertificationCertificate, CertificationEnrollment
 )
+from .progress import (
+    build_progress, apply_video_heartbeat, progress_version, completed_by_last_module,
+    PROGRESS_MODULE_FIELDS
+)
+from .heartbeats import get_heartbeat_buffer
+from .access import record_access
+from .sync import apply_progress_events, MAX_EVENTS_PER_BATCH
+from .certificates import (
+    certificate_download_response, render_course_certificate, render_professional_certificate
+)
+from .issuance import issue_certification_certificates
+from .outline import get_course_outline
+from .pagecache import cache_anonymous_page
+from .catalog import (
+    certification_page, dashboard_catalog, get_active_certification,
+    instructor_catalog, catalog_version
+)
+from .pagination import keyset_page, InvalidCursor
+from .analytics import course_analytics, last_refreshed
+from .search import search_catalog, DEFAULT_LIMIT, MAX_RESULTS, MAX_QUERY_LENGTH
+from .verification import (
+    normalize_certificate_id, verify_certificate as lookup_certificate, verify_certificates,
+    not_found, record_etag, MAX_VERIFY_BATCH, HTTP_MAX_AGE
+)
+
 
+@require_safe
+def healthz(request):
+    """Liveness check for the load balancer; touches neither the database nor the session"""
+    return HttpResponse('ok', content_type='text/plain')
 
+
+@cache_anonymous_page
 def home(request):
     """Homepage with project details and group members"""
     group_members = GroupMember.objects.all().select_related('user')
-    certifications = ProfessionalCertification.objects.filter(is_active=True)[:3]
 
     context = {
         'group_members': group_members,
-        'certifications': certifications,
+        'certifications': certification_page(limit=3).items,
+        'catalog_version': catalog_version(),
     }
     return render(request, 'courses/home.html', context)
 
@@ -119,28 +146,44 @@ def user_logout(request):
     return redirect('home')
 
 
-@login_required
-def dashboard(request):
-    """User dashboard showing certifications and progress"""
-    certifications = ProfessionalCertification.objects.filter(is_active=True).prefetch_related('courses')
-
-    # Get user's progress for each certification
+def _certification_data(user, certifications):
+    """Dashboard cards for certifications, with the user's progress computed in one batch"""
+    report = build_progress(user, certifications=certifications)
     certification_data = []
     for cert in certifications:
-        progress = cert.get_user_progress(request.user)
-        is_completed = cert.is_completed_by_user(request.user)
+        cert_progress = report.certification(cert)
 
         certification_data.append({
             'certification': cert,
-            'progress': progress,
-            'is_completed': is_completed,
+            'progress': cert_progress.percent,
+            'is_completed': cert_progress.is_completed,
             'total_courses': cert.get_total_courses()
         })
+    return certification_data
+
+
+def _page_response(request, template_name, context, page):
+    """JSON for a "load more" request: the next page's rendered cards and cursor"""
+    return JsonResponse({
+        'success': True,
+        'html': render_to_string(template_name, context, request=request),
+        'next_cursor': page.next_cursor,
+    })
+
 
-    # Get recent activity
+@login_required
+def dashboard(request):
+    """User dashboard showing certifications and progress"""
+    # Only the first page of certifications; the rest load on demand
+    page, certification_count = dashboard_catalog()
+    certification_data = _certification_data(request.user, page.items)
+
+    # Get recent activity; it shows titles only, so lesson and course bodies stay in the database
     recent_progress = ModuleProgress.objects.filter(
         user=request.user
-    ).select_related('module', 'module__course').order_by('-last_accessed')[:5]
+    ).select_related('module', 'module__course').defer(
+        'module__text_content', 'module__course__description'
+    ).order_by('-last_accessed')[:5]
 
     # Get certificates
     course_certificates = CourseCertificate.objects.filter(user=request.user).select_related('course')
@@ -150,6 +193,8 @@ def dashboard(request):
 
     context = {
         'certification_data': certification_data,
+        'next_cursor': page.next_cursor,
+        'certification_count': certification_count,
         'recent_progress': recent_progress,
         'course_certificates': course_certificates,
         'professional_certificates': professional_certificates,
@@ -157,36 +202,51 @@ def dashboard(request):
     return render(request, 'courses/dashboard.html', context)
 
 
+@login_required
+@require_GET
+def more_certifications(request):
+    """Next page of dashboard certifications"""
+    try:
+        page = certification_page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+
+    context = {'certification_data': _certification_data(request.user, page.items)}
+    return _page_response(request, 'courses/partials/certification_cards.html', context, page)
+
+
 @login_required
 def certification_detail(request, pk):
     """Detail view of a professional certification"""
-    certification = get_object_or_404(ProfessionalCertification, pk=pk, is_active=True)
-    courses = certification.courses.filter(is_active=True).prefetch_related('modules')
+    certification = get_active_certification(pk)
+    if certification is None:
+        raise Http404
+    courses = certification.active_courses
 
-    # Get progress for each course
+    # Get progress for the certification and each of its courses in one batch
+    report = build_progress(request.user, certifications=[certification])
     course_data = []
     for course in courses:
-        progress = course.get_user_progress(request.user)
-        is_completed = course.is_completed_by_user(request.user)
+        course_progress = report.course(course)
 
         course_data.append({
             'course': course,
-            'progress': progress,
-            'is_completed': is_completed,
-            'total_modules': course.get_total_modules()
+            'progress': course_progress.percent,
+            'is_completed': course_progress.is_completed,
+            'total_modules': course_progress.total_modules
         })
 
-    overall_progress = certification.get_user_progress(request.user)
-    is_certification_complete = certification.is_completed_by_user(request.user)
+    cert_progress = report.certification(certification)
+    overall_progress = cert_progress.percent
+    is_certification_complete = cert_progress.is_completed
 
-    # Check if professional certificate exists
+    # Certificates are issued when the last course is completed
     professional_certificate = None
     if is_certification_complete:
-        professional_certificate, created = ProfessionalCertificationCertificate.objects.get_or_create(
+        professional_certificate = ProfessionalCertificationCertificate.objects.filter(
             user=request.user,
-            certification=certification,
-            defaults={'certificate_id': f'PROF-{uuid.uuid4().hex[:12].upper()}'}
-        )
+            certification=certification
+        ).first()
 
     context = {
         'certification': certification,
@@ -202,36 +262,28 @@ def certification_detail(request, pk):
 def course_detail(request, pk):
     """Detail view of a course"""
     course = get_object_or_404(Course, pk=pk, is_active=True)
-    modules = course.modules.filter(is_active=True)
+    modules = get_course_outline(course.pk).active
 
-    # Get progress for each module
+    # Progress for every module and the course itself in one query
+    progress_map = course.progress_map_for(request.user, modules)
     module_data = []
     for module in modules:
-        try:
-            progress = ModuleProgress.objects.get(user=request.user, module=module)
-        except ModuleProgress.DoesNotExist:
-            progress = None
-
+        progress = progress_map.module(module)
         module_data.append({
             'module': module,
             'progress': progress,
-            'is_completed': progress.is_completed if progress else False
+            'is_completed': progress.is_completed
         })
 
-    course_progress = course.get_user_progress(request.user)
-    is_course_complete = course.is_completed_by_user(request.user)
+    course_progress = progress_map.course.percent
+    is_course_complete = progress_map.course.is_completed
 
-    # Check if course certificate exists
+    # Certificates are issued when the course is completed; celebrate when
+    # the module page sends the learner here right after that happened
     course_certificate = None
-    show_confetti = False
     if is_course_complete:
-        course_certificate, created = CourseCertificate.objects.get_or_create(
-            user=request.user,
-            course=course,
-            defaults={'certificate_id': f'CERT-{uuid.uuid4().hex[:12].upper()}'}
-        )
-        if created:
-            show_confetti = True
+        course_certificate = CourseCertificate.objects.filter(user=request.user, course=course).first()
+    show_confetti = course_certificate is not None and request.GET.get('completed') == '1'
 
     context = {
         'course': course,
@@ -247,24 +299,23 @@ def course_detail(request, pk):
 @login_required
 def module_view(request, pk):
     """View a specific module"""
-    module = get_object_or_404(Module, pk=pk, is_active=True)
-
-    # Get or create progress
-    progress, created = ModuleProgress.objects.get_or_create(
-        user=request.user,
-        module=module
-    )
+    module = get_object_or_404(Module.objects.select_related('course'), pk=pk, is_active=True)
 
-    # Get next and previous modules
-    all_modules = module.course.modules.filter(is_active=True).order_by('order')
-    current_index = list(all_modules).index(module)
+    # Viewing is a pure read: the row is created by the first real progress
+    # event, and last_accessed is touched in throttled batches
+    progress = ModuleProgress.objects.filter(user=request.user, module=module).first()
+    if progress is None:
+        progress = ModuleProgress(user=request.user, module=module)
+    else:
+        record_access(progress)
 
-    next_module = all_modules[current_index + 1] if current_index < len(all_modules) - 1 else None
-    prev_module = all_modules[current_index - 1] if current_index > 0 else None
+    # Get next and previous modules from the cached course outline
+    prev_module, next_module = get_course_outline(module.course_id).neighbours(module.pk)
 
     context = {
         'module': module,
         'progress': progress,
+        'progress_version': progress_version(module.pk, progress.is_completed),
         'next_module': next_module,
         'prev_module': prev_module,
         'course': module.course,
@@ -272,228 +323,148 @@ def module_view(request, pk):
     return render(request, 'courses/module_view.html', context)
 
 
+def _progress_response(request, module, is_completed, changed, **data):
+    """
+    JSON response for the AJAX progress endpoints.
+
+    Course-level progress is only computed when this request changed the
+    module's completion state; otherwise the response stays compact. The
+    version lets the client skip reloading when nothing changed.
+    """
+    version = progress_version(module.pk, is_completed)
+    data.update({
+        'success': True,
+        'changed': changed,
+        'is_completed': is_completed,
+        'version': version,
+    })
+
+    if changed:
+        course_progress = build_progress(request.user, courses=[module.course_id]).course(module.course_id)
+        data['course_progress'] = course_progress.percent
+        data['is_course_complete'] = course_progress.is_completed
+        data['course_just_completed'] = completed_by_last_module(course_progress)
+
+    response = JsonResponse(data)
+    response['ETag'] = f'"{version}"'
+    return response
+
+
 @login_required
 @require_POST
 def mark_module_complete(request, pk):
     """Mark a text/picture module as complete (AJAX)"""
-    module = get_object_or_404(Module, pk=pk)
+    module = get_object_or_404(Module.objects.only(*PROGRESS_MODULE_FIELDS), pk=pk)
 
     # Only allow for text and picture modules
     if module.module_type not in ['text', 'picture', 'text_picture']:
         return JsonResponse({'success': False, 'error': 'Invalid module type'}, status=400)
 
+    # A first completion is a single INSERT of a completed row
     progress, created = ModuleProgress.objects.get_or_create(
         user=request.user,
-        module=module
+        module=module,
+        defaults={'is_completed': True, 'completed_at': timezone.now()}
     )
 
+    changed = created or not progress.is_completed
     if not progress.is_completed:
+        progress.module = module
         progress.mark_as_completed()
 
-    # Check course completion
-    course_progress = module.course.get_user_progress(request.user)
-    is_course_complete = module.course.is_completed_by_user(request.user)
-
-    return JsonResponse({
-        'success': True,
-        'is_completed': progress.is_completed,
-        'course_progress': course_progress,
-        'is_course_complete': is_course_complete
-    })
+    return _progress_response(request, module, progress.is_completed, changed)
 
 
 @login_required
 @require_POST
 def update_video_progress(request, pk):
     """Update video watch progress (AJAX)"""
-    module = get_object_or_404(Module, pk=pk)
+    module = get_object_or_404(Module.objects.only(*PROGRESS_MODULE_FIELDS), pk=pk)
 
     if module.module_type != 'video':
         return JsonResponse({'success': False, 'error': 'Invalid module type'}, status=400)
 
     watch_time = int(request.POST.get('watch_time', 0))
 
-    progress, created = ModuleProgress.objects.get_or_create(
-        user=request.user,
-        module=module
-    )
-
-    progress.update_video_progress(watch_time)
+    # Write-behind mode: coalesce heartbeats that cannot complete the module
+    heartbeat_buffer = get_heartbeat_buffer()
+    if heartbeat_buffer is not None:
+        is_completed, stored_watch_time = ModuleProgress.objects.filter(
+            user=request.user, module=module
+        ).values_list('is_completed', 'video_watch_time').first() or (False, 0)
+        if heartbeat_buffer.offer(request.user.pk, module, watch_time, is_completed):
+            # Report the stored state and the furthest position, not this heartbeat's
+            progress = ModuleProgress(
+                user=request.user,
+                module=module,
+                is_completed=is_completed,
+                video_watch_time=heartbeat_buffer.pending_watch_time(
+                    request.user.pk, module.pk, max(watch_time, stored_watch_time)
+                )
+            )
+            return _progress_response(
+                request, module, progress.is_completed, False,
+                progress_percentage=progress.get_progress_percentage(), buffered=True
+            )
+        watch_time = heartbeat_buffer.take(request.user.pk, module.pk, watch_time)
 
-    # Check course completion
-    course_progress = module.course.get_user_progress(request.user)
-    is_course_complete = module.course.is_completed_by_user(request.user)
+    # One conditional UPDATE; returns the stored state without re-reading
+    progress, just_completed = apply_video_heartbeat(request.user, module, watch_time)
 
-    return JsonResponse({
-        'success': True,
-        'is_completed': progress.is_completed,
-        'progress_percentage': progress.get_progress_percentage(),
-        'course_progress': course_progress,
-        'is_course_complete': is_course_complete
-    })
+    return _progress_response(
+        request, module, progress.is_completed, just_completed,
+        progress_percentage=progress.get_progress_percentage(), buffered=False
+    )
 
 
 @login_required
-def download_course_certificate(request, pk):
-    """Generate and download course certificate"""
-    certificate = get_object_or_404(CourseCertificate, pk=pk, user=request.user)
-
-    # Create PDF
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    # Draw border
-    c.setStrokeColor(colors.HexColor('#2563eb'))
-    c.setLineWidth(3)
-    c.rect(40, 40, width - 80, height - 80)
-
-    # Title
-    c.setFont("Helvetica-Bold", 36)
-    c.setFillColor(colors.HexColor('#1e40af'))
-    c.drawCentredString(width / 2, height - 120, "Certificate of Completion")
-
-    # Decorative line
-    c.setStrokeColor(colors.HexColor('#60a5fa'))
-    c.setLineWidth(2)
-    c.line(150, height - 140, width - 150, height - 140)
-
-    # Body text
-    c.setFont("Helvetica", 16)
-    c.setFillColor(colors.black)
-    c.drawCentredString(width / 2, height - 200, "This is to certify that")
-
-    c.setFont("Helvetica-Bold", 28)
-    c.setFillColor(colors.HexColor('#1e40af'))
-    c.drawCentredString(width / 2, height - 250, certificate.user.get_full_name())
-
-    c.setFont("Helvetica", 16)
-    c.setFillColor(colors.black)
-    c.drawCentredString(width / 2, height - 300, "has successfully completed the course")
-
-    c.setFont("Helvetica-Bold", 22)
-    c.setFillColor(colors.HexColor('#1e40af'))
-
-    # Wrap long course titles
-    course_title = certificate.course.title
-    if len(course_title) > 50:
-        words = course_title.split()
-        lines = []
-        current_line = []
-        for word in words:
-            current_line.append(word)
-            if len(' '.join(current_line)) > 50:
-                current_line.pop()
-                lines.append(' '.join(current_line))
-                current_line = [word]
-        if current_line:
-            lines.append(' '.join(current_line))
-
-        y_pos = height - 350
-        for line in lines:
-            c.drawCentredString(width / 2, y_pos, line)
-            y_pos -= 30
-    else:
-        c.drawCentredString(width / 2, height - 350, course_title)
-
-    # Date and certificate ID
-    c.setFont("Helvetica", 12)
-    c.setFillColor(colors.HexColor('#6b7280'))
-    c.drawCentredString(width / 2, 150, f"Issued on: {certificate.issued_at.strftime('%B %d, %Y')}")
-    c.drawCentredString(width / 2, 130, f"Certificate ID: {certificate.certificate_id}")
-
-    # Footer
-    c.setFont("Helvetica-Oblique", 10)
-    c.drawCentredString(width / 2, 80, "Learning Platform - Excellence in Education")
+@require_POST
+def sync_progress(request):
+    """Apply a batch of queued progress events in one request (AJAX/JSON)"""
+    try:
+        events = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+
+    if not isinstance(events, list):
+        return JsonResponse({'success': False, 'error': 'Expected a list of events'}, status=400)
+
+    if len(events) > MAX_EVENTS_PER_BATCH:
+        return JsonResponse(
+            {'success': False, 'error': f'At most {MAX_EVENTS_PER_BATCH} events per request'},
+            status=400
+        )
 
-    c.save()
+    result = apply_progress_events(request.user, events)
+    return JsonResponse({'success': True, **result})
 
-    buffer.seek(0)
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="certificate_{certificate.certificate_id}.pdf"'
 
-    return response
+@login_required
+def download_course_certificate(request, pk):
+    """Download course certificate (rendered once, then served from storage)"""
+    certificate = get_object_or_404(
+        CourseCertificate.objects.select_related('user', 'course'),
+        pk=pk,
+        user=request.user
+    )
+    return certificate_download_response(
+        request, certificate, render_course_certificate,
+        f'certificate_{certificate.certificate_id}.pdf'
+    )
 
 
 @login_required
 def download_professional_certificate(request, pk):
-    """Generate and download professional certification certificate"""
-    certificate = get_object_or_404(ProfessionalCertificationCertificate, pk=pk, user=request.user)
-
-    # Create PDF
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    # Draw border
-    c.setStrokeColor(colors.HexColor('#059669'))
-    c.setLineWidth(4)
-    c.rect(40, 40, width - 80, height - 80)
-
-    # Inner border
-    c.setStrokeColor(colors.HexColor('#10b981'))
-    c.setLineWidth(2)
-    c.rect(50, 50, width - 100, height - 100)
-
-    # Title
-    c.setFont("Helvetica-Bold", 32)
-    c.setFillColor(colors.HexColor('#065f46'))
-    c.drawCentredString(width / 2, height - 100, "Professional Certification")
-
-    # Decorative line
-    c.setStrokeColor(colors.HexColor('#34d399'))
-    c.setLineWidth(2)
-    c.line(150, height - 120, width - 150, height - 120)
-
-    # Body text
-    c.setFont("Helvetica", 16)
-    c.setFillColor(colors.black)
-    c.drawCentredString(width / 2, height - 170, "This is to certify that")
-
-    c.setFont("Helvetica-Bold", 26)
-    c.setFillColor(colors.HexColor('#065f46'))
-    c.drawCentredString(width / 2, height - 210, certificate.user.get_full_name())
-
-    c.setFont("Helvetica", 16)
-    c.setFillColor(colors.black)
-    c.drawCentredString(width / 2, height - 250, "has successfully completed the professional certification")
-
-    c.setFont("Helvetica-Bold", 20)
-    c.setFillColor(colors.HexColor('#065f46'))
-    c.drawCentredString(width / 2, height - 290, certificate.certification.title)
-
-    # Courses completed
-    c.setFont("Helvetica", 14)
-    c.setFillColor(colors.black)
-    c.drawCentredString(width / 2, height - 330, "Including completion of the following courses:")
-
-    courses = certificate.certification.courses.filter(is_active=True).order_by('order')
-    y_pos = height - 370
-    c.setFont("Helvetica", 11)
-
-    for i, course in enumerate(courses, 1):
-        if y_pos < 200:  # Prevent overflow
-            break
-        c.drawCentredString(width / 2, y_pos, f"{i}. {course.title}")
-        y_pos -= 20
-
-    # Date and certificate ID
-    c.setFont("Helvetica", 12)
-    c.setFillColor(colors.HexColor('#6b7280'))
-    c.drawCentredString(width / 2, 130, f"Issued on: {certificate.issued_at.strftime('%B %d, %Y')}")
-    c.drawCentredString(width / 2, 110, f"Certificate ID: {certificate.certificate_id}")
-
-    # Footer
-    c.setFont("Helvetica-Oblique", 10)
-    c.drawCentredString(width / 2, 70, "Learning Platform - Professional Excellence")
-
-    c.save()
-
-    buffer.seek(0)
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="professional_certificate_{certificate.certificate_id}.pdf"'
-
-    return response
+    """Download professional certification certificate (rendered once, then served from storage)"""
+    certificate = get_object_or_404(
+        ProfessionalCertificationCertificate.objects.select_related('user', 'certification'),
+        pk=pk,
+        user=request.user
+    )
+    return certificate_download_response(
+        request, certificate, render_professional_certificate,
+        f'professional_certificate_{certificate.certificate_id}.pdf'
+    )
 
 # =====================================
 # USER PROFILE MANAGEMENT VIEWS
@@ -576,21 +547,33 @@ def instructor_dashboard(request):
         return redirect('dashboard')
 
     # Get instructor's certifications and courses
-    certifications = ProfessionalCertification.objects.filter(
-        created_by=request.user
-    ).annotate(
-        course_count=Count('courses')
-    )
-
-    courses = Course.objects.filter(created_by=request.user).select_related('certification')
+    certifications, courses = instructor_catalog(request.user)
 
     context = {
         'certifications': certifications,
         'courses': courses,
+        'catalog_version': catalog_version(),
     }
     return render(request, 'courses/instructor/dashboard.html', context)
 
 
+@login_required
+def instructor_analytics(request):
+    """Enrollment, activity and module completion figures for an instructor's courses"""
+    if not request.user.can_create_courses():
+        messages.error(request, 'You do not have permission to access this page.')
+        return redirect('dashboard')
+
+    # Read from the rollups kept by the refresh_analytics command, never from ModuleProgress
+    _, courses = instructor_catalog(request.user)
+
+    context = {
+        'course_analytics': course_analytics(courses),
+        'last_refreshed': last_refreshed(),
+    }
+    return render(request, 'courses/instructor/analytics.html', context)
+
+
 @login_required
 def create_certification(request):
     """Create a new professional certification or specialization"""
@@ -739,8 +722,8 @@ def edit_course(request, pk):
         messages.success(request, 'Course updated successfully!')
         return redirect('edit_course', pk=pk)
 
-    # Get modules in this course
-    modules = course.modules.all().order_by('order')
+    # Get modules in this course, including inactive ones
+    modules = get_course_outline(course.pk).entries
 
     # Get user's certifications for dropdown
     certifications = ProfessionalCertification.objects.filter(created_by=request.user)
@@ -838,7 +821,7 @@ def edit_module(request, pk):
 @login_required
 def delete_module(request, pk):
     """Delete a module"""
-    module = get_object_or_404(Module, pk=pk, course__created_by=request.user)
+    module = get_object_or_404(Module.objects.defer('text_content'), pk=pk, course__created_by=request.user)
     course_pk = module.course.pk
 
     if request.method == 'POST':
@@ -872,6 +855,8 @@ def enroll_certification(request, pk):
         user=request.user,
         certification=certification
     )
+    # Courses finished before enrolling may already complete the certification
+    issue_certification_certificates([request.user.pk], [certification.pk])
 
     messages.success(request, f'Successfully enrolled in {certification.title}!')
     return redirect('certification_detail', pk=pk)
@@ -896,28 +881,155 @@ def unenroll_certification(request, pk):
     return redirect('dashboard')
 
 
-@login_required
-def my_enrollments(request):
-    """View all user's enrollments"""
-    enrollments = CertificationEnrollment.objects.filter(
-        user=request.user,
-        is_active=True
-    ).select_related('certification')
+def _enrollment_page(user, cursor=None):
+    return keyset_page(
+        CertificationEnrollment.objects.filter(user=user, is_active=True).select_related('certification'),
+        'enrolled_at', cursor
+    )
+
 
+def _enrollment_data(user, enrollments):
+    """Enrollment cards, with the user's progress computed in one batch"""
+    report = build_progress(
+        user,
+        certifications=[enrollment.certification for enrollment in enrollments]
+    )
     enrollment_data = []
     for enrollment in enrollments:
         cert = enrollment.certification
-        progress = cert.get_user_progress(request.user)
-        is_completed = cert.is_completed_by_user(request.user)
+        cert_progress = report.certification(cert)
 
         enrollment_data.append({
             'enrollment': enrollment,
             'certification': cert,
-            'progress': progress,
-            'is_completed': is_completed,
+            'progress': cert_progress.percent,
+            'is_completed': cert_progress.is_completed,
         })
+    return enrollment_data
+
+
+@login_required
+def my_enrollments(request):
+    """View all user's enrollments"""
+    # Only the first page of enrollments; the rest load on demand
+    page = _enrollment_page(request.user)
 
     context = {
-        'enrollment_data': enrollment_data,
+        'enrollment_data': _enrollment_data(request.user, page.items),
+        'next_cursor': page.next_cursor,
     }
     return render(request, 'courses/my_enrollments.html', context)
+
+
+@login_required
+@require_GET
+def more_enrollments(request):
+    """Next page of the user's enrollments"""
+    try:
+        page = _enrollment_page(request.user, request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+
+    context = {'enrollment_data': _enrollment_data(request.user, page.items)}
+    return _page_response(request, 'courses/partials/enrollment_cards.html', context, page)
+
+
+# =====================================
+# SEARCH
+# =====================================
+
+@login_required
+def search(request):
+    """Search certifications, courses and modules"""
+    query = request.GET.get('q', '').strip()[:MAX_QUERY_LENGTH]
+
+    context = {
+        'query': query,
+        'results': search_catalog(query) if query else [],
+    }
+    return render(request, 'courses/search.html', context)
+
+
+@login_required
+@require_GET
+def api_search(request):
+    """Search results as JSON, for as-you-type suggestions"""
+    query = request.GET.get('q', '').strip()[:MAX_QUERY_LENGTH]
+    try:
+        limit = max(1, min(int(request.GET.get('limit', DEFAULT_LIMIT)), MAX_RESULTS))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid limit'}, status=400)
+
+    results = search_catalog(query, limit) if query else []
+    return JsonResponse({
+        'success': True,
+        'query': query,
+        'results': [hit._asdict() for hit in results],
+    })
+
+
+# =====================================
+# PUBLIC CERTIFICATE VERIFICATION
+# =====================================
+
+
+@require_GET
+def verify_certificate(request, certificate_id=None):
+    """Public page that checks a certificate ID"""
+    raw_id = certificate_id or request.GET.get('id', '')
+    record = None
+    if raw_id:
+        normalized = normalize_certificate_id(raw_id)
+        record = lookup_certificate(normalized) if normalized else not_found(raw_id.strip())
+
+    response = render(request, 'courses/verify_certificate.html', {
+        'certificate_id': raw_id.strip(),
+        'record': record,
+    })
+    if record is not None:
+        patch_cache_control(response, max_age=HTTP_MAX_AGE)
+    return response
+
+
+@require_GET
+def api_verify_certificate(request, certificate_id):
+    """Verify one certificate ID (JSON, public)"""
+    normalized = normalize_certificate_id(certificate_id)
+    record = lookup_certificate(normalized) if normalized else not_found(certificate_id)
+
+    # Short-lived in shared caches, then revalidated against the ETag
+    etag = record_etag(record)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(record, status=200 if record['valid'] else 404)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=HTTP_MAX_AGE)
+    return response
+
+
+@csrf_exempt
+@require_POST
+def api_verify_certificates(request):
+    """Verify up to MAX_VERIFY_BATCH certificate IDs in one request (JSON, public)"""
+    try:
+        payload = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+
+    ids = payload.get('ids') if isinstance(payload, dict) else None
+    if not isinstance(ids, list):
+        return JsonResponse({'success': False, 'error': 'Expected {"ids": [...]}'}, status=400)
+
+    if len(ids) > MAX_VERIFY_BATCH:
+        return JsonResponse(
+            {'success': False, 'error': f'At most {MAX_VERIFY_BATCH} IDs per request'},
+            status=400
+        )
+
+    normalized = [normalize_certificate_id(raw) for raw in ids]
+    records = verify_certificates(certificate_id for certificate_id in normalized if certificate_id)
+    results = [
+        records[certificate_id] if certificate_id else not_found(raw)
+        for raw, certificate_id in zip(ids, normalized)
+    ]
+    return JsonResponse({'success': True, 'results': results})
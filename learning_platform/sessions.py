@@ -0,0 +1,39 @@
+"""
+Sliding session expiry without a session write on every request.
+
+With SESSION_SAVE_EVERY_REQUEST every response saves the session, which
+pushes its expiry SESSION_COOKIE_AGE seconds forward: an UPDATE of
+django_session (db and cached_db engines) or a new cookie (signed_cookies)
+for each request, including the video heartbeat sent every 5 seconds.
+
+When SESSION_REFRESH_INTERVAL is set, settings.py turns
+SESSION_SAVE_EVERY_REQUEST off and ThrottledSessionMiddleware saves an
+otherwise unchanged session only when it was last saved at least that many
+seconds ago, which it tracks in the session itself. Expiry still slides
+with activity; an idle session just expires up to SESSION_REFRESH_INTERVAL
+seconds earlier than it would have, so keep the interval well below
+SESSION_COOKIE_AGE. Sessions that were not used by the request (anonymous
+pages that never touch request.session) or are empty are left alone, as
+before. With SESSION_REFRESH_INTERVAL = 0 it behaves exactly like Django's
+SessionMiddleware.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+
+# Session key holding when the session was last saved (Unix time, seconds)
+REFRESHED_AT_KEY = '_refreshed_at'
+
+
+class ThrottledSessionMiddleware(SessionMiddleware):
+    """SessionMiddleware that refreshes expiry at most once per SESSION_REFRESH_INTERVAL"""
+
+    def process_response(self, request, response):
+        interval = getattr(settings, 'SESSION_REFRESH_INTERVAL', 0)
+        session = request.session
+        if interval > 0 and session.accessed and not session.is_empty():
+            now = int(time.time())
+            if session.modified or now - session.get(REFRESHED_AT_KEY, 0) >= interval:
+                session[REFRESHED_AT_KEY] = now
+        return super().process_response(request, response)
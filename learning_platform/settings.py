@@ -50,7 +50,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "learning_platform.sessions.ThrottledSessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -89,12 +89,18 @@ WSGI_APPLICATION = "learning_platform.wsgi.application"
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 
+# Seconds a worker keeps its database connection open. Persistent
+# connections belong to the thread that opened them, and under ASGI the ORM
+# runs in executor threads, so set CONN_MAX_AGE=0 (or use a connection
+# pooler such as PgBouncer) when serving learning_platform.asgi
+CONN_MAX_AGE = int(os.getenv('CONN_MAX_AGE', '600'))
+
 if DATABASE_URL:
     # Production: Use DATABASE_URL (Render provides this automatically)
     DATABASES = {
         'default': dj_database_url.config(
             default=DATABASE_URL,
-            conn_max_age=600,
+            conn_max_age=CONN_MAX_AGE,
             conn_health_checks=True,
         )
     }
@@ -112,6 +118,43 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Catalogue data and course outlines are cached in 'default'; without
+# REDIS_URL each worker process keeps its own copy. They are stored under
+# version keys kept in the 'shared' cache, which every worker must agree on
+# (see courses/catalog.py), so a change made in one worker invalidates them
+# everywhere. Certificate verification results are kept in 'shared' itself
+# so that a revoked certificate stops verifying on every worker at once.
+# Without REDIS_URL 'shared' is a database table created by
+# `python manage.py createcachetable`.
+
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'learning-platform',
+        },
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'shared_cache',
+        },
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -166,8 +209,30 @@ cloudinary.config(
     secure=True
 )
 
-# Default storage for media files
-DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+# Storage backends by alias. Media files go to Cloudinary when its credentials
+# are set and to MEDIA_ROOT otherwise (local development and tests); WhiteNoise
+# replaces 'staticfiles' in production (see below). Django 5.1 and later read
+# only STORAGES, not DEFAULT_FILE_STORAGE / STATICFILES_STORAGE.
+CLOUDINARY_CONFIGURED = all(
+    os.getenv(name) for name in ('CLOUDINARY_CLOUD_NAME', 'CLOUDINARY_API_KEY', 'CLOUDINARY_API_SECRET')
+)
+
+STORAGES = {
+    'default': {
+        'BACKEND': (
+            'cloudinary_storage.storage.MediaCloudinaryStorage' if CLOUDINARY_CONFIGURED
+            else 'django.core.files.storage.FileSystemStorage'
+        ),
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Storage alias (a key of STORAGES) for rendered certificate PDFs, which are cached
+# per certificate and template version. Any Django storage works; PDFs missing
+# from an ephemeral disk are simply rendered again on the next download.
+CERTIFICATE_STORAGE = os.getenv('CERTIFICATE_STORAGE', 'default')
 
 # Authentication
 LOGIN_URL = '/login/'
@@ -183,8 +248,59 @@ AUTH_USER_MODEL = 'courses.User'
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Session settings
+# Sessions expire SESSION_COOKIE_AGE after the last activity. By default
+# every request saves the session to push that back; with
+# SESSION_REFRESH_INTERVAL it is saved at most once per interval instead
+# (see learning_platform/sessions.py). cached_db reads sessions from the
+# 'shared' cache (worth it with REDIS_URL); signed_cookies keeps them out of
+# the database entirely, but a copied cookie stays valid after logout until
+# it expires.
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'django.contrib.sessions.backends.db')
+SESSION_CACHE_ALIAS = 'shared'
 SESSION_COOKIE_AGE = 86400  # 1 day in seconds
-SESSION_SAVE_EVERY_REQUEST = True
+SESSION_REFRESH_INTERVAL = int(os.getenv('SESSION_REFRESH_INTERVAL', '0'))  # seconds, 0 = every request
+SESSION_SAVE_EVERY_REQUEST = SESSION_REFRESH_INTERVAL == 0
+
+# Serve the AJAX progress endpoints from courses/async_views.py
+# Enable when running under an ASGI server (see DEPLOYMENT.md)
+ASYNC_PROGRESS_VIEWS = os.getenv('ASYNC_PROGRESS_VIEWS', 'False') == 'True'
+
+# Video progress write-behind buffer (see courses/heartbeats.py)
+# When enabled, video heartbeats below the completion threshold are coalesced
+# per user/module and written in bulk instead of on every request
+PROGRESS_WRITE_BEHIND = os.getenv('PROGRESS_WRITE_BEHIND', 'False') == 'True'
+PROGRESS_BUFFER_FLUSH_INTERVAL = int(os.getenv('PROGRESS_BUFFER_FLUSH_INTERVAL', '60'))  # seconds
+PROGRESS_BUFFER_MAX_SIZE = int(os.getenv('PROGRESS_BUFFER_MAX_SIZE', '500'))  # pending user/module pairs
+
+# Module views never write; last_accessed of a learner's progress row is
+# touched at most once per PROGRESS_TOUCH_INTERVAL and written in bulk
+# (see courses/access.py)
+PROGRESS_TOUCH_INTERVAL = int(os.getenv('PROGRESS_TOUCH_INTERVAL', '300'))  # seconds
+PROGRESS_TOUCH_FLUSH_INTERVAL = int(os.getenv('PROGRESS_TOUCH_FLUSH_INTERVAL', '60'))  # seconds
+PROGRESS_TOUCH_MAX_SIZE = int(os.getenv('PROGRESS_TOUCH_MAX_SIZE', '500'))  # pending progress rows
+
+# Server-Timing header and per-request timing log (see learning_platform/timing.py)
+# Measures SQL, template and total time for a sample of requests; queries
+# slower than SERVER_TIMING_SLOW_QUERY_MS are logged with their call site
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'False') == 'True'
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv('SERVER_TIMING_SAMPLE_RATE', '1.0'))  # fraction of requests
+SERVER_TIMING_SLOW_QUERY_MS = float(os.getenv('SERVER_TIMING_SLOW_QUERY_MS', '100'))
+SERVER_TIMING_SLOW_QUERIES = int(os.getenv('SERVER_TIMING_SLOW_QUERIES', '5'))  # logged per request
+
+if SERVER_TIMING:
+    MIDDLEWARE.insert(0, 'learning_platform.timing.ServerTimingMiddleware')
+    TEMPLATES[0]['BACKEND'] = 'learning_platform.timing.TimedDjangoTemplates'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'learning_platform.timing': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
 
 # =====================================
 # RENDER DEPLOYMENT SETTINGS
@@ -195,6 +311,7 @@ SESSION_SAVE_EVERY_REQUEST = True
 if not DEBUG:
     # HTTPS/SSL settings
     SECURE_SSL_REDIRECT = True
+    SECURE_REDIRECT_EXEMPT = [r'^healthz$']  # load balancer health checks may use plain HTTP
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
 
@@ -211,5 +328,5 @@ if not DEBUG:
 # WhiteNoise for static files in production
 # WhiteNoise allows Django to serve static files efficiently
 if not DEBUG:
-    STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+    STORAGES['staticfiles'] = {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'}
     MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
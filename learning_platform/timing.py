@@ -0,0 +1,204 @@
+"""
+Per-request performance instrumentation.
+
+When SERVER_TIMING is enabled, ServerTimingMiddleware measures a sample of
+requests (SERVER_TIMING_SAMPLE_RATE) and reports where the time went:
+
+    sql       number of queries and time spent in them
+    template  time spent rendering templates
+    app       everything else: Python in views, middleware and forms
+    total     the whole request as seen by Django
+
+The numbers are sent back in a Server-Timing header, so they show up in the
+browser's network panel, and written as one log line per request. Queries
+slower than SERVER_TIMING_SLOW_QUERY_MS are logged together with the stack of
+project code that ran them, slowest first.
+
+Queries are timed by an execute wrapper installed on every database
+connection and templates by the TimedDjangoTemplates backend. Both report
+into a context variable that is only set for sampled requests, so unsampled
+requests pay for a single lookup per query and per render. Context variables
+follow sync_to_async, so the async progress views are measured too.
+"""
+import contextvars
+import logging
+import random
+import traceback
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+# Project frames kept for each slow query's call site
+CALL_SITE_DEPTH = 6
+
+_current_timing = contextvars.ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    """Counters for one sampled request"""
+    __slots__ = ('query_count', 'sql_ms', 'template_ms', 'template_depth', 'slow_queries')
+
+    def __init__(self):
+        self.query_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.slow_queries = []
+
+
+def _call_site():
+    """Innermost frames of project code (not Django or third-party packages)"""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and frame.filename != __file__
+        and 'site-packages' not in frame.filename
+    ]
+    return [
+        f'{frame.filename[len(base_dir) + 1:]}:{frame.lineno} in {frame.name}'
+        for frame in frames[-CALL_SITE_DEPTH:]
+    ]
+
+
+def time_query(execute, sql, params, many, context):
+    """Connection execute wrapper that feeds the current request's timing"""
+    timing = _current_timing.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = (perf_counter() - started) * 1000
+        timing.query_count += 1
+        timing.sql_ms += elapsed
+        if elapsed >= settings.SERVER_TIMING_SLOW_QUERY_MS:
+            timing.slow_queries.append((elapsed, sql, _call_site()))
+
+
+def install_query_timer(sender=None, connection=None, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class TimedTemplate(Template):
+    """Template that adds its render time to the current request's timing"""
+
+    def render(self, context=None, request=None):
+        timing = _current_timing.get()
+        if timing is None:
+            return super().render(context, request)
+
+        # Templates rendered while rendering another (render_to_string in a
+        # template tag) are already inside the outer measurement
+        timing.template_depth += 1
+        started = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timing.template_depth -= 1
+            if timing.template_depth == 0:
+                timing.template_ms += (perf_counter() - started) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose templates report their render time"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class ServerTimingMiddleware:
+    """Report SQL, template and total time of sampled requests (see module docstring)"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.SERVER_TIMING_SAMPLE_RATE
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        connection_created.connect(install_query_timer, dispatch_uid='server_timing_query_timer')
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection=connection)
+
+    def _sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timing.reset(token)
+        return self._report(request, response, timing, started)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+        started = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_timing.reset(token)
+        return self._report(request, response, timing, started)
+
+    def _report(self, request, response, timing, started):
+        total_ms = (perf_counter() - started) * 1000
+        app_ms = max(total_ms - timing.sql_ms - timing.template_ms, 0.0)
+
+        response['Server-Timing'] = ', '.join([
+            f'sql;dur={timing.sql_ms:.1f};desc="{timing.query_count} queries"',
+            f'template;dur={timing.template_ms:.1f}',
+            f'app;dur={app_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        view = request.resolver_match.view_name if request.resolver_match else ''
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'queries': timing.query_count,
+            'sql_ms': round(timing.sql_ms, 1),
+            'template_ms': round(timing.template_ms, 1),
+            'app_ms': round(app_ms, 1),
+            'total_ms': round(total_ms, 1),
+        }
+        logger.info(
+            "request_timing %s",
+            ' '.join(f'{key}={value}' for key, value in fields.items()),
+            extra={'timing': fields}
+        )
+
+        slowest = sorted(timing.slow_queries, key=lambda query: query[0], reverse=True)
+        for elapsed, sql, call_site in slowest[:settings.SERVER_TIMING_SLOW_QUERIES]:
+            logger.warning(
+                "slow_query view=%s ms=%.1f sql=%s\n  %s",
+                view, elapsed, sql, '\n  '.join(call_site) or '(no project frames)',
+                extra={'timing': {'view': view, 'ms': round(elapsed, 1), 'sql': sql, 'call_site': call_site}}
+            )
+        return response